@@ -1,17 +1,34 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+import atexit
+import csv
+import io
+import json
 import os
 import sys
+import numpy as np
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import config
+from config import config, Config
 from models.database import db, User, CargoListing, CargoMatch, Vehicle, IndianCity, RouteCache
-from utils.matching_engine import MatchingEngine
+from utils.matching_engine import MatchingEngine, MATCH_COLUMNS
 from utils.route_optimizer import RouteOptimizer
+from utils.geocoder import BulkGeocoder
+from utils.cost_model import estimate_route_costs
+from utils.distance_cache import route_city
+from utils.listing_sweeper import ListingExpirySweeper
+from utils.pagination import parse_page_args, paginate_query
+from utils.http_cache import ResponseCache
+from utils.geo_index import ListingGeoIndex
+from utils.cargo_import import CargoImporter
+from utils.listing_pool import ListingPool, sync_from_database
+from utils.snapshot import WarmStartSnapshot
+from utils.change_events import ChangeEventBus
+from utils.corridor_index import CorridorIndex, listing_ends, sync_corridor_index
 
 app = Flask(__name__)
 app.config.from_object(config['development'])
@@ -22,8 +39,96 @@ jwt = JWTManager(app)
 db.init_app(app)
 
 # Initialize engines
-matching_engine = MatchingEngine()
 route_optimizer = RouteOptimizer()
+matching_engine = MatchingEngine(route_optimizer)
+geocoder = BulkGeocoder(route_optimizer)
+listing_sweeper = ListingExpirySweeper(app)
+http_cache = ResponseCache()
+geo_index = ListingGeoIndex()
+change_bus = ChangeEventBus()
+cargo_importer = CargoImporter(app, geocoder, change_bus)
+listing_pool = ListingPool()
+corridor_index = CorridorIndex()
+warm_start = WarmStartSnapshot()
+
+# Listing and match changes are published on commit; caches follow them
+change_bus.attach(db.session)
+change_bus.subscribe(lambda change: http_cache.bump('cargo'), tables=('cargo_listings',))
+# Writes from other workers reach the ETags through the host-wide log sequence
+http_cache.share('cargo', change_bus.current_seq)
+listing_sweeper.add_listener(
+    lambda expired_ids: change_bus.emit('cargo_listings', 'update', expired_ids, {'status': 'expired'}))
+listing_sweeper.start()
+
+def save_warm_start():
+    try:
+        warm_start.save(listing_pool if Config.MATCH_POOL_RESIDENT else None, geocoder, route_optimizer.distance_cache,
+                        exchange_cache=route_optimizer.exchange_cache)
+    except Exception as e:
+        print(f"Error saving warm-start snapshot: {e}")
+
+if Config.SNAPSHOT_ENABLED:
+    # The pool catches up on listings changed since the snapshot on its first sync; exchange
+    # points pre-warmed by `python -m utils.snapshot` come in with it
+    warm_start.load(listing_pool if Config.MATCH_POOL_RESIDENT else None, geocoder, route_optimizer.distance_cache,
+                    exchange_cache=route_optimizer.exchange_cache)
+    if Config.SNAPSHOT_ON_EXIT:
+        atexit.register(save_warm_start)
+
+def save_listing_coordinates(cargo_id, prefix):
+    """Build a geocoder callback that writes coordinates back to a listing"""
+    def callback(lat, lng):
+        values = {f'{prefix}_lat': lat, f'{prefix}_lng': lng}
+        with app.app_context():
+            CargoListing.query.filter_by(id=cargo_id).update(values)
+            db.session.commit()
+        change_bus.emit('cargo_listings', 'update', [cargo_id], values)
+    return callback
+
+def match_candidate_rows(cargo):
+    """Active listings near the cargo's route ends, as lean rows of MATCH_COLUMNS"""
+    query = db.select(*[getattr(CargoListing, column) for column in MATCH_COLUMNS]) \
+        .where(CargoListing.status == 'active')
+    return db.session.execute(geo_index.match_candidates(cargo, query)).all()
+
+def current_listing_pool():
+    """The resident pool, caught up with listings changed since its last sync"""
+    return sync_from_database(listing_pool, db.session)
+
+def current_corridor_index():
+    """The corridor index, caught up with listings changed since its last sync"""
+    return sync_corridor_index(corridor_index, db.session)
+
+def save_route_geometry(origin, destination, route_details):
+    """Fetch directions for a lane without cached geometry and keep them (simplified) in RouteCache"""
+    origin_city, destination_city = route_city(origin), route_city(destination)
+    try:
+        cached = RouteCache.query.filter_by(origin_city=origin_city, destination_city=destination_city).first()
+        if cached is not None and cached.geometry is not None:
+            return cached
+        route = route_optimizer.get_directions(origin, destination)
+        if route is None:
+            return None
+        if cached is None:
+            cached = RouteCache(origin_city=origin_city, destination_city=destination_city)
+            db.session.add(cached)
+        cached.distance = route_details['distance']
+        cached.duration = int(route_details['duration'])
+        cached.toll_charges = route_details['toll_charges']
+        cached.fuel_cost = route_details['fuel_cost']
+        cached.set_google_route(route)
+        db.session.commit()
+        return cached
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error caching route geometry: {e}")
+        return None
+
+def load_listing_details(ids):
+    """Full listing dicts by id, for the matches that are returned"""
+    if not ids:
+        return {}
+    return {listing.id: listing.to_dict() for listing in CargoListing.query.filter(CargoListing.id.in_(ids))}
 
 @app.route('/', methods=['GET'])
 def home():
@@ -41,17 +146,24 @@ def home():
                 "/cargo/create": "POST - Create cargo listing",
                 "/cargo/list": "GET - List all cargo",
                 "/cargo/<id>": "GET - Get specific cargo",
-                "/cargo/<id>/matches": "GET - Find matches for cargo"
+                "/cargo/<id>/matches": "GET - Find matches for cargo",
+                "/cargo/import": "POST - Bulk import listings from a CSV or XLSX file",
+                "/cargo/nearby": "GET - Listings starting or ending near a point or inside a box"
             },
             "matching": {
                 "/matching/find": "POST - Find compatible matches",
+                "/matching/corridor": "POST - Loads along a listing's route, or routes a load fits along",
                 "/matching/accept": "POST - Accept a match",
                 "/matching/reject": "POST - Reject a match"
             },
             "routes": {
                 "/routes/optimize": "POST - Optimize route",
                 "/routes/cost": "POST - Calculate route cost",
-                "/routes/exchange-points": "POST - Find exchange points"
+                "/routes/exchange-points": "POST - Find exchange points",
+                "/routes/fleet-plan": "POST - Plan multi-stop routes for a fleet"
+            },
+            "geocoding": {
+                "/geocode/bulk": "POST - Queue addresses for background geocoding"
             }
         }
     })
@@ -160,9 +272,9 @@ def create_cargo():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        # Get coordinates for origin and destination
-        origin_lat, origin_lng = route_optimizer.get_coordinates(data['origin_city'], data['origin_state'])
-        dest_lat, dest_lng = route_optimizer.get_coordinates(data['destination_city'], data['destination_state'])
+        # Use cached coordinates; misses are geocoded in the background
+        origin_lat, origin_lng = geocoder.lookup(data['origin_city'], data['origin_state'])
+        dest_lat, dest_lng = geocoder.lookup(data['destination_city'], data['destination_state'])
         
         # Create cargo listing
         cargo = CargoListing(
@@ -190,6 +302,12 @@ def create_cargo():
         db.session.add(cargo)
         db.session.commit()
         
+        if origin_lat is None:
+            geocoder.submit(cargo.origin_city, cargo.origin_state, save_listing_coordinates(cargo.id, 'origin'))
+        if dest_lat is None:
+            geocoder.submit(cargo.destination_city, cargo.destination_state,
+                            save_listing_coordinates(cargo.id, 'destination'))
+        
         return jsonify({
             "message": "Cargo listing created successfully",
             "cargo": cargo.to_dict()
@@ -199,8 +317,31 @@ def create_cargo():
         db.session.rollback()
         return jsonify({"error": f"Failed to create cargo listing: {str(e)}"}), 500
 
+@app.route('/cargo/import', methods=['POST'])
+@jwt_required()
+def import_cargo():
+    try:
+        user_id = get_jwt_identity()
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return jsonify({"error": "Upload a CSV or XLSX file in the 'file' field"}), 400
+        
+        try:
+            report = cargo_importer.run(upload.stream, upload.filename, user_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify({
+            "message": f"Imported {report['imported']} cargo listings",
+            **report
+        }), 201 if report['imported'] else 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to import cargo listings: {str(e)}"}), 500
+
 @app.route('/cargo/list', methods=['GET'])
 @jwt_required()
+@http_cache.cached('cargo', ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def list_cargo():
     try:
         # Get query parameters
@@ -209,6 +350,11 @@ def list_cargo():
         origin_city = request.args.get('origin_city')
         destination_city = request.args.get('destination_city')
         
+        try:
+            limit, cursor, fields, count_mode = parse_page_args(request.args, CargoListing.__table__.columns.keys())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
         # Build query
         query = CargoListing.query
         
@@ -221,19 +367,64 @@ def list_cargo():
         if destination_city:
             query = query.filter(CargoListing.destination_city == destination_city)
         
-        # Get results
-        cargo_listings = query.order_by(CargoListing.created_at.desc()).all()
+        # Get one page of results, newest first
+        cargo_listings, next_cursor, total, total_is_estimate = paginate_query(
+            query, CargoListing, limit, cursor, fields, count_mode
+        )
         
         return jsonify({
-            "cargo_listings": [cargo.to_dict() for cargo in cargo_listings],
-            "total": len(cargo_listings)
+            "cargo_listings": cargo_listings,
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         })
         
     except Exception as e:
         return jsonify({"error": f"Failed to fetch cargo listings: {str(e)}"}), 500
 
+@app.route('/cargo/nearby', methods=['GET'])
+@jwt_required()
+def nearby_cargo():
+    try:
+        end = request.args.get('end', 'origin')
+        status = request.args.get('status', 'active')
+        limit = min(request.args.get('limit', Config.PAGE_SIZE_DEFAULT, type=int), Config.PAGE_SIZE_MAX)
+        
+        query = CargoListing.query
+        if status:
+            query = query.filter(CargoListing.status == status)
+        
+        box = [request.args.get(k, type=float) for k in ('min_lat', 'max_lat', 'min_lng', 'max_lng')]
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        
+        if all(v is not None for v in box):
+            listings = query.filter(geo_index.bbox_filter(end, *box)) \
+                .order_by(CargoListing.created_at.desc()).limit(limit).all()
+            results = [listing.to_dict() for listing in listings]
+        elif lat is not None and lng is not None:
+            radius_km = min(request.args.get('radius_km', Config.NEARBY_DEFAULT_RADIUS_KM, type=float),
+                            Config.NEARBY_MAX_RADIUS_KM)
+            nearby = geo_index.within_radius(query, end, lat, lng, radius_km)[:limit]
+            results = [dict(listing.to_dict(), distance_km=round(distance, 2)) for listing, distance in nearby]
+        else:
+            return jsonify({"error": "Provide lat and lng (with optional radius_km) or min_lat, max_lat, min_lng and max_lng"}), 400
+        
+        return jsonify({
+            "cargo_listings": results,
+            "total": len(results),
+            "end": end
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to fetch nearby cargo: {str(e)}"}), 500
+
 @app.route('/cargo/<cargo_id>', methods=['GET'])
 @jwt_required()
+@http_cache.cached('cargo', vary=(), ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def get_cargo(cargo_id):
     try:
         cargo = CargoListing.query.get(cargo_id)
@@ -257,11 +448,12 @@ def find_matches(cargo_id):
         if not cargo:
             return jsonify({"error": "Cargo listing not found"}), 404
         
-        # Get all active cargo listings
-        all_listings = CargoListing.query.filter_by(status='active').all()
-        
-        # Find compatible matches
-        matches = matching_engine.find_compatible_matches(cargo, all_listings)
+        # Score lean rows; full listings are loaded for the returned matches only
+        if Config.MATCH_POOL_RESIDENT:
+            matches = matching_engine.find_pool_matches(cargo, current_listing_pool(), load_details=load_listing_details)
+        else:
+            candidates = match_candidate_rows(cargo)
+            matches = matching_engine.find_compatible_matches(cargo, candidates, load_details=load_listing_details)
         
         return jsonify({
             "cargo_id": cargo_id,
@@ -287,11 +479,12 @@ def find_compatible_matches():
         if not cargo:
             return jsonify({"error": "Cargo listing not found"}), 404
         
-        # Get all active cargo listings
-        all_listings = CargoListing.query.filter_by(status='active').all()
-        
-        # Find compatible matches
-        matches = matching_engine.find_compatible_matches(cargo, all_listings)
+        # Score lean rows; full listings are loaded for the returned matches only
+        if Config.MATCH_POOL_RESIDENT:
+            matches = matching_engine.find_pool_matches(cargo, current_listing_pool(), load_details=load_listing_details)
+        else:
+            candidates = match_candidate_rows(cargo)
+            matches = matching_engine.find_compatible_matches(cargo, candidates, load_details=load_listing_details)
         
         return jsonify({
             "cargo": cargo.to_dict(),
@@ -302,6 +495,58 @@ def find_compatible_matches():
     except Exception as e:
         return jsonify({"error": f"Failed to find matches: {str(e)}"}), 500
 
+@app.route('/matching/corridor', methods=['POST'])
+@jwt_required()
+def find_corridor_matches():
+    try:
+        data = request.get_json()
+        cargo_id = data.get('cargo_id')
+        mode = data.get('mode', 'loads')
+        
+        if not cargo_id:
+            return jsonify({"error": "Cargo ID required"}), 400
+        if mode not in ('loads', 'carriers'):
+            return jsonify({"error": "Mode must be 'loads' or 'carriers'"}), 400
+        try:
+            detour_km = float(data.get('detour_km', Config.CORRIDOR_DETOUR_DEFAULT_KM))
+            limit = min(int(data.get('limit', Config.PAGE_SIZE_DEFAULT)), Config.PAGE_SIZE_MAX)
+        except (TypeError, ValueError):
+            return jsonify({"error": "detour_km and limit must be numbers"}), 400
+        if not 0 < detour_km <= Config.CORRIDOR_DETOUR_MAX_KM:
+            return jsonify({"error": f"detour_km must be between 0 and {Config.CORRIDOR_DETOUR_MAX_KM}"}), 400
+        
+        cargo = CargoListing.query.get(cargo_id)
+        if not cargo:
+            return jsonify({"error": "Cargo listing not found"}), 404
+        
+        index = current_corridor_index()
+        if mode == 'loads':
+            # Other loads a carrier on this listing's route could pick up and drop off on the way
+            results = index.loads_along(cargo.id, detour_km, exclude_user=cargo.user_id, limit=limit)
+            if results is None:
+                return jsonify({"error": "Listing is not active or its route is unknown"}), 400
+        else:
+            # Other listings' routes this listing's load could ride along
+            ends = listing_ends(cargo)
+            if ends is None:
+                return jsonify({"error": "Listing has no coordinates"}), 400
+            results = index.carriers_for_load(ends, detour_km, exclude_id=cargo.id,
+                                              exclude_user=cargo.user_id, limit=limit)
+        
+        details = load_listing_details([result['id'] for result in results])
+        matches = [dict(result, cargo_listing=details.get(result['id'])) for result in results]
+        
+        return jsonify({
+            "cargo": cargo.to_dict(),
+            "mode": mode,
+            "detour_km": detour_km,
+            "matches": matches,
+            "total_matches": len(matches)
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to find corridor matches: {str(e)}"}), 500
+
 @app.route('/matching/accept', methods=['POST'])
 @jwt_required()
 def accept_match():
@@ -365,6 +610,9 @@ def optimize_route():
         if not route_details:
             return jsonify({"error": "Could not calculate route"}), 400
         
+        # Road geometry for corridor matching on this lane
+        save_route_geometry(origin, destination, route_details)
+        
         return jsonify({
             "origin": origin,
             "destination": destination,
@@ -374,6 +622,98 @@ def optimize_route():
     except Exception as e:
         return jsonify({"error": f"Failed to optimize route: {str(e)}"}), 500
 
+def lookup_place_coordinates(places):
+    """Resolve "City, State" strings to coordinates from the geocode cache and city table"""
+    coords = {}
+    unresolved = []
+    for place in places:
+        city, _, state = place.partition(',')
+        lat, lng = geocoder.lookup(city.strip(), state.strip())
+        if lat is not None:
+            coords[place] = (lat, lng)
+        else:
+            unresolved.append(place)
+    
+    if unresolved:
+        names = {place.partition(',')[0].strip() for place in unresolved}
+        cities = {}
+        for city in IndianCity.query.filter(IndianCity.city_name.in_(names)).all():
+            cities.setdefault(city.city_name, (city.latitude, city.longitude))
+        for place in unresolved:
+            name = place.partition(',')[0].strip()
+            if name in cities:
+                coords[place] = cities[name]
+    
+    return coords
+
+def stream_cost_table(rows, columns, output_format, chunk_size=1000):
+    """Yield a cost table as CSV or newline-delimited JSON, chunk by chunk"""
+    if output_format == 'ndjson':
+        for start in range(0, len(rows), chunk_size):
+            yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows[start:start + chunk_size])
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for start in range(0, len(rows), chunk_size):
+        writer.writerows(rows[start:start + chunk_size])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+@app.route('/routes/cost', methods=['POST'])
+@jwt_required()
+def calculate_route_costs():
+    try:
+        data = request.get_json()
+        pairs = data.get('pairs')
+        vehicle_type = data.get('vehicle_type', 'truck')
+        fuel_type = data.get('fuel_type', 'Diesel')
+        output_format = data.get('format', 'csv')
+        
+        if not pairs or not isinstance(pairs, list):
+            return jsonify({"error": "Origin/destination pairs required"}), 400
+        if len(pairs) > Config.BULK_COST_MAX_PAIRS:
+            return jsonify({"error": f"At most {Config.BULK_COST_MAX_PAIRS} pairs per request"}), 400
+        if any(not isinstance(pair, dict) or not pair.get('origin') or not pair.get('destination') for pair in pairs):
+            return jsonify({"error": "Every pair needs an origin and destination"}), 400
+        
+        keys = [(pair['origin'], pair['destination']) for pair in pairs]
+        
+        # Cached road distances first, then coordinate estimates for the rest
+        route_optimizer.distance_cache.load_route_cache(keys)
+        
+        places = {place for key in keys for place in key}
+        known = lookup_place_coordinates(places)
+        coords = np.full((len(pairs), 4), np.nan)
+        for i, pair in enumerate(pairs):
+            origin = pair.get('origin_coords')
+            destination = pair.get('destination_coords')
+            origin = (origin['lat'], origin['lng']) if origin else known.get(pair['origin'])
+            destination = (destination['lat'], destination['lng']) if destination else known.get(pair['destination'])
+            if origin and destination:
+                coords[i] = (*origin, *destination)
+        
+        distances, durations, sources = route_optimizer.distance_cache.resolve_many(keys, coords)
+        costs = estimate_route_costs(distances, durations, vehicle_type, fuel_type)
+        
+        columns = ['origin', 'destination', 'distance', 'duration', 'fuel_cost',
+                   'toll_charges', 'labor_cost', 'total_cost', 'source']
+        values = np.round(np.column_stack([
+            distances, durations, costs['fuel_cost'], costs['toll_charges'],
+            costs['labor_cost'], costs['total_cost']
+        ]), 2)
+        values = np.where(np.isnan(values), None, values).tolist()
+        rows = [[origin, destination, *row, source]
+                for (origin, destination), row, source in zip(keys, values, sources)]
+        
+        mimetype = 'application/x-ndjson' if output_format == 'ndjson' else 'text/csv'
+        return Response(stream_cost_table(rows, columns, output_format), mimetype=mimetype)
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to calculate route costs: {str(e)}"}), 500
+
 @app.route('/routes/exchange-points', methods=['POST'])
 @jwt_required()
 def find_exchange_points():
@@ -388,9 +728,13 @@ def find_exchange_points():
         if not all([route1_origin, route1_dest, route2_origin, route2_dest]):
             return jsonify({"error": "All route points required"}), 400
         
+        objective = data.get('objective', 'total')
+        if objective not in ('total', 'max'):
+            return jsonify({"error": "Objective must be 'total' or 'max'"}), 400
+        
         # Find exchange points
         exchange_points = route_optimizer.find_exchange_points(
-            route1_origin, route1_dest, route2_origin, route2_dest
+            route1_origin, route1_dest, route2_origin, route2_dest, objective
         )
         
         return jsonify({
@@ -401,8 +745,92 @@ def find_exchange_points():
     except Exception as e:
         return jsonify({"error": f"Failed to find exchange points: {str(e)}"}), 500
 
+@app.route('/routes/fleet-plan', methods=['POST'])
+@jwt_required()
+def plan_fleet_routes():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        depot = data.get('depot')
+        if not depot:
+            return jsonify({"error": "Depot required"}), 400
+        
+        if 'lat' not in depot or 'lng' not in depot:
+            depot_lat, depot_lng = route_optimizer.get_coordinates(depot.get('city'), depot.get('state'))
+            if depot_lat is None:
+                return jsonify({"error": "Could not locate depot"}), 400
+            depot = {'lat': depot_lat, 'lng': depot_lng}
+        
+        # Stops are either given directly or taken from cargo pickups
+        stops = data.get('stops')
+        if not stops and data.get('cargo_ids'):
+            listings = CargoListing.query.filter(CargoListing.id.in_(data['cargo_ids'])).all()
+            stops = [
+                {'id': c.id, 'lat': c.origin_lat, 'lng': c.origin_lng, 'weight': c.weight}
+                for c in listings if c.origin_lat is not None and c.origin_lng is not None
+            ]
+        if not stops:
+            return jsonify({"error": "Stops or cargo IDs required"}), 400
+        
+        # Use the transporter's available vehicles
+        query = Vehicle.query.filter_by(user_id=user_id, is_available=True)
+        if data.get('vehicle_ids'):
+            query = query.filter(Vehicle.id.in_(data['vehicle_ids']))
+        vehicles = [vehicle.to_dict() for vehicle in query.all()]
+        
+        if not vehicles:
+            return jsonify({"error": "No available vehicles"}), 400
+        
+        plan = route_optimizer.plan_fleet_routes(depot, stops, vehicles)
+        
+        if plan is None:
+            return jsonify({"error": "Could not plan routes"}), 400
+        
+        return jsonify({
+            "depot": depot,
+            "plan": plan,
+            "total_vehicles": len(plan['routes'])
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to plan fleet routes: {str(e)}"}), 500
+
+# Geocoding endpoints
+@app.route('/geocode/bulk', methods=['POST'])
+@jwt_required()
+def bulk_geocode():
+    try:
+        data = request.get_json()
+        addresses = data.get('addresses')
+        
+        if not addresses:
+            return jsonify({"error": "Addresses required"}), 400
+        
+        results = geocoder.submit_many(
+            (address.get('city'), address.get('state')) for address in addresses
+        )
+        
+        return jsonify({
+            "results": [
+                {
+                    'city': city,
+                    'state': state,
+                    'lat': lat,
+                    'lng': lng,
+                    'status': 'resolved' if lat is not None else 'pending'
+                }
+                for city, state, lat, lng in results
+            ],
+            "pending": geocoder.pending_count()
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to geocode addresses: {str(e)}"}), 500
+
 # Indian cities endpoint
 @app.route('/cities/india', methods=['GET'])
+@http_cache.cached('cities', vary=('state', 'major_only'), ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def get_indian_cities():
     try:
         # Get query parameters
@@ -432,7 +860,11 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "listing_expiry": dict(listing_sweeper.stats),
+        "warm_start": dict(warm_start.stats),
+        "change_events": dict(change_bus.stats),
+        "exchange_cache": dict(route_optimizer.exchange_cache.stats, size=len(route_optimizer.exchange_cache))
     })
 
 if __name__ == '__main__':
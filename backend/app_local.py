@@ -3,57 +3,109 @@ from flask_cors import CORS
 import json
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 import uuid
+from config import Config
+from utils.cost_model import exchange_cost_savings
+from utils.distance_cache import DistanceCache
+from utils.indian_towns import find_town
+from utils.lane_index import LaneIndex
+from utils.local_storage import create_store
+from utils.meeting_point import MeetingPointOptimizer
+from utils.pagination import parse_page_args, paginate_records
+from utils.http_cache import ResponseCache
 
 app = Flask(__name__)
 CORS(app)
 
-# Local JSON file storage paths
-DATA_DIR = 'local_data'
-USERS_FILE = os.path.join(DATA_DIR, 'users.json')
-CARGO_FILE = os.path.join(DATA_DIR, 'cargo_listings.json')
-MATCHES_FILE = os.path.join(DATA_DIR, 'matches.json')
+distance_cache = DistanceCache()
+meeting_point_optimizer = MeetingPointOptimizer(distance_cache=distance_cache)
 
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
+# Local storage (JSON files by default, see LOCAL_STORAGE_MODE)
+store = create_store()
+lane_index = LaneIndex()
+http_cache = ResponseCache()
 
-# Initialize empty JSON files if they don't exist
-def init_data_files():
-    files = {
-        USERS_FILE: [],
-        CARGO_FILE: [],
-        MATCHES_FILE: []
-    }
-    
-    for file_path, default_data in files.items():
-        if not os.path.exists(file_path):
-            with open(file_path, 'w') as f:
-                json.dump(default_data, f, indent=2)
+# Predefined exchange points for major Indian routes
+EXCHANGE_POINTS = {
+    ('Mumbai', 'Delhi'): 'Udaipur (Rajasthan)',
+    ('Delhi', 'Mumbai'): 'Udaipur (Rajasthan)',
+    ('Pune', 'Nagpur'): 'Aurangabad (Maharashtra)',
+    ('Nagpur', 'Pune'): 'Aurangabad (Maharashtra)',
+    ('Bangalore', 'Chennai'): 'Hosur (Tamil Nadu)',
+    ('Chennai', 'Bangalore'): 'Hosur (Tamil Nadu)',
+    ('Kolkata', 'Bhubaneswar'): 'Cuttack (Odisha)',
+    ('Mumbai', 'Bangalore'): 'Belgaum (Karnataka)',
+    ('Delhi', 'Kolkata'): 'Dhanbad (Jharkhand)',
+    ('Chennai', 'Hyderabad'): 'Tirupati (Andhra Pradesh)',
+    ('Mumbai', 'Pune'): 'Lonavala (Maharashtra)',
+    ('Delhi', 'Jaipur'): 'Alwar (Rajasthan)',
+    ('Bangalore', 'Hyderabad'): 'Anantapur (Andhra Pradesh)',
+    ('Mumbai', 'Ahmedabad'): 'Surat (Gujarat)',
+    ('Delhi', 'Lucknow'): 'Aligarh (Uttar Pradesh)'
+}
 
-# Helper functions to read/write JSON files
-def read_json_file(file_path):
-    try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+MAJOR_CITIES = [
+    {'name': 'Mumbai', 'lat': 19.0760, 'lng': 72.8777},
+    {'name': 'Delhi', 'lat': 28.6139, 'lng': 77.2090},
+    {'name': 'Bangalore', 'lat': 12.9716, 'lng': 77.5946},
+    {'name': 'Chennai', 'lat': 13.0827, 'lng': 80.2707},
+    {'name': 'Kolkata', 'lat': 22.5726, 'lng': 88.3639},
+    {'name': 'Hyderabad', 'lat': 17.3850, 'lng': 78.4867},
+    {'name': 'Pune', 'lat': 18.5204, 'lng': 73.8567},
+    {'name': 'Ahmedabad', 'lat': 23.0225, 'lng': 72.5714},
+    {'name': 'Jaipur', 'lat': 26.9124, 'lng': 75.7873},
+    {'name': 'Surat', 'lat': 21.1702, 'lng': 72.8311},
+    {'name': 'Nagpur', 'lat': 21.1458, 'lng': 79.0882},
+    {'name': 'Indore', 'lat': 22.7196, 'lng': 75.8577},
+    {'name': 'Bhopal', 'lat': 23.2599, 'lng': 77.4126},
+    {'name': 'Aurangabad', 'lat': 19.8762, 'lng': 75.3433}  # Good for Pune-Nagpur route
+]
 
-def write_json_file(file_path, data):
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+# Served by /cities/india
+INDIAN_CITIES = [
+    {'city_name': 'Mumbai', 'state': 'Maharashtra', 'latitude': 19.0760, 'longitude': 72.8777, 'is_major_city': True},
+    {'city_name': 'Delhi', 'state': 'Delhi', 'latitude': 28.7041, 'longitude': 77.1025, 'is_major_city': True},
+    {'city_name': 'Bangalore', 'state': 'Karnataka', 'latitude': 12.9716, 'longitude': 77.5946, 'is_major_city': True},
+    {'city_name': 'Chennai', 'state': 'Tamil Nadu', 'latitude': 13.0827, 'longitude': 80.2707, 'is_major_city': True},
+    {'city_name': 'Kolkata', 'state': 'West Bengal', 'latitude': 22.5726, 'longitude': 88.3639, 'is_major_city': True},
+    {'city_name': 'Hyderabad', 'state': 'Telangana', 'latitude': 17.3850, 'longitude': 78.4867, 'is_major_city': True},
+    {'city_name': 'Pune', 'state': 'Maharashtra', 'latitude': 18.5204, 'longitude': 73.8567, 'is_major_city': True},
+    {'city_name': 'Ahmedabad', 'state': 'Gujarat', 'latitude': 23.0225, 'longitude': 72.5714, 'is_major_city': True},
+    {'city_name': 'Jaipur', 'state': 'Rajasthan', 'latitude': 26.9124, 'longitude': 75.7873, 'is_major_city': True},
+    {'city_name': 'Lucknow', 'state': 'Uttar Pradesh', 'latitude': 26.8467, 'longitude': 80.9462, 'is_major_city': True},
+    {'city_name': 'Kanpur', 'state': 'Uttar Pradesh', 'latitude': 26.4499, 'longitude': 80.3319, 'is_major_city': False},
+    {'city_name': 'Nagpur', 'state': 'Maharashtra', 'latitude': 21.1458, 'longitude': 79.0882, 'is_major_city': False},
+    {'city_name': 'Indore', 'state': 'Madhya Pradesh', 'latitude': 22.7196, 'longitude': 75.8577, 'is_major_city': False},
+    {'city_name': 'Thane', 'state': 'Maharashtra', 'latitude': 19.2183, 'longitude': 72.9781, 'is_major_city': False},
+    {'city_name': 'Bhopal', 'state': 'Madhya Pradesh', 'latitude': 23.2599, 'longitude': 77.4126, 'is_major_city': False},
+    {'city_name': 'Visakhapatnam', 'state': 'Andhra Pradesh', 'latitude': 17.6868, 'longitude': 83.2185, 'is_major_city': False},
+    {'city_name': 'Patna', 'state': 'Bihar', 'latitude': 25.5941, 'longitude': 85.1376, 'is_major_city': False},
+    {'city_name': 'Vadodara', 'state': 'Gujarat', 'latitude': 22.3072, 'longitude': 73.1812, 'is_major_city': False},
+    {'city_name': 'Ghaziabad', 'state': 'Uttar Pradesh', 'latitude': 28.6692, 'longitude': 77.4538, 'is_major_city': False},
+    {'city_name': 'Ludhiana', 'state': 'Punjab', 'latitude': 30.9010, 'longitude': 75.8573, 'is_major_city': False}
+]
 
 def get_optimal_exchange_point(origin, destination, origin_coords=None, dest_coords=None):
     """Calculate optimal exchange point using Google Maps API or fallback to predefined points"""
+    try:
+        origin_point = (origin_coords['lat'], origin_coords['lng']) if origin_coords else None
+        dest_point = (dest_coords['lat'], dest_coords['lng']) if dest_coords else None
+    except (KeyError, TypeError) as e:
+        print(f"Error calculating midpoint: {e}")
+        origin_point = dest_point = None
+    return resolve_exchange_point(origin, destination, origin_point, dest_point)
+
+@lru_cache(maxsize=4096)
+def resolve_exchange_point(origin, destination, origin_point, dest_point):
+    """Memoized exchange point for a lane; points are (lat, lng) tuples or None"""
     
     # If coordinates are provided, calculate geometric midpoint
-    if origin_coords and dest_coords:
+    if origin_point and dest_point:
         try:
             # Calculate geographic midpoint
-            lat1, lng1 = origin_coords['lat'], origin_coords['lng']
-            lat2, lng2 = dest_coords['lat'], dest_coords['lng']
-            
-            mid_lat = (lat1 + lat2) / 2
-            mid_lng = (lng1 + lng2) / 2
+            mid_lat = (origin_point[0] + dest_point[0]) / 2
+            mid_lng = (origin_point[1] + dest_point[1]) / 2
             
             # Return a nice description with coordinates and nearest major city
             nearest_city = find_nearest_major_city(mid_lat, mid_lng)
@@ -62,56 +114,26 @@ def get_optimal_exchange_point(origin, destination, origin_coords=None, dest_coo
         except Exception as e:
             print(f"Error calculating midpoint: {e}")
     
-    # Fallback to predefined exchange points for major Indian routes
-    exchange_points = {
-        ('Mumbai', 'Delhi'): 'Udaipur (Rajasthan)',
-        ('Delhi', 'Mumbai'): 'Udaipur (Rajasthan)',
-        ('Pune', 'Nagpur'): 'Aurangabad (Maharashtra)',
-        ('Nagpur', 'Pune'): 'Aurangabad (Maharashtra)',
-        ('Bangalore', 'Chennai'): 'Hosur (Tamil Nadu)',
-        ('Chennai', 'Bangalore'): 'Hosur (Tamil Nadu)',
-        ('Kolkata', 'Bhubaneswar'): 'Cuttack (Odisha)',
-        ('Mumbai', 'Bangalore'): 'Belgaum (Karnataka)',
-        ('Delhi', 'Kolkata'): 'Dhanbad (Jharkhand)',
-        ('Chennai', 'Hyderabad'): 'Tirupati (Andhra Pradesh)',
-        ('Mumbai', 'Pune'): 'Lonavala (Maharashtra)',
-        ('Delhi', 'Jaipur'): 'Alwar (Rajasthan)',
-        ('Bangalore', 'Hyderabad'): 'Anantapur (Andhra Pradesh)',
-        ('Mumbai', 'Ahmedabad'): 'Surat (Gujarat)',
-        ('Delhi', 'Lucknow'): 'Aligarh (Uttar Pradesh)'
-    }
-    
     # Try to find specific exchange point
     key = (origin, destination)
-    if key in exchange_points:
-        return exchange_points[key]
+    if key in EXCHANGE_POINTS:
+        return EXCHANGE_POINTS[key]
     
     # If not found, return a generic description
     return f"Optimal midpoint between {origin} and {destination}"
 
+def route_point(place, coords=None):
+    """A place as a distance cache key plus coordinates (the client's, else the known town's)"""
+    coords = coords or find_town(place)
+    lat, lng = (coords.get('lat'), coords.get('lng')) if coords else (None, None)
+    return {'key': place, 'lat': lat, 'lng': lng}
+
 def find_nearest_major_city(lat, lng):
     """Find the nearest major Indian city to given coordinates"""
-    major_cities = [
-        {'name': 'Mumbai', 'lat': 19.0760, 'lng': 72.8777},
-        {'name': 'Delhi', 'lat': 28.6139, 'lng': 77.2090},
-        {'name': 'Bangalore', 'lat': 12.9716, 'lng': 77.5946},
-        {'name': 'Chennai', 'lat': 13.0827, 'lng': 80.2707},
-        {'name': 'Kolkata', 'lat': 22.5726, 'lng': 88.3639},
-        {'name': 'Hyderabad', 'lat': 17.3850, 'lng': 78.4867},
-        {'name': 'Pune', 'lat': 18.5204, 'lng': 73.8567},
-        {'name': 'Ahmedabad', 'lat': 23.0225, 'lng': 72.5714},
-        {'name': 'Jaipur', 'lat': 26.9124, 'lng': 75.7873},
-        {'name': 'Surat', 'lat': 21.1702, 'lng': 72.8311},
-        {'name': 'Nagpur', 'lat': 21.1458, 'lng': 79.0882},
-        {'name': 'Indore', 'lat': 22.7196, 'lng': 75.8577},
-        {'name': 'Bhopal', 'lat': 23.2599, 'lng': 77.4126},
-        {'name': 'Aurangabad', 'lat': 19.8762, 'lng': 75.3433}  # Good for Pune-Nagpur route
-    ]
-    
     min_distance = float('inf')
     nearest_city = "Central India"
     
-    for city in major_cities:
+    for city in MAJOR_CITIES:
         # Calculate approximate distance using Haversine formula (simplified)
         dlat = lat - city['lat']
         dlng = lng - city['lng']
@@ -123,6 +145,13 @@ def find_nearest_major_city(lat, lng):
     
     return nearest_city
 
+def current_lane_index():
+    """Lane index over the matching pool, rebuilt only if the store changed behind it"""
+    cargo_count = store.count('cargo')
+    if lane_index.source_count != cargo_count:
+        lane_index.rebuild(store.matching_pool(), cargo_count)
+    return lane_index
+
 def calculate_real_midpoint_with_google_maps(origin_coords, dest_coords, google_maps_api_key=None):
     """Calculate real midpoint using Google Maps API"""
     try:
@@ -169,16 +198,13 @@ def calculate_real_midpoint_with_google_maps(origin_coords, dest_coords, google_
         print(f"Error with Google Maps API: {e}")
         return None
 
-# Initialize data files
-init_data_files()
-
 @app.route('/', methods=['GET'])
 def home():
     return jsonify({
         "message": "🚛 India Cargo Exchange Platform API",
         "version": "1.0.0",
         "status": "running",
-        "storage": "Local JSON Files",
+        "storage": store.label,
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
             "auth": {
@@ -211,13 +237,9 @@ def register():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        # Read existing users
-        users = read_json_file(USERS_FILE)
-        
         # Check if user already exists
-        for user in users:
-            if user['email'] == data['email']:
-                return jsonify({"error": "Email already registered"}), 400
+        if store.find_one('users', email=data['email']):
+            return jsonify({"error": "Email already registered"}), 400
         
         # Create new user
         new_user = {
@@ -232,8 +254,7 @@ def register():
             'created_at': datetime.now().isoformat()
         }
         
-        users.append(new_user)
-        write_json_file(USERS_FILE, users)
+        store.insert('users', new_user)
         
         # Generate a simple token (user ID for demo)
         token = new_user['id']
@@ -261,16 +282,10 @@ def login():
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({"error": "Email and password required"}), 400
         
-        users = read_json_file(USERS_FILE)
-        
         # Find user and check password
-        user = None
-        for u in users:
-            if u['email'] == data['email'] and u.get('password') == data['password']:
-                user = u
-                break
+        user = store.find_one('users', email=data['email'])
         
-        if user:
+        if user and user.get('password') == data['password']:
             # Generate token (user ID for demo)
             token = user['id']
             
@@ -300,14 +315,9 @@ def get_profile():
             return jsonify({"error": "No token provided"}), 401
         
         token = auth_header.split(' ')[1]
-        users = read_json_file(USERS_FILE)
         
         # Find user by token (token is user ID in our simple implementation)
-        user = None
-        for u in users:
-            if u['id'] == token:
-                user = u
-                break
+        user = store.get('users', token)
         
         if user:
             return jsonify({
@@ -336,9 +346,6 @@ def create_cargo():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        # Read existing cargo listings
-        cargo_listings = read_json_file(CARGO_FILE)
-        
         # Create new cargo listing (match frontend field names)
         new_cargo = {
             'id': str(uuid.uuid4()),
@@ -358,8 +365,9 @@ def create_cargo():
             'created_at': datetime.now().isoformat()
         }
         
-        cargo_listings.append(new_cargo)
-        write_json_file(CARGO_FILE, cargo_listings)
+        store.insert('cargo', new_cargo)
+        lane_index.add(new_cargo)
+        http_cache.bump('cargo')
         
         return jsonify({
             "message": "Cargo listing created successfully",
@@ -370,6 +378,7 @@ def create_cargo():
         return jsonify({"error": f"Failed to create cargo listing: {str(e)}"}), 500
 
 @app.route('/cargo/list', methods=['GET'])
+@http_cache.cached('cargo', ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def list_cargo():
     try:
         # Get query parameters
@@ -378,20 +387,14 @@ def list_cargo():
         origin_city = request.args.get('origin_city')
         destination_city = request.args.get('destination_city')
         
-        cargo_listings = read_json_file(CARGO_FILE)
-        
         # Filter cargo listings
-        filtered_listings = []
-        for cargo in cargo_listings:
-            if status and cargo.get('status') != status:
-                continue
-            if cargo_type and cargo.get('cargo_type') != cargo_type:
-                continue
-            if origin_city and cargo.get('origin_city') != origin_city:
-                continue
-            if destination_city and cargo.get('destination_city') != destination_city:
-                continue
-            filtered_listings.append(cargo)
+        criteria = {
+            'status': status,
+            'cargo_type': cargo_type,
+            'origin_city': origin_city,
+            'destination_city': destination_city
+        }
+        filtered_listings = store.find('cargo', **{k: v for k, v in criteria.items() if v})
         
         return jsonify({
             "cargo_listings": filtered_listings,
@@ -402,16 +405,11 @@ def list_cargo():
         return jsonify({"error": f"Failed to fetch cargo listings: {str(e)}"}), 500
 
 @app.route('/cargo/<cargo_id>', methods=['GET'])
+@http_cache.cached('cargo', vary=(), ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def get_cargo(cargo_id):
     try:
-        cargo_listings = read_json_file(CARGO_FILE)
-        
         # Find cargo by ID
-        cargo = None
-        for c in cargo_listings:
-            if c['id'] == cargo_id:
-                cargo = c
-                break
+        cargo = store.get('cargo', cargo_id)
         
         if not cargo:
             return jsonify({"error": "Cargo listing not found"}), 404
@@ -425,18 +423,35 @@ def get_cargo(cargo_id):
 
 # New API endpoints for frontend compatibility
 @app.route('/api/cargo', methods=['GET'])
+@http_cache.cached('cargo', ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def api_get_cargo():
     try:
-        cargo_listings = read_json_file(CARGO_FILE)
-        return jsonify(cargo_listings)
+        cargo_listings = store.all('cargo')
+        
+        # Plain array for existing clients; paginated object once limit or cursor is given
+        if 'limit' not in request.args and 'cursor' not in request.args:
+            return jsonify(cargo_listings)
+        
+        try:
+            limit, cursor, fields, count_mode = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        items, next_cursor, total, _ = paginate_records(cargo_listings, limit, cursor, fields, count_mode)
+        return jsonify({
+            "cargo_listings": items,
+            "total": total,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        })
     except Exception as e:
         return jsonify({"error": f"Failed to fetch cargo: {str(e)}"}), 500
 
 @app.route('/api/cargo/<cargo_id>', methods=['GET'])
+@http_cache.cached('cargo', vary=(), ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def api_get_cargo_by_id(cargo_id):
     try:
-        cargo_listings = read_json_file(CARGO_FILE)
-        cargo = next((c for c in cargo_listings if c['id'] == cargo_id), None)
+        cargo = store.get('cargo', cargo_id)
         if cargo:
             return jsonify(cargo)
         else:
@@ -445,48 +460,54 @@ def api_get_cargo_by_id(cargo_id):
         return jsonify({"error": f"Failed to fetch cargo: {str(e)}"}), 500
 
 @app.route('/api/matches', methods=['GET'])
+@http_cache.cached('cargo', vary=(), ttl=Config.HTTP_CACHE_TTL_SECONDS)
 def api_get_matches():
     try:
         # Find matches between cargo listings (A→C and C→A pattern)
-        cargo_listings = read_json_file(CARGO_FILE)
         matches = []
-        
-        for i, cargo1 in enumerate(cargo_listings):
-            for j, cargo2 in enumerate(cargo_listings):
-                if i >= j:  # Avoid duplicates and self-matching
-                    continue
-                
-                # Check if it's an A→C and C→A pattern
-                if (cargo1['origin'] == cargo2['destination'] and 
-                    cargo1['destination'] == cargo2['origin']):
-                    
-                    # Calculate potential savings (simple estimation)
-                    avg_budget = (cargo1['budget'] + cargo2['budget']) / 2
-                    cost_savings = avg_budget * 0.3  # 30% savings estimation
-                    
-                    # Determine optimal exchange point using coordinates if available
-                    origin_coords = cargo1.get('origin_coords')
-                    dest_coords = cargo1.get('destination_coords')
-                    exchange_point = get_optimal_exchange_point(
-                        cargo1['origin'], 
-                        cargo1['destination'],
-                        origin_coords,
-                        dest_coords
-                    )
-                    
-                    match = {
-                        'id': len(matches) + 1,
-                        'cargo1_id': cargo1['id'],
-                        'cargo2_id': cargo2['id'],
-                        'cargo1_route': f"{cargo1['origin']} → {cargo1['destination']}",
-                        'cargo2_route': f"{cargo2['origin']} → {cargo2['destination']}",
-                        'exchange_point': exchange_point,
-                        'cost_savings': round(cost_savings),
-                        'compatibility_score': 85,  # Mock score
-                        'status': 'pending',
-                        'created_at': cargo1['created_at']
-                    }
-                    matches.append(match)
+        pairs = store.reverse_lane_pairs()
+        
+        # Savings of exchanging at the lane midpoint, all pairs costed in one batch
+        exchanges = []
+        for cargo1, cargo2 in pairs:
+            origin1 = route_point(cargo1['origin'], cargo1.get('origin_coords'))
+            dest1 = route_point(cargo1['destination'], cargo1.get('destination_coords'))
+            midpoint = {'key': None, 'lat': None, 'lng': None}
+            if None not in (origin1['lat'], dest1['lat']):
+                midpoint['lat'] = (origin1['lat'] + dest1['lat']) / 2
+                midpoint['lng'] = (origin1['lng'] + dest1['lng']) / 2
+            exchanges.append((origin1, dest1,
+                              route_point(cargo2['origin'], cargo2.get('origin_coords')),
+                              route_point(cargo2['destination'], cargo2.get('destination_coords')),
+                              midpoint))
+        all_savings = exchange_cost_savings(distance_cache, exchanges)
+        
+        for (cargo1, cargo2), savings in zip(pairs, all_savings):
+            cost_savings = savings['savings'] if savings else 0
+            
+            # Determine optimal exchange point using coordinates if available
+            origin_coords = cargo1.get('origin_coords')
+            dest_coords = cargo1.get('destination_coords')
+            exchange_point = get_optimal_exchange_point(
+                cargo1['origin'], 
+                cargo1['destination'],
+                origin_coords,
+                dest_coords
+            )
+            
+            match = {
+                'id': len(matches) + 1,
+                'cargo1_id': cargo1['id'],
+                'cargo2_id': cargo2['id'],
+                'cargo1_route': f"{cargo1['origin']} → {cargo1['destination']}",
+                'cargo2_route': f"{cargo2['origin']} → {cargo2['destination']}",
+                'exchange_point': exchange_point,
+                'cost_savings': round(cost_savings),
+                'compatibility_score': 85,  # Mock score
+                'status': 'pending',
+                'created_at': cargo1['created_at']
+            }
+            matches.append(match)
         
         return jsonify(matches)
     except Exception as e:
@@ -497,17 +518,7 @@ def api_find_matches():
     try:
         # This endpoint is called when user clicks "Find New Matches"
         # We'll just return the existing matches for now
-        cargo_listings = read_json_file(CARGO_FILE)
-        matches_found = 0
-        
-        # Count potential matches
-        for i, cargo1 in enumerate(cargo_listings):
-            for j, cargo2 in enumerate(cargo_listings):
-                if i >= j:
-                    continue
-                if (cargo1['origin'] == cargo2['destination'] and 
-                    cargo1['destination'] == cargo2['origin']):
-                    matches_found += 1
+        matches_found = current_lane_index().match_count
         
         return jsonify({
             "message": f"Found {matches_found} new matches!",
@@ -600,26 +611,36 @@ def api_find_exchange_point():
         if not all([origin1, dest1, origin2, dest2]):
             return jsonify({"error": "Both routes must have origin and destination"}), 400
         
+        objective = data.get('objective', 'total')
+        if objective not in ('total', 'max'):
+            return jsonify({"error": "Objective must be 'total' or 'max'"}), 400
+        
+        # Fall back to known town coordinates when the client sent none
+        points = [
+            coords or find_town(name)
+            for name, coords in [(origin1, origin1_coords), (dest1, dest1_coords),
+                                 (origin2, origin2_coords), (dest2, dest2_coords)]
+        ]
+        
         # Find optimal exchange point
-        if origin1_coords and dest1_coords and origin2_coords and dest2_coords:
-            # Calculate midpoint of route 1
-            mid1_lat = (origin1_coords['lat'] + dest1_coords['lat']) / 2
-            mid1_lng = (origin1_coords['lng'] + dest1_coords['lng']) / 2
-            
-            # Calculate midpoint of route 2  
-            mid2_lat = (origin2_coords['lat'] + dest2_coords['lat']) / 2
-            mid2_lng = (origin2_coords['lng'] + dest2_coords['lng']) / 2
-            
-            # Find exchange point (midpoint between route midpoints)
-            exchange_lat = (mid1_lat + mid2_lat) / 2
-            exchange_lng = (mid1_lng + mid2_lng) / 2
-            
-            nearest_city = find_nearest_major_city(exchange_lat, exchange_lng)
-            exchange_point = f"{nearest_city} ({exchange_lat:.2f}°N, {exchange_lng:.2f}°E)"
+        meeting_points = []
+        if all(points):
+            meeting_points = meeting_point_optimizer.optimize(
+                {'origin': points[0], 'destination': points[1]},
+                {'origin': points[2], 'destination': points[3]},
+                objective=objective
+            )
+        
+        if meeting_points:
+            best = meeting_points[0]
+            exchange_point = f"{best['city']}, {best['state']} ({best['lat']:.2f}°N, {best['lng']:.2f}°E)"
             
-            # Calculate potential savings (30% of average costs)
-            avg_cost = 15000  # Estimated average route cost
-            cost_savings = avg_cost * 0.3
+            # Savings of both carriers meeting there instead of driving their full routes
+            meeting_point = {'key': f"{best['city']}, {best['state']}", 'lat': best['lat'], 'lng': best['lng']}
+            savings = exchange_cost_savings(distance_cache, [(
+                route_point(origin1, points[0]), route_point(dest1, points[1]),
+                route_point(origin2, points[2]), route_point(dest2, points[3]), meeting_point)])[0]
+            cost_savings = savings['savings'] if savings else 0
         else:
             # Fallback to predefined exchange points
             exchange_point = get_optimal_exchange_point(origin1, dest1, origin1_coords, dest1_coords)
@@ -629,6 +650,7 @@ def api_find_exchange_point():
             "route1": f"{origin1} → {dest1}",
             "route2": f"{origin2} → {dest2}", 
             "exchange_point": exchange_point,
+            "meeting_points": meeting_points,
             "cost_savings": round(cost_savings),
             "recommendations": [
                 "Both parties meet at the exchange point",
@@ -652,14 +674,10 @@ def find_matches():
         if not cargo_id:
             return jsonify({"error": "Cargo ID required"}), 400
         
-        cargo_listings = read_json_file(CARGO_FILE)
+        cargo_listings = store.all('cargo')
         
         # Find the target cargo
-        target_cargo = None
-        for cargo in cargo_listings:
-            if cargo['id'] == cargo_id:
-                target_cargo = cargo
-                break
+        target_cargo = store.get('cargo', cargo_id)
         
         if not target_cargo:
             return jsonify({"error": "Cargo listing not found"}), 404
@@ -729,8 +747,6 @@ def accept_match():
         if not all([cargo_id_1, cargo_id_2]):
             return jsonify({"error": "Both cargo IDs required"}), 400
         
-        matches = read_json_file(MATCHES_FILE)
-        
         # Create match record
         new_match = {
             'id': str(uuid.uuid4()),
@@ -741,16 +757,11 @@ def accept_match():
             'created_at': datetime.now().isoformat()
         }
         
-        matches.append(new_match)
-        write_json_file(MATCHES_FILE, matches)
+        store.insert('matches', new_match)
         
         # Update cargo status
-        cargo_listings = read_json_file(CARGO_FILE)
-        for cargo in cargo_listings:
-            if cargo['id'] in [cargo_id_1, cargo_id_2]:
-                cargo['status'] = 'matched'
-        
-        write_json_file(CARGO_FILE, cargo_listings)
+        store.update('cargo', [cargo_id_1, cargo_id_2], {'status': 'matched'})
+        http_cache.bump('cargo')
         
         return jsonify({
             "message": "Match accepted successfully",
@@ -761,47 +772,25 @@ def accept_match():
         return jsonify({"error": f"Failed to accept match: {str(e)}"}), 500
 
 @app.route('/cities/india', methods=['GET'])
+@http_cache.cached('cities', vary=())
 def get_indian_cities():
-    cities = [
-        {'city_name': 'Mumbai', 'state': 'Maharashtra', 'latitude': 19.0760, 'longitude': 72.8777, 'is_major_city': True},
-        {'city_name': 'Delhi', 'state': 'Delhi', 'latitude': 28.7041, 'longitude': 77.1025, 'is_major_city': True},
-        {'city_name': 'Bangalore', 'state': 'Karnataka', 'latitude': 12.9716, 'longitude': 77.5946, 'is_major_city': True},
-        {'city_name': 'Chennai', 'state': 'Tamil Nadu', 'latitude': 13.0827, 'longitude': 80.2707, 'is_major_city': True},
-        {'city_name': 'Kolkata', 'state': 'West Bengal', 'latitude': 22.5726, 'longitude': 88.3639, 'is_major_city': True},
-        {'city_name': 'Hyderabad', 'state': 'Telangana', 'latitude': 17.3850, 'longitude': 78.4867, 'is_major_city': True},
-        {'city_name': 'Pune', 'state': 'Maharashtra', 'latitude': 18.5204, 'longitude': 73.8567, 'is_major_city': True},
-        {'city_name': 'Ahmedabad', 'state': 'Gujarat', 'latitude': 23.0225, 'longitude': 72.5714, 'is_major_city': True},
-        {'city_name': 'Jaipur', 'state': 'Rajasthan', 'latitude': 26.9124, 'longitude': 75.7873, 'is_major_city': True},
-        {'city_name': 'Lucknow', 'state': 'Uttar Pradesh', 'latitude': 26.8467, 'longitude': 80.9462, 'is_major_city': True},
-        {'city_name': 'Kanpur', 'state': 'Uttar Pradesh', 'latitude': 26.4499, 'longitude': 80.3319, 'is_major_city': False},
-        {'city_name': 'Nagpur', 'state': 'Maharashtra', 'latitude': 21.1458, 'longitude': 79.0882, 'is_major_city': False},
-        {'city_name': 'Indore', 'state': 'Madhya Pradesh', 'latitude': 22.7196, 'longitude': 75.8577, 'is_major_city': False},
-        {'city_name': 'Thane', 'state': 'Maharashtra', 'latitude': 19.2183, 'longitude': 72.9781, 'is_major_city': False},
-        {'city_name': 'Bhopal', 'state': 'Madhya Pradesh', 'latitude': 23.2599, 'longitude': 77.4126, 'is_major_city': False},
-        {'city_name': 'Visakhapatnam', 'state': 'Andhra Pradesh', 'latitude': 17.6868, 'longitude': 83.2185, 'is_major_city': False},
-        {'city_name': 'Patna', 'state': 'Bihar', 'latitude': 25.5941, 'longitude': 85.1376, 'is_major_city': False},
-        {'city_name': 'Vadodara', 'state': 'Gujarat', 'latitude': 22.3072, 'longitude': 73.1812, 'is_major_city': False},
-        {'city_name': 'Ghaziabad', 'state': 'Uttar Pradesh', 'latitude': 28.6692, 'longitude': 77.4538, 'is_major_city': False},
-        {'city_name': 'Ludhiana', 'state': 'Punjab', 'latitude': 30.9010, 'longitude': 75.8573, 'is_major_city': False}
-    ]
-    
     return jsonify({
-        "cities": cities,
-        "total": len(cities)
+        "cities": INDIAN_CITIES,
+        "total": len(INDIAN_CITIES)
     })
 
 @app.route('/health', methods=['GET'])
 def health_check():
     try:
-        users_count = len(read_json_file(USERS_FILE))
-        cargo_count = len(read_json_file(CARGO_FILE))
-        matches_count = len(read_json_file(MATCHES_FILE))
+        users_count = store.count('users')
+        cargo_count = store.count('cargo')
+        matches_count = store.count('matches')
         
         return jsonify({
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "version": "1.0.0",
-            "storage": "Local JSON Files",
+            "storage": store.label,
             "data": {
                 "users_count": users_count,
                 "cargo_count": cargo_count,
@@ -816,10 +805,10 @@ def health_check():
 
 if __name__ == '__main__':
     print("🚀 India Cargo Exchange Platform Starting...")
-    print("📊 Using Local JSON File Storage (No Database Required)")
+    print(f"📊 Using {store.label} (No Database Required)")
     print("🌐 API endpoints available at http://localhost:5000")
     print("📖 API documentation available at http://localhost:5000/")
-    print("📁 Data stored in: ./local_data/")
+    print(f"📁 Data stored in: ./{store.data_dir}/")
     print("💡 This version works completely offline!")
     
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
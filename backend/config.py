@@ -21,6 +21,14 @@ class Config:
     # Google Maps API
     GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY') or 'your-google-maps-api-key'
     
+    # Map service endpoints (point these at maps_stub.py for offline load testing)
+    GOOGLE_MAPS_BASE_URL = os.environ.get('GOOGLE_MAPS_BASE_URL') or 'https://maps.googleapis.com'
+    GOOGLE_MAPS_TIMEOUT = float(os.environ.get('GOOGLE_MAPS_TIMEOUT', 10))  # seconds per request
+    GOOGLE_MAPS_RETRY_TIMEOUT = float(os.environ.get('GOOGLE_MAPS_RETRY_TIMEOUT', 60))
+    NOMINATIM_DOMAIN = os.environ.get('NOMINATIM_DOMAIN') or 'nominatim.openstreetmap.org'
+    NOMINATIM_SCHEME = os.environ.get('NOMINATIM_SCHEME') or 'https'
+    NOMINATIM_TIMEOUT = float(os.environ.get('NOMINATIM_TIMEOUT', 1))
+    
     # OpenWeatherMap API
     OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY') or 'your-openweather-api-key'
     
@@ -65,6 +73,110 @@ class Config:
         'truck': 1.0,    # INR per km
         'bus': 0.8       # INR per km
     }
+    
+    # Average fuel efficiency (km per liter)
+    FUEL_EFFICIENCY = {
+        'Petrol': 12,
+        'Diesel': 8
+    }
+    
+    # Driver labor cost (INR per hour)
+    LABOR_COST_PER_HOUR = 200
+    
+    # Bulk route costing
+    BULK_COST_MAX_PAIRS = 10000
+    
+    # Distance estimation (used when no cached road distance is available)
+    ROAD_DISTANCE_FACTOR = 1.3      # road km per straight-line km
+    AVERAGE_TRUCK_SPEED_KMPH = 50   # average including stops
+    
+    # Route geometry simplification (Douglas-Peucker tolerance)
+    ROUTE_SIMPLIFY_TOLERANCE_M = float(os.environ.get('ROUTE_SIMPLIFY_TOLERANCE_M', 50))
+    
+    # Geocoding (Nominatim allows at most one request per second)
+    GEOCODER_RATE_LIMIT = float(os.environ.get('GEOCODER_RATE_LIMIT', 1.0))  # requests per second
+    GEOCODER_BURST = int(os.environ.get('GEOCODER_BURST', 1))
+    GEOCODER_CACHE_SIZE = 50000
+    GEOCODER_MISS_TTL_SECONDS = float(os.environ.get('GEOCODER_MISS_TTL_SECONDS', 600))  # unresolvable places
+    # State file shared by every process on the host, so N workers still send GEOCODER_RATE_LIMIT
+    # requests per second in total; empty keeps a per-process limit
+    GEOCODER_RATE_LIMIT_PATH = os.environ.get('GEOCODER_RATE_LIMIT_PATH', os.path.join('instance', 'geocoder_rate'))
+    
+    # Geospatial listing queries
+    MATCH_CANDIDATE_RADIUS_KM = 50      # matcher prefilter around a listing's ends
+    NEARBY_DEFAULT_RADIUS_KM = 50
+    NEARBY_MAX_RADIUS_KM = 500
+    
+    # Corridor matching: loads along another listing's route, within a detour budget
+    CORRIDOR_CELL_DEG = 0.5                 # grid cell size (~55 km)
+    CORRIDOR_SEGMENT_KM = 100               # great-circle routes are split into segments this long
+    CORRIDOR_SIMPLIFY_TOLERANCE_M = 2000    # cached road geometry is coarsened to this
+    CORRIDOR_DETOUR_DEFAULT_KM = 60
+    CORRIDOR_DETOUR_MAX_KM = 300
+    
+    # Meeting point search: weight of unequal approach distances (per km)
+    MEETING_POINT_BALANCE_WEIGHT = 0.1
+    
+    # Exchange-point results per route pair (LRU + TTL); `python -m utils.snapshot` pre-warms
+    # the busiest lane pairs into the warm-start snapshot
+    EXCHANGE_CACHE_SIZE = int(os.environ.get('EXCHANGE_CACHE_SIZE', 20000))
+    EXCHANGE_CACHE_TTL_SECONDS = float(os.environ.get('EXCHANGE_CACHE_TTL_SECONDS', 6 * 3600))
+    EXCHANGE_CACHE_PREWARM_PAIRS = int(os.environ.get('EXCHANGE_CACHE_PREWARM_PAIRS', 200))  # 0 disables
+    
+    # Local (offline) API storage: json, memory, wal, sqlite, partitioned
+    LOCAL_STORAGE_MODE = os.environ.get('LOCAL_STORAGE_MODE') or 'json'
+    LOCAL_DATA_DIR = os.environ.get('LOCAL_DATA_DIR') or 'local_data'
+    WRITE_BEHIND_INTERVAL_MS = float(os.environ.get('WRITE_BEHIND_INTERVAL_MS', 200))  # memory mode flush period
+    WAL_FSYNC_INTERVAL_MS = float(os.environ.get('WAL_FSYNC_INTERVAL_MS', 50))  # 0 = fsync every write
+    WAL_COMPACT_BYTES = int(os.environ.get('WAL_COMPACT_BYTES', 8 * 1024 * 1024))
+    CARGO_PARTITION_BY_STATE = os.environ.get('CARGO_PARTITION_BY_STATE', 'false').lower() == 'true'
+    CARGO_ARCHIVE_STATUSES = ('completed', 'cancelled')  # moved to the compressed cold archive
+    
+    # Listing expiry: active listings past pickup_date become 'expired'
+    LISTING_EXPIRY_INTERVAL_SECONDS = float(os.environ.get('LISTING_EXPIRY_INTERVAL_SECONDS', 3600))  # 0 = disabled
+    LISTING_EXPIRY_BATCH_SIZE = int(os.environ.get('LISTING_EXPIRY_BATCH_SIZE', 1000))
+    LISTING_EXPIRY_GRACE_DAYS = int(os.environ.get('LISTING_EXPIRY_GRACE_DAYS', 0))
+    LISTING_EXPIRY_LOCK_PATH = os.environ.get('LISTING_EXPIRY_LOCK_PATH') or os.path.join('instance', 'listing_sweeper')  # one worker sweeps
+    
+    # Listing pagination; count mode is none, exact or approx
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 500))
+    PAGINATION_COUNT_MODE = os.environ.get('PAGINATION_COUNT_MODE') or 'approx'
+    PAGINATION_APPROX_COUNT_CAP = 10000  # non-Postgres approx counts stop here
+    
+    # HTTP response cache (ETags + conditional GET)
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_DISABLED_ENDPOINTS = set(filter(None, os.environ.get('HTTP_CACHE_DISABLED_ENDPOINTS', '').split(',')))
+    HTTP_CACHE_MAX_ENTRIES = 512
+    HTTP_CACHE_MIN_COMPRESS_BYTES = 1024
+    HTTP_CACHE_TTL_SECONDS = float(os.environ.get('HTTP_CACHE_TTL_SECONDS', 10))  # ETag rollover for multi-worker data
+    
+    # Resident matching pool: active listings kept in a compact in-process array
+    MATCH_POOL_RESIDENT = os.environ.get('MATCH_POOL_RESIDENT', 'false').lower() == 'true'
+    # In-process pool/corridor catch-up re-reads this far behind the newest updated_at seen,
+    # for transactions that commit after later rows were already synced
+    LISTING_SYNC_WINDOW_SECONDS = float(os.environ.get('LISTING_SYNC_WINDOW_SECONDS', 300))
+    
+    # Warm-start snapshots of the matching pool and lookup caches
+    SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'false').lower() == 'true'
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR') or os.path.join('instance', 'snapshots')
+    SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get('SNAPSHOT_MAX_AGE_SECONDS', 24 * 3600))
+    SNAPSHOT_KEEP = 3  # versions kept on disk
+    SNAPSHOT_ON_EXIT = os.environ.get('SNAPSHOT_ON_EXIT', 'true').lower() == 'true'
+    
+    # Change events for listings and matches (durable JSONL log + in-process subscribers)
+    CHANGE_LOG_PATH = os.environ.get('CHANGE_LOG_PATH') or os.path.join('instance', 'changes', 'changes.jsonl')
+    CHANGE_LOG_FSYNC = os.environ.get('CHANGE_LOG_FSYNC', 'true').lower() == 'true'
+    CHANGE_LOG_MAX_BYTES = int(os.environ.get('CHANGE_LOG_MAX_BYTES', 64 * 1024 * 1024))  # rotated to .1 past this
+    
+    # Bulk cargo import (CSV/XLSX)
+    CARGO_IMPORT_CHUNK_SIZE = int(os.environ.get('CARGO_IMPORT_CHUNK_SIZE', 2000))  # rows validated and inserted together
+    CARGO_IMPORT_COMMIT_ROWS = int(os.environ.get('CARGO_IMPORT_COMMIT_ROWS', 20000))  # rows per transaction
+    CARGO_IMPORT_MAX_ERRORS = 1000  # per-row errors included in the report
+    
+    # Fleet route planning
+    FLEET_MAX_CLUSTER_SIZE = 250    # stops per KMeans cluster
+    FLEET_TWO_OPT_MAX_PASSES = 20
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,248 @@
+"""
+Local stand-in for the Google Maps and Nominatim APIs used by RouteOptimizer.
+
+Serves the distance-matrix, geocode and reverse-geocode endpoints from the
+bundled town list with configurable latency, error rate and quota, so the
+matching and routing paths can be load-tested offline. Point the app at it:
+
+    GOOGLE_MAPS_BASE_URL=http://localhost:5050
+    GOOGLE_MAPS_API_KEY=AIza-stub
+    NOMINATIM_DOMAIN=localhost:5050
+    NOMINATIM_SCHEME=http
+"""
+
+from flask import Flask, request, jsonify
+from datetime import datetime
+import argparse
+import os
+import random
+import threading
+import time
+import numpy as np
+from config import Config
+from utils.distance_cache import haversine_km
+from utils.indian_towns import INDIAN_TOWNS, find_town
+
+app = Flask(__name__)
+
+# Simulation settings (overridable from the command line or /stub/config)
+settings = {
+    'latency_median_ms': float(os.environ.get('STUB_LATENCY_MEDIAN_MS', 80)),
+    'latency_sigma': float(os.environ.get('STUB_LATENCY_SIGMA', 0.5)),  # lognormal shape
+    'error_rate': float(os.environ.get('STUB_ERROR_RATE', 0.0)),
+    'quota': int(os.environ.get('STUB_QUOTA', 0)),  # requests before OVER_QUERY_LIMIT, 0 = unlimited
+    'seed': None
+}
+
+stats = {'requests': 0, 'errors': 0, 'over_quota': 0, 'elements': 0}
+stats_lock = threading.Lock()
+rng = random.Random()
+
+TOWN_LATS = np.array([town['lat'] for town in INDIAN_TOWNS])
+TOWN_LNGS = np.array([town['lng'] for town in INDIAN_TOWNS])
+
+
+def simulate():
+    """Apply latency and decide the outcome: 'ok', 'error' or 'over_quota'"""
+    with stats_lock:
+        stats['requests'] += 1
+        count = stats['requests']
+
+    median = settings['latency_median_ms']
+    if median > 0:
+        time.sleep(median * rng.lognormvariate(0, settings['latency_sigma']) / 1000)
+
+    outcome = 'ok'
+    if settings['quota'] and count > settings['quota']:
+        outcome = 'over_quota'
+    elif rng.random() < settings['error_rate']:
+        outcome = 'error'
+
+    if outcome != 'ok':
+        with stats_lock:
+            stats['errors' if outcome == 'error' else 'over_quota'] += 1
+    return outcome
+
+
+def resolve_place(text):
+    """Resolve "lat,lng" or a town name to (lat, lng, label)"""
+    text = (text or '').strip()
+    lat, _, lng = text.partition(',')
+    try:
+        return float(lat), float(lng), text
+    except ValueError:
+        pass
+
+    town = find_town(text)
+    if town:
+        return town['lat'], town['lng'], f"{town['name']}, {town['state']}, India"
+    return None
+
+
+def nearest_town(lat, lng):
+    distances = haversine_km(lat, lng, TOWN_LATS, TOWN_LNGS)
+    return INDIAN_TOWNS[int(np.argmin(distances))]
+
+
+def google_error(outcome):
+    if outcome == 'over_quota':
+        return jsonify({"status": "OVER_QUERY_LIMIT", "error_message": "Stub quota exhausted"})
+    return jsonify({"status": "UNKNOWN_ERROR", "error_message": "Simulated server error"})
+
+
+@app.route('/maps/api/distancematrix/json', methods=['GET'])
+def distance_matrix():
+    outcome = simulate()
+    if outcome != 'ok':
+        return google_error(outcome)
+
+    origins = [resolve_place(o) for o in request.args.get('origins', '').split('|')]
+    destinations = [resolve_place(d) for d in request.args.get('destinations', '').split('|')]
+
+    rows = []
+    for origin in origins:
+        elements = []
+        for destination in destinations:
+            if not origin or not destination:
+                elements.append({'status': 'NOT_FOUND'})
+                continue
+            km = float(haversine_km(origin[0], origin[1], destination[0], destination[1])) * Config.ROAD_DISTANCE_FACTOR
+            seconds = km / Config.AVERAGE_TRUCK_SPEED_KMPH * 3600
+            elements.append({
+                'status': 'OK',
+                'distance': {'value': int(km * 1000), 'text': f"{km:.1f} km"},
+                'duration': {'value': int(seconds), 'text': f"{int(seconds // 3600)} hours {int(seconds % 3600 // 60)} mins"}
+            })
+        rows.append({'elements': elements})
+
+    with stats_lock:
+        stats['elements'] += len(origins) * len(destinations)
+
+    return jsonify({
+        "status": "OK",
+        "origin_addresses": [o[2] if o else '' for o in origins],
+        "destination_addresses": [d[2] if d else '' for d in destinations],
+        "rows": rows
+    })
+
+
+@app.route('/maps/api/geocode/json', methods=['GET'])
+def google_geocode():
+    outcome = simulate()
+    if outcome != 'ok':
+        return google_error(outcome)
+
+    if request.args.get('latlng'):
+        place = resolve_place(request.args['latlng'])
+        town = nearest_town(place[0], place[1]) if place else None
+    else:
+        town = find_town(request.args.get('address'))
+
+    if not town:
+        return jsonify({"status": "ZERO_RESULTS", "results": []})
+
+    return jsonify({
+        "status": "OK",
+        "results": [{
+            'formatted_address': f"{town['name']}, {town['state']}, India",
+            'geometry': {'location': {'lat': town['lat'], 'lng': town['lng']}},
+            'types': ['locality', 'political']
+        }]
+    })
+
+
+@app.route('/search', methods=['GET'])
+def nominatim_search():
+    outcome = simulate()
+    if outcome == 'over_quota':
+        return jsonify({"error": "Too many requests"}), 429
+    if outcome == 'error':
+        return jsonify({"error": "Simulated server error"}), 500
+
+    town = find_town(request.args.get('q'))
+    if not town:
+        return jsonify([])
+
+    return jsonify([{
+        'place_id': INDIAN_TOWNS.index(town) + 1,
+        'lat': str(town['lat']),
+        'lon': str(town['lng']),
+        'display_name': f"{town['name']}, {town['state']}, India",
+        'class': 'place',
+        'type': 'city'
+    }])
+
+
+@app.route('/reverse', methods=['GET'])
+def nominatim_reverse():
+    outcome = simulate()
+    if outcome == 'over_quota':
+        return jsonify({"error": "Too many requests"}), 429
+    if outcome == 'error':
+        return jsonify({"error": "Simulated server error"}), 500
+
+    try:
+        town = nearest_town(float(request.args['lat']), float(request.args['lon']))
+    except (KeyError, ValueError):
+        return jsonify({"error": "Unable to geocode"})
+
+    return jsonify({
+        'place_id': INDIAN_TOWNS.index(town) + 1,
+        'lat': str(town['lat']),
+        'lon': str(town['lng']),
+        'display_name': f"{town['name']}, {town['state']}, India",
+        'address': {'city': town['name'], 'state': town['state'], 'country': 'India', 'country_code': 'in'}
+    })
+
+
+@app.route('/stub/stats', methods=['GET'])
+def stub_stats():
+    with stats_lock:
+        return jsonify({"settings": settings, "stats": dict(stats), "timestamp": datetime.now().isoformat()})
+
+
+@app.route('/stub/config', methods=['POST'])
+def stub_config():
+    data = request.get_json() or {}
+    for key in ('latency_median_ms', 'latency_sigma', 'error_rate'):
+        if key in data:
+            settings[key] = float(data[key])
+    if 'quota' in data:
+        settings['quota'] = int(data['quota'])
+    return jsonify({"settings": settings})
+
+
+@app.route('/stub/reset', methods=['POST'])
+def stub_reset():
+    with stats_lock:
+        for key in stats:
+            stats[key] = 0
+    return jsonify({"stats": stats})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Google Maps/Nominatim stand-in')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--latency-median-ms', type=float, default=settings['latency_median_ms'])
+    parser.add_argument('--latency-sigma', type=float, default=settings['latency_sigma'])
+    parser.add_argument('--error-rate', type=float, default=settings['error_rate'])
+    parser.add_argument('--quota', type=int, default=settings['quota'])
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    settings.update({
+        'latency_median_ms': args.latency_median_ms,
+        'latency_sigma': args.latency_sigma,
+        'error_rate': args.error_rate,
+        'quota': args.quota,
+        'seed': args.seed
+    })
+    if args.seed is not None:
+        rng.seed(args.seed)
+
+    print("🗺️  Maps stub server starting...")
+    print(f"🌐 Listening on http://localhost:{args.port}")
+    print(f"⏱️  Latency: median {args.latency_median_ms}ms, sigma {args.latency_sigma}")
+    print(f"💥 Error rate: {args.error_rate:.1%}, quota: {args.quota or 'unlimited'}")
+
+    app.run(host='0.0.0.0', port=args.port, threaded=True)
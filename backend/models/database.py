@@ -2,6 +2,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from datetime import datetime
 import uuid
+from utils import polyline
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -72,6 +73,16 @@ class Vehicle(db.Model):
 
 class CargoListing(db.Model):
     __tablename__ = 'cargo_listings'
+    __table_args__ = (
+        # Expiry sweep: active listings past their pickup date
+        db.Index('ix_cargo_listings_status_pickup_date', 'status', 'pickup_date'),
+        # /cargo/list pages: filter by status (and type or lane), newest first on (created_at, id)
+        db.Index('ix_cargo_listings_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_cargo_listings_status_type_created', 'status', 'cargo_type', 'created_at', 'id'),
+        db.Index('ix_cargo_listings_status_lane_created', 'status', 'origin_city', 'destination_city', 'created_at', 'id'),
+        db.Index('ix_cargo_listings_status_destination_created', 'status', 'destination_city', 'created_at', 'id'),
+        db.Index('ix_cargo_listings_created', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -102,14 +113,15 @@ class CargoListing(db.Model):
     price_per_km = db.Column(db.Float)  # in INR
     
     # Status
-    status = db.Column(db.String(20), default='active')  # active, matched, completed, cancelled
+    status = db.Column(db.String(20), default='active')  # active, matched, completed, cancelled, expired
     is_exchange_eligible = db.Column(db.Boolean, default=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    matches = db.relationship('CargoMatch', backref='cargo_listing', lazy=True)
+    matches = db.relationship('CargoMatch', backref='cargo_listing', lazy=True,
+                              foreign_keys='CargoMatch.cargo_listing_1_id')
     
     def to_dict(self):
         return {
@@ -138,6 +150,11 @@ class CargoListing(db.Model):
 
 class CargoMatch(db.Model):
     __tablename__ = 'cargo_matches'
+    __table_args__ = (
+        # Matches of a listing, on either side of the pair
+        db.Index('ix_cargo_matches_listing_1_status', 'cargo_listing_1_id', 'status'),
+        db.Index('ix_cargo_matches_listing_2_status', 'cargo_listing_2_id', 'status'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     cargo_listing_1_id = db.Column(db.String(36), db.ForeignKey('cargo_listings.id'), nullable=False)
@@ -206,6 +223,9 @@ class IndianCity(db.Model):
 
 class RouteCache(db.Model):
     __tablename__ = 'route_cache'
+    __table_args__ = (
+        db.Index('ix_route_cache_lane', 'origin_city', 'destination_city'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     origin_city = db.Column(db.String(100), nullable=False)
@@ -215,8 +235,38 @@ class RouteCache(db.Model):
     toll_charges = db.Column(db.Float)
     fuel_cost = db.Column(db.Float)
     route_data = db.Column(db.JSON)  # Google Maps route data
+    geometry = db.Column(db.LargeBinary)  # simplified polyline, see utils.polyline.encode
+    geometry_points = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def set_geometry(self, points, tolerance_m=None):
+        """Store an (n, 2) lat/lng array as a simplified, compact polyline"""
+        simplified = polyline.simplify(points, tolerance_m)
+        self.geometry = polyline.encode(simplified)
+        self.geometry_points = len(simplified)
+    
+    def set_google_route(self, route, tolerance_m=None):
+        """Keep only the simplified geometry and summary of a Google Directions route"""
+        points = polyline.geometry_from_google_route(route, tolerance_m)
+        if points is not None:
+            self.geometry = polyline.encode(points)
+            self.geometry_points = len(points)
+        self.route_data = {key: route[key] for key in ('summary', 'warnings') if key in route}
+    
+    def get_geometry(self):
+        """Decoded route geometry as an (n, 2) NumPy array"""
+        return polyline.decode(self.geometry)
+    
+    @staticmethod
+    def load_geometries(origin_cities=None):
+        """Decode many cached geometries at once: {(origin, destination): array}"""
+        query = RouteCache.query.with_entities(
+            RouteCache.origin_city, RouteCache.destination_city, RouteCache.geometry
+        ).filter(RouteCache.geometry.isnot(None))
+        if origin_cities is not None:
+            query = query.filter(RouteCache.origin_city.in_(origin_cities))
+        return {(origin, destination): polyline.decode(blob) for origin, destination, blob in query}
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -226,5 +276,6 @@ class RouteCache(db.Model):
             'duration': self.duration,
             'toll_charges': self.toll_charges,
             'fuel_cost': self.fuel_cost,
-            'route_data': self.route_data
+            'route_data': self.route_data,
+            'geometry_points': self.geometry_points
         } 
\ No newline at end of file
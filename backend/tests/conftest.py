@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+# Tests import the backend modules the same way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from models.database import db
+
+
+@pytest.fixture
+def app():
+    """Flask app on a fresh in-memory SQLite schema"""
+    app = Flask(__name__)
+    app.config.from_object(config['testing'])
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
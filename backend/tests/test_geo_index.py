@@ -0,0 +1,76 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import or_
+
+from models.database import db, User, CargoListing
+from utils.geo_index import ListingGeoIndex
+
+TOWNS = {
+    'Mumbai': (19.0760, 72.8777),
+    'Delhi': (28.7041, 77.1025),
+    'Chennai': (13.0827, 80.2707),
+    'Ghaziabad': (28.6692, 77.4538),
+    'Kolkata': (22.5726, 88.3639),
+}
+
+
+def add_listings(lanes):
+    user = User.query.first()
+    if user is None:
+        user = User(username='u', email='u@example.com', company_name='c')
+        user.set_password('p')
+        db.session.add(user)
+        db.session.flush()
+    for origin, destination in lanes:
+        db.session.add(CargoListing(
+            id=f'{origin}-{destination}', user_id=user.id, title='t', cargo_type='steel', weight=1,
+            origin_city=origin, origin_state='S', destination_city=destination, destination_state='S',
+            origin_lat=TOWNS[origin][0], origin_lng=TOWNS[origin][1],
+            destination_lat=TOWNS[destination][0], destination_lng=TOWNS[destination][1],
+            pickup_date=date(2030, 1, 1), delivery_date=date(2030, 1, 2)))
+    db.session.commit()
+
+
+def matching_ids(*clauses):
+    return {listing.id for listing in CargoListing.query.filter(or_(*clauses))}
+
+
+@pytest.mark.parametrize('use_rtree', [True, False])
+def test_or_of_radius_filters_keeps_each_box(app, use_rtree):
+    add_listings([('Mumbai', 'Kolkata'), ('Delhi', 'Mumbai'), ('Chennai', 'Ghaziabad'), ('Kolkata', 'Chennai')])
+    index = ListingGeoIndex()
+    if not use_rtree:
+        index.use_rtree = False  # lat/lng column filters, as on other databases
+    assert index._ensure() == use_rtree
+
+    origin_mumbai = index.radius_filter('origin', *TOWNS['Mumbai'], 50)
+    destination_delhi = index.radius_filter('destination', *TOWNS['Delhi'], 50)
+    assert matching_ids(origin_mumbai, destination_delhi) == {'Mumbai-Kolkata', 'Chennai-Ghaziabad'}
+    assert matching_ids(destination_delhi, origin_mumbai) == {'Mumbai-Kolkata', 'Chennai-Ghaziabad'}
+
+
+def test_trees_follow_a_recreated_table(app):
+    add_listings([('Mumbai', 'Kolkata'), ('Kolkata', 'Chennai')])
+    index = ListingGeoIndex()
+    assert index._ensure()
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    add_listings([('Chennai', 'Delhi')])
+    # The new row reuses the old Mumbai listing's rowid: no stale box may point at it
+    assert matching_ids(index.radius_filter('origin', *TOWNS['Mumbai'], 50)) == set()
+    assert matching_ids(index.radius_filter('origin', *TOWNS['Chennai'], 50)) == {'Chennai-Delhi'}
+
+
+def test_stale_tree_is_rebuilt_on_install(app):
+    add_listings([('Mumbai', 'Kolkata')])
+    assert ListingGeoIndex()._ensure()
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO cargo_listings_origin_rtree VALUES (999, 13.08, 13.08, 80.27, 80.27)")
+
+    index = ListingGeoIndex()  # as in a freshly started worker
+    assert index._ensure()
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM cargo_listings_origin_rtree").scalar() == 1
@@ -0,0 +1,43 @@
+import time
+
+from utils.geocoder import BulkGeocoder, SharedRateLimiter
+
+
+class FakeOptimizer:
+    def __init__(self):
+        self.calls = []
+
+    def get_coordinates(self, city, state, rate_limiter=None):
+        rate_limiter.acquire()
+        self.calls.append((city, state))
+        if city == 'Nowhere':
+            return None, None
+        return 41.88, -87.63
+
+
+def test_misses_are_not_requested_again_within_the_ttl(tmp_path):
+    optimizer = FakeOptimizer()
+    geocoder = BulkGeocoder(optimizer, rate=1000, rate_limit_path=str(tmp_path / 'rate'), miss_ttl=60)
+
+    assert geocoder.submit('Nowhere', 'ZZ') is False
+    assert geocoder.wait(timeout=5)
+    assert geocoder.submit('Nowhere', 'ZZ') is False
+    assert geocoder.pending_count() == 0
+    assert optimizer.calls == [('Nowhere', 'ZZ')]
+
+    geocoder.misses[geocoder._key('Nowhere', 'ZZ')] -= 61
+    geocoder.submit('Nowhere', 'ZZ')
+    assert geocoder.wait(timeout=5)
+    assert len(optimizer.calls) == 2
+
+
+def test_limiters_sharing_a_file_share_the_rate(tmp_path):
+    path = str(tmp_path / 'rate')
+    first, second = SharedRateLimiter(path, 20), SharedRateLimiter(path, 20)
+
+    start = time.time()
+    for _ in range(3):
+        first.acquire()
+        second.acquire()
+    # Six requests at 20/s: the last one goes out no earlier than 5 intervals in
+    assert time.time() - start >= 5 / 20 - 0.01
@@ -0,0 +1,40 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from models.database import db, User, CargoListing
+from utils.corridor_index import CorridorIndex, sync_corridor_index
+from utils.listing_pool import ListingPool, sync_from_database
+
+
+def add_listing(user_id, listing_id, updated_at):
+    db.session.add(CargoListing(
+        id=listing_id, user_id=user_id, title='t', cargo_type='steel', weight=1,
+        origin_city='Mumbai', origin_state='Maharashtra', destination_city='Delhi', destination_state='Delhi',
+        origin_lat=19.076, origin_lng=72.8777, destination_lat=28.7041, destination_lng=77.1025,
+        pickup_date=date(2030, 1, 1), delivery_date=date(2030, 1, 2), updated_at=updated_at))
+    db.session.commit()
+
+
+def test_late_commits_are_caught_up_once(app):
+    user = User(username='u', email='u@example.com', company_name='c')
+    user.set_password('p')
+    db.session.add(user)
+    db.session.commit()
+
+    later, slow = str(uuid.uuid4()), str(uuid.uuid4())
+    now = datetime.utcnow()
+    add_listing(user.id, later, now)
+    pool = sync_from_database(ListingPool(), db.session)
+    index = sync_corridor_index(CorridorIndex(), db.session)
+    assert len(pool) == 1 and len(index) == 1
+
+    # A transaction stamped earlier commits after the later listing was synced
+    add_listing(user.id, slow, now - timedelta(seconds=30))
+    sync_from_database(pool, db.session)
+    sync_corridor_index(index, db.session)
+    assert len(pool) == 2 and set(index.routes) == {later, slow}
+
+    # Rows already applied at the same updated_at are not re-applied
+    sync_from_database(pool, db.session)
+    sync_corridor_index(index, db.session)
+    assert pool.removed == 0 and index.removed == 0
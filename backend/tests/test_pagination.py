@@ -0,0 +1,32 @@
+from utils.pagination import decode_cursor, paginate_records
+
+
+def walk(records, limit):
+    pages, cursor = [], None
+    while True:
+        items, next_cursor, _, _ = paginate_records(records, limit, cursor)
+        pages.append([r['id'] for r in items])
+        if not next_cursor:
+            return pages
+        cursor = decode_cursor(next_cursor)
+
+
+def test_records_page_newest_first_like_queries():
+    records = [
+        {'id': 'a', 'created_at': '2024-01-01T10:00:00'},
+        {'id': 'c', 'created_at': '2024-01-03T10:00:00'},
+        {'id': 'b2', 'created_at': '2024-01-02T10:00:00'},
+        {'id': 'b1', 'created_at': '2024-01-02T10:00:00'},
+    ]
+    assert walk(records, 2) == [['c', 'b2'], ['b1', 'a']]
+    assert walk(records, 3) == [['c', 'b2', 'b1'], ['a']]
+
+
+def test_records_without_created_at_come_last_with_valid_cursors():
+    records = [
+        {'id': 'x', 'created_at': ''},
+        {'id': 'a', 'created_at': '2024-01-01T10:00:00'},
+        {'id': 'y'},
+        {'id': 'b', 'created_at': '2024-01-02T10:00:00'},
+    ]
+    assert walk(records, 1) == [['b'], ['a'], ['y'], ['x']]
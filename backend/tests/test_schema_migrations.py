@@ -0,0 +1,10 @@
+from utils.schema_migrations import check_query_plans, upgrade_schema
+
+
+def test_hot_queries_use_indexes(app):
+    problems = {name: found for name, (plan, found) in check_query_plans().items() if found}
+    assert problems == {}
+
+
+def test_upgrade_schema_is_a_noop_on_a_fresh_schema(app):
+    assert upgrade_schema() == []
@@ -0,0 +1,35 @@
+import time
+from datetime import datetime
+
+from utils.distance_cache import DistanceCache
+from utils.listing_pool import ListingPool
+from utils.snapshot import WarmStartSnapshot
+
+
+def synced_pool():
+    pool = ListingPool()
+    pool.synced_at = datetime(2030, 1, 1)
+    return pool
+
+
+def test_unchanged_state_is_resaved_before_max_age(tmp_path):
+    snapshot = WarmStartSnapshot(str(tmp_path), 'sqlite://', max_age_seconds=1)
+    distances = DistanceCache()
+    assert snapshot.save(synced_pool(), distance_cache=distances)
+    assert snapshot.save(synced_pool(), distance_cache=distances) is None
+
+    time.sleep(0.6)  # past half the max age, same sync point and caches
+    assert snapshot.save(synced_pool(), distance_cache=distances)
+    assert snapshot.load(ListingPool(), distance_cache=DistanceCache())
+
+
+def test_new_cache_entries_are_saved(tmp_path):
+    snapshot = WarmStartSnapshot(str(tmp_path), 'sqlite://')
+    distances = DistanceCache()
+    assert snapshot.save(synced_pool(), distance_cache=distances)
+
+    distances.put('Mumbai, Maharashtra', 'Pune, Maharashtra', 150.0, 180.0)
+    assert snapshot.save(synced_pool(), distance_cache=distances)
+    restored = DistanceCache()
+    snapshot.load(distance_cache=restored)
+    assert len(restored) == 1
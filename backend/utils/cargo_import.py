@@ -0,0 +1,298 @@
+"""
+Bulk cargo listing import from CSV or Excel files.
+
+Rows are streamed (openpyxl in read-only mode for .xlsx), validated a chunk
+at a time and inserted with a single Core executemany per chunk, committing
+every CARGO_IMPORT_COMMIT_ROWS rows. Rows without coordinates are resolved
+once per unique address from the geocoder cache and the city table; the
+rest are queued on the geocoder and patched in with one UPDATE per address.
+Invalid rows are skipped and reported by row number.
+
+    python -m utils.cargo_import loads.xlsx --user-id <id> [--env development]
+"""
+
+import argparse
+import csv
+import io
+import os
+import time
+import uuid
+from datetime import date, datetime
+from sqlalchemy import and_, select, update
+from config import Config
+from models.database import db, CargoListing, IndianCity
+from .change_events import make_event
+from .pagination import serialize_value
+
+REQUIRED_FIELDS = ('title', 'origin_city', 'origin_state', 'destination_city', 'destination_state',
+                   'cargo_type', 'weight', 'pickup_date', 'delivery_date')
+TEXT_FIELDS = ('description', 'special_requirements')
+FLOAT_FIELDS = ('budget', 'price_per_km')
+COORDINATE_FIELDS = ('origin_lat', 'origin_lng', 'destination_lat', 'destination_lng')
+ENDS = ('origin', 'destination')
+
+
+def normalize_header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def iter_rows(stream, filename):
+    """Yield (row number, {column: value}) from a CSV or XLSX file object"""
+    extension = os.path.splitext(filename or '')[1].lower()
+
+    if extension in ('.xlsx', '.xlsm'):
+        import openpyxl
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [normalize_header(h) for h in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if any(v not in (None, '') for v in values):
+                    yield number, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    elif extension in ('.csv', ''):
+        if isinstance(stream, io.TextIOBase):
+            text = stream
+        else:
+            text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = csv.reader(text)
+        headers = [normalize_header(h) for h in next(reader, [])]
+        for number, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield number, dict(zip(headers, values))
+    else:
+        raise ValueError(f"Unsupported file type: {extension} (use .csv or .xlsx)")
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def parse_float(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return float(value)
+
+
+def validate_row(row, user_id):
+    """Listing values for a row; raises ValueError describing the first problem"""
+    missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing required field: {', '.join(missing)}")
+
+    record = {'user_id': user_id}
+    for field in ('title', 'origin_city', 'origin_state', 'destination_city', 'destination_state', 'cargo_type'):
+        record[field] = str(row[field]).strip()
+    for field in TEXT_FIELDS:
+        record[field] = row.get(field) or None
+
+    try:
+        record['weight'] = float(row['weight'])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid weight: {row['weight']}")
+    if record['weight'] <= 0:
+        raise ValueError("weight must be positive")
+
+    for field in FLOAT_FIELDS + COORDINATE_FIELDS:
+        try:
+            record[field] = parse_float(row.get(field))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {field}: {row.get(field)}")
+    for field in FLOAT_FIELDS:
+        record[field] = record[field] or 0.0
+    for end in ENDS:
+        lat, lng = record[f'{end}_lat'], record[f'{end}_lng']
+        if (lat is None) != (lng is None):
+            raise ValueError(f"{end}_lat and {end}_lng must be given together")
+        if lat is not None and not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError(f"{end} coordinates out of range: {lat}, {lng}")
+
+    for field in ('pickup_date', 'delivery_date'):
+        try:
+            record[field] = parse_date(row[field])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {field}: {row[field]} (expected YYYY-MM-DD)")
+
+    return record
+
+
+class CargoImporter:
+    """Streams listing rows from a file into cargo_listings in large batches"""
+
+    def __init__(self, app, geocoder=None, change_bus=None, chunk_size=None, commit_rows=None, max_errors=None):
+        self.app = app
+        self.geocoder = geocoder
+        self.change_bus = change_bus
+        self.chunk_size = chunk_size or Config.CARGO_IMPORT_CHUNK_SIZE
+        self.commit_rows = commit_rows or Config.CARGO_IMPORT_COMMIT_ROWS
+        self.max_errors = Config.CARGO_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+
+    def run(self, stream, filename, user_id):
+        """Import every row of a file; returns a report with per-row errors"""
+        started = time.perf_counter()
+        report = {'imported': 0, 'failed': 0, 'errors': [], 'geocode_pending': 0}
+        coordinates = {}
+        unresolved = set()
+
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        uncommitted = []
+        try:
+            chunk = []
+            for number, row in iter_rows(stream, filename):
+                chunk.append((number, row))
+                if len(chunk) >= self.chunk_size:
+                    uncommitted += self._import_chunk(connection, chunk, user_id, coordinates, unresolved, report)
+                    chunk = []
+                    if len(uncommitted) >= self.commit_rows:
+                        transaction.commit()
+                        self._publish_inserts(uncommitted)
+                        transaction = connection.begin()
+                        uncommitted = []
+            if chunk:
+                uncommitted += self._import_chunk(connection, chunk, user_id, coordinates, unresolved, report)
+            transaction.commit()
+            self._publish_inserts(uncommitted)
+        except Exception:
+            transaction.rollback()
+            raise
+        finally:
+            connection.close()
+
+        report['geocode_pending'] = self._geocode_later(unresolved)
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        report['rows_per_second'] = round(report['imported'] / report['seconds']) if report['seconds'] else None
+        return report
+
+    def _import_chunk(self, connection, chunk, user_id, coordinates, unresolved, report):
+        records = []
+        for number, row in chunk:
+            try:
+                records.append(validate_row(row, user_id))
+            except ValueError as e:
+                self._add_error(report, number, str(e))
+
+        self._resolve_coordinates(connection, records, coordinates, unresolved)
+        if records:
+            # Set here rather than by column defaults so change events carry them
+            now = datetime.utcnow()
+            for record in records:
+                record.update(id=str(uuid.uuid4()), status='active', is_exchange_eligible=True,
+                              created_at=now, updated_at=now)
+            connection.execute(CargoListing.__table__.insert(), records)
+            report['imported'] += len(records)
+        return records
+
+    def _publish_inserts(self, records):
+        if self.change_bus and records:
+            self.change_bus.publish([make_event('cargo_listings', 'insert', record['id'],
+                                                {k: serialize_value(v) for k, v in record.items()})
+                                     for record in records])
+
+    def _add_error(self, report, row_number, message):
+        report['failed'] += 1
+        if len(report['errors']) < self.max_errors:
+            report['errors'].append({'row': row_number, 'error': message})
+
+    def _resolve_coordinates(self, connection, records, coordinates, unresolved):
+        """Fill missing coordinates from the per-import memo, geocoder cache and city table"""
+        wanted = set()
+        for record in records:
+            for end in ENDS:
+                if record[f'{end}_lat'] is None:
+                    key = (record[f'{end}_city'], record[f'{end}_state'])
+                    if key not in coordinates:
+                        wanted.add(key)
+
+        misses = []
+        for city, state in wanted:
+            lat, lng = self.geocoder.lookup(city, state) if self.geocoder else (None, None)
+            if lat is not None:
+                coordinates[(city, state)] = (lat, lng)
+            else:
+                misses.append((city, state))
+
+        if misses:
+            cities = {}
+            names = {city for city, _ in misses}
+            # Same connection as the inserts: SQLite would block a second one mid-transaction
+            rows = connection.execute(select(IndianCity.city_name, IndianCity.state, IndianCity.latitude,
+                                             IndianCity.longitude).where(IndianCity.city_name.in_(names)))
+            for city in rows:
+                cities.setdefault((city.city_name, city.state), (city.latitude, city.longitude))
+                cities.setdefault((city.city_name, None), (city.latitude, city.longitude))
+            for city, state in misses:
+                coordinates[(city, state)] = cities.get((city, state)) or cities.get((city, None))
+
+        for record in records:
+            for end in ENDS:
+                if record[f'{end}_lat'] is None:
+                    key = (record[f'{end}_city'], record[f'{end}_state'])
+                    coords = coordinates.get(key)
+                    if coords:
+                        record[f'{end}_lat'], record[f'{end}_lng'] = coords
+                    else:
+                        unresolved.add((end, key))
+
+    def _geocode_later(self, unresolved):
+        """Queue addresses nothing could resolve; each patches its listings with one UPDATE"""
+        if not self.geocoder:
+            return 0
+        for end, (city, state) in unresolved:
+            self.geocoder.submit(city, state, self._save_coordinates(end, city, state))
+        return len(unresolved)
+
+    def _save_coordinates(self, end, city, state):
+        def callback(lat, lng):
+            values = {f'{end}_lat': lat, f'{end}_lng': lng}
+            with self.app.app_context():
+                ids = db.session.scalars(select(CargoListing.id).where(and_(
+                    getattr(CargoListing, f'{end}_city') == city,
+                    getattr(CargoListing, f'{end}_state') == state,
+                    getattr(CargoListing, f'{end}_lat').is_(None)
+                ))).all()
+                if not ids:
+                    return
+                db.session.execute(update(CargoListing).where(CargoListing.id.in_(ids)).values(values))
+                db.session.commit()
+            if self.change_bus:
+                self.change_bus.emit('cargo_listings', 'update', ids, values)
+        return callback
+
+
+if __name__ == '__main__':
+    from flask import Flask
+    from config import config
+    from utils.geocoder import BulkGeocoder
+    from utils.route_optimizer import RouteOptimizer
+
+    parser = argparse.ArgumentParser(description='Bulk import cargo listings from a CSV or XLSX file')
+    parser.add_argument('file')
+    parser.add_argument('--user-id', required=True, help='owner of the imported listings')
+    parser.add_argument('--env', default='development', choices=sorted(config))
+    parser.add_argument('--no-geocode', action='store_true', help='leave unresolved coordinates empty')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config[args.env])
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        geocoder = None if args.no_geocode else BulkGeocoder(RouteOptimizer())
+        with open(args.file, 'rb') as f:
+            report = CargoImporter(app, geocoder).run(f, args.file, args.user_id)
+
+    print(f"✅ Imported {report['imported']} listings in {report['seconds']}s ({report['rows_per_second']} rows/s)")
+    for error in report['errors']:
+        print(f"❌ Row {error['row']}: {error['error']}")
+    if report['failed'] > len(report['errors']):
+        print(f"❌ ... {report['failed'] - len(report['errors'])} more invalid rows")
+    if report['geocode_pending']:
+        print(f"📍 Geocoding {report['geocode_pending']} addresses...")
+        geocoder.wait()
@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+import time
+from sqlalchemy import event, inspect
+from config import Config
+from .local_storage import file_lock
+from .pagination import serialize_value
+
+TRACKED_TABLES = ('cargo_listings', 'cargo_matches')
+
+
+class ChangeLogGap(Exception):
+    """Events after since_seq were rotated out of the log before they were read"""
+
+    def __init__(self, since_seq, first_seq):
+        super().__init__(f"Change log starts at seq {first_seq}, events after {since_seq} are gone")
+        self.since_seq = since_seq
+        self.first_seq = first_seq
+
+
+def make_event(table, op, record_id, data=None):
+    """An unsequenced change event; data is the full row for inserts, changed columns for updates"""
+    return {'table': table, 'op': op, 'id': record_id, 'data': data, 'ts': time.time()}
+
+
+def row_values(obj, columns=None):
+    mapper = inspect(obj).mapper
+    keys = columns if columns is not None else [c.key for c in mapper.column_attrs]
+    return {key: serialize_value(getattr(obj, key)) for key in keys}
+
+
+class ChangeEventBus:
+    """Ordered stream of listing and match changes, published on commit.
+
+    attach() hooks SQLAlchemy session events: after_flush collects inserts,
+    updates (changed columns only) and deletes of tracked tables into the
+    session, after_commit publishes them and after_rollback drops them.
+    Writes that bypass the unit of work (Core executemany, bulk UPDATEs)
+    call publish() themselves once committed.
+
+    Each published batch is appended to a JSONL log under an exclusive file
+    lock, which also assigns the sequence numbers, so workers on one host
+    share a single ordering. Subscribers in this process are then called in
+    order; other processes (or a restarted one) catch up with read_log().
+    A failed log write is counted and printed, never raised: publish() runs
+    from commit hooks after the rows are saved, and local subscribers still
+    get the events.
+    """
+
+    def __init__(self, log_path=None, fsync=None, max_log_bytes=None):
+        self.log_path = log_path or Config.CHANGE_LOG_PATH
+        self.fsync = Config.CHANGE_LOG_FSYNC if fsync is None else fsync
+        self.max_log_bytes = max_log_bytes or Config.CHANGE_LOG_MAX_BYTES
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.last_seq = 0
+        self.log_size = None
+        self.stats = {'published': 0, 'last_seq': 0, 'subscriber_errors': 0, 'log_errors': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+
+    def subscribe(self, callback, tables=None):
+        """Register callback(event) for all tracked tables or just the given ones"""
+        self.subscribers.append((callback, set(tables) if tables else None))
+
+    def attach(self, session):
+        """Capture changes from a Session, sessionmaker or scoped_session"""
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('change_events', [])
+        for obj in session.new:
+            table = getattr(obj, '__tablename__', None)
+            if table in TRACKED_TABLES:
+                pending.append(make_event(table, 'insert', obj.id, row_values(obj)))
+        for obj in session.dirty:
+            table = getattr(obj, '__tablename__', None)
+            if table not in TRACKED_TABLES:
+                continue
+            state = inspect(obj)
+            changed = [attr.key for attr in state.mapper.column_attrs if state.attrs[attr.key].history.has_changes()]
+            if changed:
+                pending.append(make_event(table, 'update', obj.id, row_values(obj, changed)))
+        for obj in session.deleted:
+            table = getattr(obj, '__tablename__', None)
+            if table in TRACKED_TABLES:
+                pending.append(make_event(table, 'delete', obj.id))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('change_events', None)
+        if pending:
+            self.publish(pending)
+
+    def _after_rollback(self, session):
+        session.info.pop('change_events', None)
+
+    def publish(self, events):
+        """Sequence, log and dispatch committed change events; returns them"""
+        if not events:
+            return events
+
+        with self.lock:
+            try:
+                self._append(events)
+            except Exception as e:
+                # Keep sequencing in-process; these events are missing from the log
+                for change in events:
+                    if 'seq' not in change:
+                        self.last_seq += 1
+                        change['seq'] = self.last_seq
+                self.log_size = None
+                self.stats['log_errors'] += 1
+                print(f"Error writing change log {self.log_path}: {e}")
+
+            self.stats['published'] += len(events)
+            self.stats['last_seq'] = self.last_seq
+
+            for change in events:
+                self._dispatch(change)
+        return events
+
+    def _append(self, events):
+        """Assign host-wide seqs and append the events to the log, rotating it when full"""
+        with file_lock(self.log_path):
+            self._sync_seq()
+            lines = []
+            for change in events:
+                self.last_seq += 1
+                change['seq'] = self.last_seq
+                lines.append(json.dumps(change, separators=(',', ':')))
+
+            with open(self.log_path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+                self.log_size = f.tell()
+
+            if self.log_size > self.max_log_bytes:
+                os.replace(self.log_path, f"{self.log_path}.1")
+                self.log_size = 0
+
+    def emit(self, table, op, record_ids, data=None):
+        """Publish one event per id with the same data (e.g. after a bulk UPDATE)"""
+        return self.publish([make_event(table, op, record_id, data) for record_id in record_ids])
+
+    def _dispatch(self, change):
+        for callback, tables in self.subscribers:
+            if tables is not None and change['table'] not in tables:
+                continue
+            try:
+                callback(change)
+            except Exception as e:
+                self.stats['subscriber_errors'] += 1
+                print(f"Error in change event subscriber: {e}")
+
+    def current_seq(self):
+        """Last seq logged by any process on this host (a cheap stat while the log is unchanged)"""
+        with self.lock:
+            try:
+                self._sync_seq()
+            except OSError as e:
+                print(f"Error reading change log {self.log_path}: {e}")
+            return self.last_seq
+
+    def _sync_seq(self):
+        """Pick up sequence numbers other processes appended since our last write"""
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            size = 0
+        if size == self.log_size:
+            return
+
+        last = self._last_logged(self.log_path) if size else None
+        if last is None:
+            last = self._last_logged(f"{self.log_path}.1")
+        if last is not None:
+            self.last_seq = max(self.last_seq, last['seq'])
+        self.log_size = size
+
+    @staticmethod
+    def _last_logged(path, tail_bytes=65536):
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - tail_bytes))
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        for line in reversed(lines):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue  # partial first line of the tail
+        return None
+
+    def first_logged_seq(self):
+        """Oldest seq still on disk (rotated log included), or None if nothing is logged"""
+        for path in (f"{self.log_path}.1", self.log_path):
+            try:
+                with open(path) as f:
+                    for line in f:
+                        try:
+                            return json.loads(line)['seq']
+                        except (ValueError, KeyError):
+                            continue
+            except FileNotFoundError:
+                continue
+        return None
+
+    def read_log(self, since_seq=0, tables=None):
+        """Logged events after since_seq, oldest first (rotated log included).
+
+        Raises ChangeLogGap if some of those events were already rotated
+        out; the reader has to resync from the database, then continue
+        from the gap's first_seq - 1.
+        """
+        first_seq = self.first_logged_seq()
+        if first_seq is not None and first_seq > since_seq + 1:
+            raise ChangeLogGap(since_seq, first_seq)
+        return self._read_log(since_seq, tables)
+
+    def _read_log(self, since_seq, tables):
+        for path in (f"{self.log_path}.1", self.log_path):
+            try:
+                with open(path) as f:
+                    for line in f:
+                        try:
+                            change = json.loads(line)
+                        except ValueError:
+                            continue
+                        if change['seq'] > since_seq and (tables is None or change['table'] in tables):
+                            yield change
+            except FileNotFoundError:
+                continue
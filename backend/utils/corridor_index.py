@@ -0,0 +1,422 @@
+"""
+Corridor matching: loads that lie along another listing's route.
+
+Each active listing's route is a polyline, the cached road geometry of
+its lane (RouteCache) or else a great-circle approximation, split into
+segments. Segments and route origins are bucketed into a uniform lat/lng
+grid kept as sorted cell keys, so a lookup only measures the segments or
+origins in the cells around it. Routes added since the last reindex()
+are scanned directly until the next one.
+
+A load fits a route when both of its ends lie within the detour budget of
+the route, pickup before drop-off along it. The detour of serving it is
+estimated as twice the straight-line distance off the route at each end,
+scaled by ROAD_DISTANCE_FACTOR.
+"""
+
+import threading
+import numpy as np
+from config import Config
+from .distance_cache import haversine_km, EARTH_RADIUS_KM
+from .indian_towns import find_town
+from .listing_pool import catch_up
+from .polyline import simplify
+
+KM_PER_DEGREE = 111.32
+CELL_STRIDE = 1 << 16  # cell key = row * CELL_STRIDE + column
+
+# Listing columns a route is built from
+CORRIDOR_COLUMNS = ('id', 'user_id', 'origin_city', 'destination_city',
+                    'origin_lat', 'origin_lng', 'destination_lat', 'destination_lng', 'status', 'updated_at')
+
+
+def great_circle_paths(ends, segment_km):
+    """Great-circle polylines for many routes at once.
+
+    ends is an (n, 4) array of origin and destination lat/lng; each route
+    gets points about segment_km apart. Returns the (m, 2) lat/lng points of
+    all routes back to back and each route's segment count.
+    """
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 4)
+    distance = haversine_km(ends[:, 0], ends[:, 1], ends[:, 2], ends[:, 3])
+    steps = np.maximum(1, np.ceil(distance / segment_km)).astype(np.int64)
+    owners = np.repeat(np.arange(len(ends)), steps + 1)
+    t = (np.arange(len(owners)) - np.repeat(np.cumsum(steps + 1) - (steps + 1), steps + 1)) / steps[owners]
+
+    lats, lngs = np.radians(ends[:, 0::2]), np.radians(ends[:, 1::2])
+    xyz = np.stack([np.cos(lats) * np.cos(lngs), np.cos(lats) * np.sin(lngs), np.sin(lats)], axis=-1)
+    omega = (distance / EARTH_RADIUS_KM)[owners]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arc = omega > 1e-9
+        w0 = np.where(arc, np.sin((1 - t) * omega) / np.sin(omega), 1 - t)
+        w1 = np.where(arc, np.sin(t * omega) / np.sin(omega), t)
+    points = w0[:, None] * xyz[owners, 0] + w1[:, None] * xyz[owners, 1]
+    points /= np.linalg.norm(points, axis=1)[:, None]
+    return np.column_stack([np.degrees(np.arcsin(np.clip(points[:, 2], -1, 1))),
+                            np.degrees(np.arctan2(points[:, 1], points[:, 0]))]), steps
+
+
+def route_geometry(ends, cached=None, segment_km=None, tolerance_m=None):
+    """Polyline for a route: cached road geometry (coarsely simplified) or the great circle"""
+    if cached is not None and len(cached) >= 2:
+        return simplify(cached, Config.CORRIDOR_SIMPLIFY_TOLERANCE_M if tolerance_m is None else tolerance_m)
+    return great_circle_paths([ends], segment_km or Config.CORRIDOR_SEGMENT_KM)[0]
+
+
+def point_segment_distance(lat, lng, segments):
+    """(km off the segment, fraction along it) of points against (…, 4) segments; broadcasts.
+
+    Uses a local equirectangular projection around each point, which is
+    accurate to well under a percent at corridor distances.
+    """
+    scale = np.cos(np.radians(lat)) * KM_PER_DEGREE
+    ax, ay = (segments[..., 1] - lng) * scale, (segments[..., 0] - lat) * KM_PER_DEGREE
+    dx, dy = (segments[..., 3] - segments[..., 1]) * scale, (segments[..., 2] - segments[..., 0]) * KM_PER_DEGREE
+    length2 = dx * dx + dy * dy
+    t = np.clip(-(ax * dx + ay * dy) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    return np.hypot(ax + t * dx, ay + t * dy), t
+
+
+def listing_ends(listing):
+    """(origin lat, lng, destination lat, lng) of a listing, falling back to known towns; None if unknown"""
+    ends = []
+    for end in ('origin', 'destination'):
+        lat, lng = getattr(listing, f'{end}_lat'), getattr(listing, f'{end}_lng')
+        if lat is None or lng is None:
+            town = find_town(getattr(listing, f'{end}_city'))
+            if town is None:
+                return None
+            lat, lng = town['lat'], town['lng']
+        ends += [float(lat), float(lng)]
+    return tuple(ends)
+
+
+def _grown(array, needed):
+    if needed <= len(array):
+        return array
+    grown = np.zeros((max(needed, len(array) * 2, 1024),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class CorridorIndex:
+    """Grid index over route segments and route origins of active listings"""
+
+    def __init__(self, cell_deg=None, segment_km=None, road_factor=None):
+        self.lock = threading.RLock()
+        self.cell_deg = cell_deg or Config.CORRIDOR_CELL_DEG
+        self.segment_km = segment_km or Config.CORRIDOR_SEGMENT_KM
+        self.road_factor = road_factor or Config.ROAD_DISTANCE_FACTOR
+
+        # Per route (one per indexed listing)
+        self.ids = []
+        self.routes = {}
+        self.user_keys = {}
+        self.users = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+        self.ends = np.zeros((0, 4), dtype=np.float64)
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.first_segment = np.zeros(0, dtype=np.int64)
+        self.segment_counts = np.zeros(0, dtype=np.int32)
+        self.route_count = 0
+        self.removed = 0
+
+        # Per segment: lat1, lng1, lat2, lng2, owning route, km along it to the start, length
+        self.segments = np.zeros((0, 4), dtype=np.float32)
+        self.segment_routes = np.zeros(0, dtype=np.int32)
+        self.segment_offsets = np.zeros(0, dtype=np.float32)
+        self.segment_lengths = np.zeros(0, dtype=np.float32)
+        self.segment_count = 0
+
+        # Sorted cell keys and the items in them; later items are unindexed
+        self.segment_cells = np.zeros(0, dtype=np.int64)
+        self.segment_items = np.zeros(0, dtype=np.int32)
+        self.segments_indexed = 0
+        self.origin_cells = np.zeros(0, dtype=np.int64)
+        self.origin_items = np.zeros(0, dtype=np.int32)
+        self.routes_indexed = 0
+        self.synced_at = None
+        self.window_seen = {}
+
+    def __len__(self):
+        return self.route_count - self.removed
+
+    # --- loading -------------------------------------------------------
+
+    def add(self, listing_id, user_id, ends, points=None):
+        """Index a listing's route; ends are (origin lat, lng, destination lat, lng), points its polyline"""
+        self.extend([(listing_id, user_id, ends, points)])
+
+    def extend(self, routes):
+        """Index many (listing_id, user_id, ends, points) routes at once; points None means the great circle"""
+        with self.lock:
+            routes = list(routes)
+            if not routes:
+                return 0
+            for listing_id, _, _, _ in routes:
+                self.remove(listing_id)
+
+            ends = np.array([route[2] for route in routes], dtype=np.float64)
+            arcs = [i for i, route in enumerate(routes) if route[3] is None]
+            arc_points, arc_counts = great_circle_paths(ends[arcs], self.segment_km)
+            paths = [route[3] for route in routes]
+            for i, points in zip(arcs, np.split(arc_points, np.cumsum(arc_counts + 1)[:-1])):
+                paths[i] = points
+            points = np.concatenate([np.asarray(path, dtype=np.float64) for path in paths])
+            counts = np.array([len(path) - 1 for path in paths], dtype=np.int64)
+
+            # Segment k of route r joins its points k and k + 1
+            owners = np.repeat(np.arange(len(routes)), counts)
+            starts = np.cumsum(counts + 1) - (counts + 1)
+            within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            a, b = points[starts[owners] + within], points[starts[owners] + within + 1]
+            lengths = haversine_km(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+            totals = np.bincount(owners, weights=lengths, minlength=len(routes))
+            offsets = np.cumsum(lengths) - lengths - np.repeat(np.cumsum(totals) - totals, counts)
+
+            route, first = self.route_count, self.segment_count
+            last_route, last = route + len(routes), first + len(lengths)
+            for name in ('users', 'active', 'ends', 'lengths', 'first_segment', 'segment_counts'):
+                setattr(self, name, _grown(getattr(self, name), last_route))
+            for name in ('segments', 'segment_routes', 'segment_offsets', 'segment_lengths'):
+                setattr(self, name, _grown(getattr(self, name), last))
+
+            self.segments[first:last] = np.column_stack([a, b])
+            self.segment_routes[first:last] = owners + route
+            self.segment_offsets[first:last] = offsets
+            self.segment_lengths[first:last] = lengths
+
+            self.users[route:last_route] = [self.user_keys.setdefault(r[1], len(self.user_keys)) for r in routes]
+            self.active[route:last_route] = True
+            self.ends[route:last_route] = ends
+            self.lengths[route:last_route] = totals
+            self.first_segment[route:last_route] = first + np.cumsum(counts) - counts
+            self.segment_counts[route:last_route] = counts
+            for listing_id, _, _, _ in routes:
+                self.routes[listing_id] = len(self.ids)
+                self.ids.append(listing_id)
+            self.route_count, self.segment_count = last_route, last
+            return len(routes)
+
+    def remove(self, listing_id):
+        with self.lock:
+            route = self.routes.pop(listing_id, None)
+            if route is None:
+                return False
+            self.active[route] = False
+            self.removed += 1
+            return True
+
+    def apply_changes(self, rows, geometries=None):
+        """Apply changed listings (CORRIDOR_COLUMNS rows): active ones are re-indexed, others dropped.
+
+        geometries maps (origin_city, destination_city) to cached road
+        polylines; lanes without one get a great-circle route.
+        """
+        geometries = geometries or {}
+        simplified = {}
+        with self.lock:
+            added = {}
+            for listing in rows:
+                if listing.updated_at and (self.synced_at is None or listing.updated_at > self.synced_at):
+                    self.synced_at = listing.updated_at
+                self.remove(listing.id)
+                added.pop(listing.id, None)
+                if listing.status != 'active':
+                    continue
+                ends = listing_ends(listing)
+                if ends is None:
+                    continue  # no coordinates and not a known town
+                lane = (listing.origin_city, listing.destination_city)
+                if lane in geometries and lane not in simplified:
+                    simplified[lane] = route_geometry(ends, geometries[lane])
+                added[listing.id] = (listing.id, listing.user_id, ends, simplified.get(lane))
+            self.extend(added.values())
+
+            if self.removed > self.route_count // 2:
+                self.compact()
+            elif self.segment_count - self.segments_indexed > max(4096, self.segments_indexed // 16):
+                self.reindex()
+
+    def compact(self):
+        """Drop removed routes and rebuild the grid"""
+        with self.lock:
+            keep = self.active[:self.route_count]
+            renumber = np.cumsum(keep) - 1
+            kept_segments = keep[self.segment_routes[:self.segment_count]]
+
+            self.ids = [listing_id for listing_id, kept in zip(self.ids, keep) if kept]
+            self.routes = {listing_id: route for route, listing_id in enumerate(self.ids)}
+            for name in ('users', 'active', 'ends', 'lengths', 'segment_counts'):
+                setattr(self, name, getattr(self, name)[:self.route_count][keep].copy())
+            for name in ('segments', 'segment_offsets', 'segment_lengths'):
+                setattr(self, name, getattr(self, name)[:self.segment_count][kept_segments].copy())
+            self.segment_routes = renumber[self.segment_routes[:self.segment_count][kept_segments]].astype(np.int32)
+            self.first_segment = np.cumsum(self.segment_counts, dtype=np.int64) - self.segment_counts
+            self.route_count, self.segment_count, self.removed = len(self.ids), len(self.segment_routes), 0
+            self.reindex()
+
+    def reindex(self):
+        """Bucket every segment and route origin into the grid"""
+        with self.lock:
+            segments = self.segments[:self.segment_count]
+            rows0, cols0 = self._cell(np.minimum(segments[:, 0], segments[:, 2]), np.minimum(segments[:, 1], segments[:, 3]))
+            rows1, cols1 = self._cell(np.maximum(segments[:, 0], segments[:, 2]), np.maximum(segments[:, 1], segments[:, 3]))
+            live = np.flatnonzero(self.active[self.segment_routes[:self.segment_count]])
+            self.segment_cells, self.segment_items = self._bucket(
+                live, rows0[live], rows1[live], cols0[live], cols1[live])
+            self.segments_indexed = self.segment_count
+
+            live = np.flatnonzero(self.active[:self.route_count])
+            rows, cols = self._cell(self.ends[live, 0], self.ends[live, 1])
+            self.origin_cells, self.origin_items = self._bucket(live, rows, rows, cols, cols)
+            self.routes_indexed = self.route_count
+
+    def _cell(self, lat, lng):
+        return (np.floor((np.asarray(lat, dtype=np.float64) + 90) / self.cell_deg).astype(np.int64),
+                np.floor((np.asarray(lng, dtype=np.float64) + 180) / self.cell_deg).astype(np.int64))
+
+    @staticmethod
+    def _expand(rows0, rows1, cols0, cols1):
+        """(owner, cell key) for every cell of each row/column range"""
+        widths = cols1 - cols0 + 1
+        counts = (rows1 - rows0 + 1) * widths
+        owners = np.repeat(np.arange(len(counts)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = rows0[owners] + within // widths[owners]
+        cols = cols0[owners] + within % widths[owners]
+        return owners, rows * CELL_STRIDE + cols
+
+    def _bucket(self, items, rows0, rows1, cols0, cols1):
+        owners, keys = self._expand(rows0, rows1, cols0, cols1)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], items[owners[order]].astype(np.int32)
+
+    def _box_cells(self, min_lat, max_lat, min_lng, max_lng, radius_km):
+        """Row/column ranges covering boxes (scalars or arrays) grown by radius_km"""
+        dlat = radius_km / KM_PER_DEGREE
+        widest = np.maximum(np.abs(min_lat), np.abs(max_lat)) + dlat
+        dlng = radius_km / (KM_PER_DEGREE * np.maximum(np.cos(np.radians(np.minimum(widest, 90))), 0.01))
+        rows0, cols0 = self._cell(min_lat - dlat, min_lng - dlng)
+        rows1, cols1 = self._cell(max_lat + dlat, max_lng + dlng)
+        return rows0, rows1, cols0, cols1
+
+    @staticmethod
+    def _lookup(cells, items, keys):
+        """Items in any of the given cells"""
+        keys = np.unique(keys)
+        starts = np.searchsorted(cells, keys, side='left')
+        stops = np.searchsorted(cells, keys, side='right')
+        counts = stops - starts
+        if not counts.sum():
+            return np.zeros(0, dtype=np.int32)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return items[np.repeat(starts, counts) + offsets]
+
+    # --- queries -------------------------------------------------------
+
+    def carriers_for_load(self, ends, detour_km, exclude_id=None, exclude_user=None, limit=50):
+        """Routes a load from ends[:2] to ends[2:] fits along, smallest detour first"""
+        with self.lock:
+            radius = detour_km / (2 * self.road_factor)
+            near = [self._routes_near(lat, lng, radius) for lat, lng in (ends[:2], ends[2:])]
+            routes, first, second = np.intersect1d(near[0][0], near[1][0], assume_unique=True, return_indices=True)
+            off_pickup, pickup = near[0][1][first], near[0][2][first]
+            off_dropoff, dropoff = near[1][1][second], near[1][2][second]
+
+            keep = pickup < dropoff
+            if exclude_user is not None:
+                keep &= self.users[routes] != self.user_keys.get(exclude_user, -1)
+            if exclude_id in self.routes:
+                keep &= routes != self.routes[exclude_id]
+            return self._results(routes[keep], off_pickup[keep], off_dropoff[keep], pickup[keep], dropoff[keep],
+                                 self.lengths[routes[keep]], detour_km, limit)
+
+    def _routes_near(self, lat, lng, radius_km):
+        """(routes, km off route, km along it) for routes passing within radius_km of a point, nearest pass each"""
+        cells = self._box_cells(lat, lat, lng, lng, radius_km)
+        _, keys = self._expand(*(np.atleast_1d(v) for v in cells))
+        candidates = np.concatenate([self._lookup(self.segment_cells, self.segment_items, keys),
+                                     np.arange(self.segments_indexed, self.segment_count)])
+        candidates = candidates[self.active[self.segment_routes[candidates]]]
+
+        distance, t = point_segment_distance(lat, lng, self.segments[candidates].astype(np.float64))
+        close = distance <= radius_km
+        candidates, distance = candidates[close], distance[close]
+        along = self.segment_offsets[candidates] + t[close] * self.segment_lengths[candidates]
+        routes = self.segment_routes[candidates]
+
+        order = np.lexsort((distance, routes))
+        routes, nearest = np.unique(routes[order], return_index=True)
+        return routes, distance[order][nearest], along[order][nearest]
+
+    def loads_along(self, listing_id, detour_km, exclude_user=None, limit=50):
+        """Listings whose load fits along this listing's route, in pickup order; None if it is not indexed"""
+        with self.lock:
+            route = self.routes.get(listing_id)
+            if route is None:
+                return None
+            radius = detour_km / (2 * self.road_factor)
+            first = self.first_segment[route]
+            segments = self.segments[first:first + self.segment_counts[route]].astype(np.float64)
+
+            # Candidates by origin; both ends are then measured against the whole route
+            _, keys = self._expand(*self._box_cells(
+                np.minimum(segments[:, 0], segments[:, 2]), np.maximum(segments[:, 0], segments[:, 2]),
+                np.minimum(segments[:, 1], segments[:, 3]), np.maximum(segments[:, 1], segments[:, 3]), radius))
+            candidates = np.concatenate([self._lookup(self.origin_cells, self.origin_items, keys),
+                                         np.arange(self.routes_indexed, self.route_count)])
+            candidates = np.unique(candidates)
+            keep = self.active[candidates] & (candidates != route)
+            if exclude_user is not None:
+                keep &= self.users[candidates] != self.user_keys.get(exclude_user, -1)
+            candidates = candidates[keep]
+
+            offsets = self.segment_offsets[first:first + len(segments)].astype(np.float64)
+            lengths = self.segment_lengths[first:first + len(segments)].astype(np.float64)
+            measured = []
+            for lat, lng in ((0, 1), (2, 3)):
+                distance, t = point_segment_distance(self.ends[candidates, lat][:, None],
+                                                     self.ends[candidates, lng][:, None], segments[None, :, :])
+                nearest = np.argmin(distance, axis=1)
+                rows = np.arange(len(candidates))
+                measured.append((distance[rows, nearest], offsets[nearest] + t[rows, nearest] * lengths[nearest]))
+
+            (off_pickup, pickup), (off_dropoff, dropoff) = measured
+            keep = (off_pickup <= radius) & (off_dropoff <= radius) & (pickup < dropoff)
+            results = self._results(candidates[keep], off_pickup[keep], off_dropoff[keep], pickup[keep], dropoff[keep],
+                                    np.full(int(keep.sum()), self.lengths[route]), detour_km, len(candidates))
+            return sorted(results, key=lambda match: match['pickup_km'])[:limit]
+
+    def _results(self, routes, off_pickup, off_dropoff, pickup, dropoff, route_km, detour_km, limit):
+        detour = 2 * self.road_factor * (off_pickup + off_dropoff)
+        keep = detour <= detour_km
+        order = np.argsort(detour[keep], kind='stable')[:limit]
+        columns = [array[keep][order] for array in (routes, detour, pickup, dropoff, off_pickup, off_dropoff, route_km)]
+        return [{
+            'id': self.ids[int(route)],
+            'detour_km': round(float(detour), 1),
+            'pickup_km': round(float(pickup), 1),
+            'dropoff_km': round(float(dropoff), 1),
+            'pickup_off_route_km': round(float(pickup_off), 1),
+            'dropoff_off_route_km': round(float(dropoff_off), 1),
+            'route_km': round(float(length), 1)
+        } for route, detour, pickup, dropoff, pickup_off, dropoff_off, length in zip(*columns)]
+
+
+def sync_corridor_index(index, session):
+    """Catch a corridor index up with listings changed since its last sync (all active ones if never synced)"""
+    from models.database import CargoListing, RouteCache
+
+    def apply(changes):
+        rows = list(changes)
+        if rows:
+            origins = None if index.synced_at is None else {row.origin_city for row in rows}
+            index.apply_changes(rows, RouteCache.load_geometries(origins))
+
+    with index.lock:
+        query = session.query(*[getattr(CargoListing, column) for column in CORRIDOR_COLUMNS])
+        if index.synced_at is None:
+            query = query.filter(CargoListing.status == 'active')
+        catch_up(index, query, CargoListing.updated_at, apply)
+    return index
@@ -0,0 +1,66 @@
+import numpy as np
+from config import Config
+
+
+def estimate_route_costs(distance_km, duration_min, vehicle_type='truck', fuel_type='Diesel'):
+    """Vectorized fuel, toll and labor cost (INR) for arrays of route distances/durations"""
+    distance_km = np.asarray(distance_km, dtype=np.float64)
+    duration_min = np.asarray(duration_min, dtype=np.float64)
+
+    fuel_efficiency = Config.FUEL_EFFICIENCY.get(fuel_type, 8)
+    fuel_price = Config.FUEL_PRICES.get(fuel_type, 89.0)
+    toll_rate = Config.TOLL_RATES.get(vehicle_type, 1.0)
+
+    fuel_cost = distance_km / fuel_efficiency * fuel_price
+    toll_charges = distance_km * toll_rate
+    labor_cost = duration_min / 60 * Config.LABOR_COST_PER_HOUR
+
+    return {
+        'fuel_cost': fuel_cost,
+        'toll_charges': toll_charges,
+        'labor_cost': labor_cost,
+        'total_cost': fuel_cost + toll_charges + labor_cost
+    }
+
+
+# Legs of an exchange as indexes into (origin1, destination1, origin2, destination2, exchange point):
+# both routes as planned, then each origin to the exchange point
+EXCHANGE_LEGS = ((0, 1), (2, 3), (0, 4), (2, 4))
+
+
+def exchange_cost_savings(distance_cache, exchanges, vehicle_type='truck', fuel_type='Diesel'):
+    """Savings of many cargo exchanges, costed as arrays from one batched distance lookup.
+
+    Each exchange is (origin1, destination1, origin2, destination2,
+    exchange_point) with points as {'key': "City, State", 'lat', 'lng'}
+    (coordinates may be None). Legs come from the distance cache, else the
+    coordinate estimator. Returns a RouteOptimizer.calculate_cost_savings
+    style dict per exchange, or None where a leg could not be resolved.
+    """
+    if not exchanges:
+        return []
+
+    pairs, coords = [], []
+    for points in exchanges:
+        for start, end in EXCHANGE_LEGS:
+            pairs.append((points[start].get('key'), points[end].get('key')))
+            coords.append([np.nan if value is None else value for value in (
+                points[start].get('lat'), points[start].get('lng'), points[end].get('lat'), points[end].get('lng'))])
+
+    distances, durations, _ = distance_cache.resolve_many(pairs, np.array(coords, dtype=np.float64))
+    costs = estimate_route_costs(distances.reshape(-1, len(EXCHANGE_LEGS)),
+                                 durations.reshape(-1, len(EXCHANGE_LEGS)), vehicle_type, fuel_type)['total_cost']
+
+    original = costs[:, 0] + costs[:, 1]
+    new = costs[:, 2] + costs[:, 3]
+    savings = original - new
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(original > 0, savings / original * 100, 0.0)
+    resolved = ~np.isnan(costs).any(axis=1)
+
+    return [{
+        'original_cost': float(original[i]),
+        'new_cost': float(new[i]),
+        'savings': float(savings[i]),
+        'savings_percentage': float(percentage[i])
+    } if resolved[i] else None for i in range(len(exchanges))]
@@ -0,0 +1,152 @@
+import numpy as np
+from collections import OrderedDict
+from config import Config
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km; accepts scalars or broadcastable arrays"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def route_city(place):
+    """City part of a "City, State" place, as RouteCache stores lanes"""
+    return str(place).partition(',')[0].strip()
+
+
+class DistanceCache:
+    """Shared cache of road distances/durations with an offline estimator fallback"""
+
+    def __init__(self, road_factor=None, avg_speed_kmph=None, max_entries=100000, max_matrices=32):
+        self.road_factor = road_factor or Config.ROAD_DISTANCE_FACTOR
+        self.avg_speed_kmph = avg_speed_kmph or Config.AVERAGE_TRUCK_SPEED_KMPH
+        self.max_entries = max_entries
+        self.max_matrices = max_matrices
+        self._pairs = OrderedDict()
+        self._matrices = OrderedDict()
+
+    def __len__(self):
+        return len(self._pairs)
+
+    @staticmethod
+    def _key(origin, destination):
+        return (str(origin).strip().lower(), str(destination).strip().lower())
+
+    def get(self, origin, destination):
+        """Return cached (distance_km, duration_min) or (None, None)"""
+        key = self._key(origin, destination)
+        value = self._pairs.get(key)
+        if value is None:
+            return None, None
+        self._pairs.move_to_end(key)
+        return value
+
+    def put(self, origin, destination, distance, duration):
+        key = self._key(origin, destination)
+        self._pairs[key] = (float(distance), float(duration))
+        self._pairs.move_to_end(key)
+        while len(self._pairs) > self.max_entries:
+            self._pairs.popitem(last=False)
+
+    def items(self):
+        """[(origin, destination, distance, duration)], least recently used first"""
+        return [(origin, destination, distance, duration)
+                for (origin, destination), (distance, duration) in self._pairs.items()]
+
+    def preload(self, entries):
+        """Seed pairs from items() output without evicting fresher ones"""
+        for origin, destination, distance, duration in entries:
+            key = self._key(origin, destination)
+            if key not in self._pairs:
+                self._pairs[key] = (float(distance), float(duration))
+                self._pairs.move_to_end(key, last=False)
+        while len(self._pairs) > self.max_entries:
+            self._pairs.popitem(last=False)
+
+    def get_many(self, pairs):
+        """Look up many (origin, destination) pairs; misses come back as NaN"""
+        distances = np.full(len(pairs), np.nan)
+        durations = np.full(len(pairs), np.nan)
+        for i, (origin, destination) in enumerate(pairs):
+            value = self._pairs.get(self._key(origin, destination))
+            if value is not None:
+                distances[i], durations[i] = value
+        return distances, durations
+
+    def estimate(self, lat1, lng1, lat2, lng2):
+        """Estimate road distance (km) and duration (min) from coordinates"""
+        distance = haversine_km(lat1, lng1, lat2, lng2) * self.road_factor
+        return distance, distance / self.avg_speed_kmph * 60
+
+    def matrix(self, lats, lngs):
+        """Estimated road distance matrix (km) for a set of points, cached by coordinates"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        key = np.round(np.stack([lats, lngs]), 5).tobytes()
+        cached = self._matrices.get(key)
+        if cached is not None:
+            self._matrices.move_to_end(key)
+            return cached
+
+        matrix = haversine_km(lats[:, None], lngs[:, None], lats[None, :], lngs[None, :]) * self.road_factor
+        self._matrices[key] = matrix
+        while len(self._matrices) > self.max_matrices:
+            self._matrices.popitem(last=False)
+        return matrix
+
+    def load_route_cache(self, pairs, chunk_size=500):
+        """Pull uncached pairs from the RouteCache table in a few batched queries.
+
+        RouteCache keys lanes by city, so "City, State" places are matched on
+        their city part; results are cached under the pairs as given.
+        """
+        from models.database import RouteCache
+
+        wanted = {}
+        for origin, destination in pairs:
+            if self._key(origin, destination) not in self._pairs:
+                lane = self._key(route_city(origin), route_city(destination))
+                wanted.setdefault(lane, set()).add((origin, destination))
+        if not wanted:
+            return 0
+
+        loaded = 0
+        origins = sorted({route_city(origin) for lane_pairs in wanted.values() for origin, _ in lane_pairs})
+        for start in range(0, len(origins), chunk_size):
+            chunk = origins[start:start + chunk_size]
+            rows = RouteCache.query.with_entities(
+                RouteCache.origin_city, RouteCache.destination_city,
+                RouteCache.distance, RouteCache.duration
+            ).filter(RouteCache.origin_city.in_(chunk), RouteCache.distance.isnot(None)).all()
+
+            for origin, destination, distance, duration in rows:
+                lane_pairs = wanted.pop(self._key(origin, destination), ())
+                if duration is None:
+                    duration = distance / self.avg_speed_kmph * 60
+                for pair in lane_pairs:
+                    self.put(*pair, distance, duration)
+                    loaded += 1
+        return loaded
+
+    def resolve_many(self, pairs, coords=None):
+        """Distances/durations for many pairs: cache first, then the coordinate estimator.
+
+        coords is an (n, 4) array of origin lat/lng and destination lat/lng
+        with NaN where unknown. Returns (distances, durations, sources).
+        """
+        distances, durations = self.get_many(pairs)
+        sources = np.where(np.isnan(distances), 'unresolved', 'cache').astype(object)
+
+        if coords is not None and len(pairs):
+            coords = np.asarray(coords, dtype=np.float64)
+            missing = np.isnan(distances) & ~np.isnan(coords).any(axis=1)
+            if missing.any():
+                estimated, minutes = self.estimate(*coords[missing].T)
+                distances[missing] = estimated
+                durations[missing] = minutes
+                sources[missing] = 'estimate'
+
+        return distances, durations, sources
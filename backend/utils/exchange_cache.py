@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+# Per-route fields of a meeting point result, swapped when the routes are
+ROUTE_FIELDS = (('detour_1', 'detour_2'), ('distance_to_meet_1', 'distance_to_meet_2'))
+
+
+def _point_key(point):
+    return ((point.get('city') or '').strip().lower(), (point.get('state') or '').strip().lower())
+
+
+def route_pair_key(route1_origin, route1_dest, route2_origin, route2_dest, objective='total'):
+    """(key, swapped): the normalized quadruple with the two routes in canonical order.
+
+    The meeting point objective is symmetric in the two routes, so A→B with
+    C→D and C→D with A→B share a key; swapped says the caller's routes are
+    in the reverse of the stored order.
+    """
+    route1 = _point_key(route1_origin) + _point_key(route1_dest)
+    route2 = _point_key(route2_origin) + _point_key(route2_dest)
+    swapped = route2 < route1
+    if swapped:
+        route1, route2 = route2, route1
+    return (objective,) + route1 + route2, swapped
+
+
+def _oriented(points, swapped):
+    """Copies of the points, with per-route fields swapped if needed"""
+    results = []
+    for point in points:
+        point = dict(point)
+        if swapped:
+            for first, second in ROUTE_FIELDS:
+                if first in point and second in point:
+                    point[first], point[second] = point[second], point[first]
+        results.append(point)
+    return results
+
+
+class ExchangePointCache:
+    """Bounded LRU cache of exchange-point results per route pair, with a TTL.
+
+    Results are stored in canonical route order and handed out as copies,
+    so callers can annotate them freely. Entries older than ttl_seconds are
+    treated as misses, which bounds how stale the road distances behind a
+    ranking can get.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.max_entries = max_entries or Config.EXCHANGE_CACHE_SIZE
+        self.ttl = Config.EXCHANGE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry):
+        return self.ttl and time.monotonic() - entry[0] > self.ttl
+
+    def get(self, route1_origin, route1_dest, route2_origin, route2_dest, objective='total'):
+        """Cached exchange points oriented to the given routes, or None"""
+        key, swapped = route_pair_key(route1_origin, route1_dest, route2_origin, route2_dest, objective)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if self._expired(entry):
+                del self.entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+        return _oriented(entry[1], swapped)
+
+    def put(self, route1_origin, route1_dest, route2_origin, route2_dest, points, objective='total'):
+        key, swapped = route_pair_key(route1_origin, route1_dest, route2_origin, route2_dest, objective)
+        stored = _oriented(points, swapped)
+        with self.lock:
+            self.entries[key] = (time.monotonic(), stored)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def items(self):
+        """[(key, age in seconds, points)] of live entries, least recently used first"""
+        now = time.monotonic()
+        with self.lock:
+            return [(list(key), now - stored_at, points) for key, (stored_at, points) in self.entries.items()
+                    if not self._expired((stored_at, points))]
+
+    def preload(self, entries):
+        """Seed entries from items() output (keeping their age) without replacing fresher ones"""
+        now = time.monotonic()
+        with self.lock:
+            for key, age, points in entries:
+                key = tuple(key)
+                if key not in self.entries and not (self.ttl and age > self.ttl):
+                    self.entries[key] = (now - age, points)
+                    self.entries.move_to_end(key, last=False)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def frequent_route_pairs(session, limit):
+    """The route pairs most worth pre-warming, busiest first.
+
+    Pairs that were matched before come first, by how often; then pairs of
+    opposite lanes among active listings (A→B with B→A, the typical
+    exchange), by the product of their listing counts. Each pair is
+    (route1_origin, route1_dest, route2_origin, route2_dest) as city/state dicts.
+    """
+    from sqlalchemy import func
+    from sqlalchemy.orm import aliased
+    from models.database import CargoListing, CargoMatch
+
+    def ends(listing):
+        return (listing.origin_city, listing.origin_state, listing.destination_city, listing.destination_state)
+
+    def as_pair(values):
+        return tuple({'city': city, 'state': state} for city, state in zip(values[0::2], values[1::2]))
+
+    pairs = OrderedDict()
+
+    first, second = aliased(CargoListing), aliased(CargoListing)
+    columns = ends(first) + ends(second)
+    matched = session.query(*columns, func.count().label('matches')) \
+        .select_from(CargoMatch) \
+        .join(first, CargoMatch.cargo_listing_1_id == first.id) \
+        .join(second, CargoMatch.cargo_listing_2_id == second.id) \
+        .group_by(*columns) \
+        .order_by(func.count().desc()) \
+        .limit(limit).all()
+    for row in matched:
+        pair = as_pair(row[:8])
+        pairs.setdefault(route_pair_key(*pair)[0], pair)
+
+    lanes = dict(((row[0], row[1], row[2], row[3]), row[4]) for row in session.query(
+        *ends(CargoListing), func.count()
+    ).filter(CargoListing.status == 'active').group_by(*ends(CargoListing)).all())
+    opposite = []
+    for lane, count in lanes.items():
+        reverse = lane[2:] + lane[:2]
+        if lane < reverse and reverse in lanes:
+            opposite.append((count * lanes[reverse], lane, reverse))
+    opposite.sort(key=lambda item: item[0], reverse=True)
+    for _, lane, reverse in opposite:
+        if len(pairs) >= limit:
+            break
+        pair = as_pair(lane + reverse)
+        pairs.setdefault(route_pair_key(*pair)[0], pair)
+
+    return list(pairs.values())[:limit]
+
+
+def listing_coordinates(session):
+    """lookup(city, state) over coordinates already stored on listings, averaged per place"""
+    from sqlalchemy import func
+    from models.database import CargoListing
+
+    places = {}
+    for end in ('origin', 'destination'):
+        city, state = getattr(CargoListing, f'{end}_city'), getattr(CargoListing, f'{end}_state')
+        lat, lng = getattr(CargoListing, f'{end}_lat'), getattr(CargoListing, f'{end}_lng')
+        rows = session.query(city, state, func.avg(lat), func.avg(lng)) \
+            .filter(lat.isnot(None), lng.isnot(None)) \
+            .group_by(city, state).all()
+        for row in rows:
+            places.setdefault(_point_key({'city': row[0], 'state': row[1]}), (row[2], row[3]))
+
+    def lookup(city, state):
+        return places.get(_point_key({'city': city, 'state': state}), (None, None))
+    return lookup
+
+
+def locate_route_pairs(route_pairs, *lookups):
+    """Fill in lat/lng of each route end from the first lookup(city, state) that knows it.
+
+    Ends none of the lookups resolve are left as they are, so
+    find_exchange_points() geocodes just those. Returns how many were left.
+    """
+    unresolved = 0
+    for pair in route_pairs:
+        for point in pair:
+            if point.get('lat') is not None:
+                continue
+            for lookup in lookups:
+                lat, lng = lookup(point['city'], point['state'])
+                if lat is not None:
+                    point['lat'], point['lng'] = lat, lng
+                    break
+            else:
+                unresolved += 1
+    return unresolved
@@ -0,0 +1,170 @@
+import math
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from config import Config
+from .distance_cache import DistanceCache
+
+
+class FleetPlanner:
+    """Cluster-first, route-second planner for a transporter's fleet.
+
+    Stops are grouped with KMeans, each cluster is routed with the
+    Clarke-Wright savings heuristic under the largest vehicle capacity,
+    routes are improved with 2-opt and then assigned to vehicles that can
+    carry their load.
+    """
+
+    def __init__(self, distance_cache=None, max_cluster_size=None, two_opt_max_passes=None):
+        self.distance_cache = distance_cache or DistanceCache()
+        self.max_cluster_size = max_cluster_size or Config.FLEET_MAX_CLUSTER_SIZE
+        self.two_opt_max_passes = two_opt_max_passes or Config.FLEET_TWO_OPT_MAX_PASSES
+
+    def plan(self, depot, stops, vehicles):
+        """Plan routes for a depot, a list of stops and a list of vehicles
+
+        depot: {'lat', 'lng'}
+        stops: [{'id', 'lat', 'lng', 'weight'}]  (weight in tons)
+        vehicles: [{'id', 'capacity', ...}]       (capacity in tons)
+        """
+        vehicles = [v for v in vehicles if v.get('capacity')]
+        if not vehicles:
+            return {'routes': [], 'unassigned': [s['id'] for s in stops], 'total_distance': 0}
+
+        max_capacity = max(float(v['capacity']) for v in vehicles)
+        servable = [s for s in stops if float(s.get('weight', 0)) <= max_capacity]
+        unassigned = [s['id'] for s in stops if float(s.get('weight', 0)) > max_capacity]
+
+        if not servable:
+            return {'routes': [], 'unassigned': unassigned, 'total_distance': 0}
+
+        lats = np.array([float(s['lat']) for s in servable])
+        lngs = np.array([float(s['lng']) for s in servable])
+        weights = np.array([float(s.get('weight', 0)) for s in servable])
+
+        labels = self._cluster(lats, lngs, len(vehicles))
+
+        routes = []
+        for label in np.unique(labels):
+            members = np.flatnonzero(labels == label)
+            dist = self.distance_cache.matrix(
+                np.concatenate(([depot['lat']], lats[members])),
+                np.concatenate(([depot['lng']], lngs[members]))
+            )
+            for route in self._clarke_wright(dist, weights[members], max_capacity):
+                tour = self._two_opt(dist, route)
+                routes.append({
+                    'stops': [servable[members[i - 1]]['id'] for i in tour[1:-1]],
+                    'load': float(weights[members[tour[1:-1] - 1]].sum()),
+                    'distance': float(dist[tour[:-1], tour[1:]].sum())
+                })
+
+        assigned, leftover = self._assign_vehicles(routes, vehicles)
+        for route in leftover:
+            unassigned.extend(route['stops'])
+
+        return {
+            'routes': assigned,
+            'unassigned': unassigned,
+            'total_distance': sum(r['distance'] for r in assigned)
+        }
+
+    def _cluster(self, lats, lngs, num_vehicles):
+        """Group stops into geographic clusters small enough to route quickly"""
+        n = len(lats)
+        k = min(n, max(num_vehicles, math.ceil(n / self.max_cluster_size)))
+        if k <= 1:
+            return np.zeros(n, dtype=int)
+
+        features = StandardScaler().fit_transform(np.column_stack([lats, lngs]))
+        return KMeans(n_clusters=k, n_init=3, random_state=0).fit_predict(features)
+
+    def _clarke_wright(self, dist, demand, capacity):
+        """Savings heuristic; dist index 0 is the depot, 1..n are the stops"""
+        n = len(demand)
+        if n == 1:
+            return [[1]]
+
+        d0 = dist[0, 1:]
+        iu, ju = np.triu_indices(n, k=1)
+        savings = d0[iu] + d0[ju] - dist[iu + 1, ju + 1]
+        order = np.argsort(-savings, kind='stable')
+        order = order[savings[order] > 0]
+
+        route_of = list(range(n))
+        routes = {i: [i] for i in range(n)}
+        loads = {i: float(demand[i]) for i in range(n)}
+
+        for idx in order:
+            i, j = int(iu[idx]), int(ju[idx])
+            ri, rj = route_of[i], route_of[j]
+            if ri == rj or loads[ri] + loads[rj] > capacity:
+                continue
+
+            a, b = routes[ri], routes[rj]
+            if a[-1] == i and b[0] == j:
+                merged = a + b
+            elif a[0] == i and b[-1] == j:
+                merged = b + a
+            elif a[-1] == i and b[-1] == j:
+                merged = a + b[::-1]
+            elif a[0] == i and b[0] == j:
+                merged = a[::-1] + b
+            else:
+                continue
+
+            routes[ri] = merged
+            loads[ri] += loads.pop(rj)
+            del routes[rj]
+            for stop in b:
+                route_of[stop] = ri
+
+        return [[stop + 1 for stop in route] for route in routes.values()]
+
+    def _two_opt(self, dist, route):
+        """Improve a route with 2-opt; returns the tour including the depot at both ends"""
+        tour = np.array([0] + route + [0])
+        if len(route) < 3:
+            return tour
+
+        for _ in range(self.two_opt_max_passes):
+            improved = False
+            for i in range(1, len(tour) - 2):
+                j = np.arange(i + 1, len(tour) - 1)
+                delta = (dist[tour[i - 1], tour[j]] + dist[tour[i], tour[j + 1]]
+                         - dist[tour[i - 1], tour[i]] - dist[tour[j], tour[j + 1]])
+                best = int(np.argmin(delta))
+                if delta[best] < -1e-9:
+                    k = j[best]
+                    tour[i:k + 1] = tour[i:k + 1][::-1]
+                    improved = True
+            if not improved:
+                break
+
+        return tour
+
+    def _assign_vehicles(self, routes, vehicles):
+        """Assign routes to the least-loaded vehicle with enough capacity"""
+        plans = {v['id']: {'vehicle_id': v['id'], 'capacity': float(v['capacity']), 'trips': [], 'distance': 0.0}
+                 for v in vehicles}
+        leftover = []
+
+        for route in sorted(routes, key=lambda r: r['distance'], reverse=True):
+            candidates = [p for p in plans.values() if p['capacity'] >= route['load']]
+            if not candidates:
+                leftover.append(route)
+                continue
+            plan = min(candidates, key=lambda p: p['distance'])
+            plan['trips'].append(route)
+            plan['distance'] += route['distance']
+
+        assigned = [
+            {
+                'vehicle_id': plan['vehicle_id'],
+                'capacity': plan['capacity'],
+                'trips': plan['trips'],
+                'distance': plan['distance']
+            }
+            for plan in plans.values() if plan['trips']
+        ]
+        return assigned, leftover
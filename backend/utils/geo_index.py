@@ -0,0 +1,169 @@
+import math
+import threading
+import numpy as np
+from sqlalchemy import and_, bindparam, event, or_, literal_column, text
+from config import Config
+from models.database import db, CargoListing
+from .distance_cache import haversine_km
+
+ENDS = ('origin', 'destination')
+KM_PER_DEGREE_LAT = 111.32
+
+
+def rtree_table(end):
+    return f"cargo_listings_{end}_rtree"
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+class ListingGeoIndex:
+    """Spatial lookups on listing origins and destinations.
+
+    On SQLite each end gets an R*Tree virtual table keyed by the listing's
+    rowid, kept in sync by triggers on cargo_listings; installation is lazy
+    and backfills existing rows, or rebuilds trees whose size no longer
+    matches the table. The trees are dropped together with cargo_listings
+    and re-installed on the next query. Other databases (or SQLite builds
+    without R*Tree) fall back to range filters on the lat/lng columns.
+    rebuild() re-derives the trees, e.g. after a VACUUM renumbers rowids.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.use_rtree = None
+        event.listen(CargoListing.__table__, 'after_drop', self._drop_trees)
+
+    def _drop_trees(self, table, connection, **kw):
+        if connection.dialect.name == 'sqlite':
+            for end in ENDS:
+                connection.exec_driver_sql(f"DROP TABLE IF EXISTS {rtree_table(end)}")
+        self.use_rtree = None
+
+    def _ensure(self):
+        if self.use_rtree is not None:
+            return self.use_rtree
+        with self.lock:
+            if self.use_rtree is None:
+                self.use_rtree = self._install()
+        return self.use_rtree
+
+    def _install(self):
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return False
+
+        try:
+            with engine.begin() as conn:
+                for end in ENDS:
+                    table = rtree_table(end)
+                    exists = conn.exec_driver_sql(
+                        "SELECT 1 FROM sqlite_master WHERE name = ?", (table,)).first()
+                    conn.exec_driver_sql(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING rtree(id, min_lat, max_lat, min_lng, max_lng)")
+                    for statement in self._trigger_sql(end):
+                        conn.exec_driver_sql(statement)
+                    if not exists:
+                        conn.exec_driver_sql(self._backfill_sql(end))
+                    elif self._tree_size(conn, end) != self._indexable_rows(conn, end):
+                        # Left over from an earlier table (or a missed trigger): re-derive it
+                        conn.exec_driver_sql(f"DELETE FROM {table}")
+                        conn.exec_driver_sql(self._backfill_sql(end))
+            return True
+        except Exception as e:
+            print(f"Error installing R*Tree geo index, using column filters: {e}")
+            return False
+
+    def _trigger_sql(self, end):
+        table = rtree_table(end)
+        lat, lng = f"{end}_lat", f"{end}_lng"
+        insert = (f"INSERT INTO {table} SELECT NEW.rowid, NEW.{lat}, NEW.{lat}, NEW.{lng}, NEW.{lng} "
+                  f"WHERE NEW.{lat} IS NOT NULL AND NEW.{lng} IS NOT NULL;")
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON cargo_listings BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {lat}, {lng} ON cargo_listings BEGIN "
+            f"DELETE FROM {table} WHERE id = OLD.rowid; {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON cargo_listings BEGIN "
+            f"DELETE FROM {table} WHERE id = OLD.rowid; END",
+        ]
+
+    @staticmethod
+    def _tree_size(conn, end):
+        return conn.exec_driver_sql(f"SELECT count(*) FROM {rtree_table(end)}").scalar()
+
+    @staticmethod
+    def _indexable_rows(conn, end):
+        return conn.exec_driver_sql(f"SELECT count(*) FROM cargo_listings "
+                                    f"WHERE {end}_lat IS NOT NULL AND {end}_lng IS NOT NULL").scalar()
+
+    def _backfill_sql(self, end):
+        lat, lng = f"{end}_lat", f"{end}_lng"
+        return (f"INSERT INTO {rtree_table(end)} SELECT rowid, {lat}, {lat}, {lng}, {lng} FROM cargo_listings "
+                f"WHERE {lat} IS NOT NULL AND {lng} IS NOT NULL")
+
+    def rebuild(self):
+        if not self._ensure():
+            return
+        with db.engine.begin() as conn:
+            for end in ENDS:
+                conn.exec_driver_sql(f"DELETE FROM {rtree_table(end)}")
+                conn.exec_driver_sql(self._backfill_sql(end))
+
+    def bbox_filter(self, end, min_lat, max_lat, min_lng, max_lng):
+        """Filter clause for CargoListing queries: the given end lies inside the box"""
+        if end not in ENDS:
+            raise ValueError(f"end must be one of: {', '.join(ENDS)}")
+
+        if self._ensure():
+            # unique=True: several boxes ORed into one query each keep their own values
+            box = text(f"SELECT id FROM {rtree_table(end)} WHERE min_lat <= :max_lat AND max_lat >= :min_lat "
+                       f"AND min_lng <= :max_lng AND max_lng >= :min_lng").bindparams(
+                bindparam('min_lat', min_lat, unique=True), bindparam('max_lat', max_lat, unique=True),
+                bindparam('min_lng', min_lng, unique=True), bindparam('max_lng', max_lng, unique=True))
+            return literal_column('cargo_listings.rowid').in_(box.columns(literal_column('id')))
+
+        lat = getattr(CargoListing, f"{end}_lat")
+        lng = getattr(CargoListing, f"{end}_lng")
+        return and_(lat.between(min_lat, max_lat), lng.between(min_lng, max_lng))
+
+    def radius_filter(self, end, lat, lng, radius_km):
+        """Bounding-box prefilter for a radius query; refine with within_radius()"""
+        return self.bbox_filter(end, *bounding_box(lat, lng, radius_km))
+
+    def within_radius(self, query, end, lat, lng, radius_km):
+        """[(listing, distance_km)] of a query's listings whose end is within radius_km, nearest first"""
+        listings = query.filter(self.radius_filter(end, lat, lng, radius_km)).all()
+        if not listings:
+            return []
+
+        lats = np.array([getattr(listing, f"{end}_lat") for listing in listings])
+        lngs = np.array([getattr(listing, f"{end}_lng") for listing in listings])
+        distances = haversine_km(lat, lng, lats, lngs)
+        order = np.argsort(distances)
+        return [(listings[i], float(distances[i])) for i in order if distances[i] <= radius_km]
+
+    def match_candidates(self, cargo, query, radius_km=None):
+        """Narrow a listing query to loads that could pair with cargo.
+
+        The matcher pairs reverse, shared-origin, shared-destination and
+        nearby routes, so candidates start near the cargo's origin or
+        destination, or end near its destination. Listings not geocoded yet
+        are kept when their city names line up.
+        """
+        radius_km = radius_km or Config.MATCH_CANDIDATE_RADIUS_KM
+        if cargo.origin_lat is None or cargo.destination_lat is None:
+            return query
+
+        return query.filter(or_(
+            self.radius_filter('origin', cargo.origin_lat, cargo.origin_lng, radius_km),
+            self.radius_filter('origin', cargo.destination_lat, cargo.destination_lng, radius_km),
+            self.radius_filter('destination', cargo.destination_lat, cargo.destination_lng, radius_km),
+            CargoListing.origin_lat.is_(None),
+            CargoListing.destination_lat.is_(None),
+            CargoListing.origin_city.in_([cargo.origin_city, cargo.destination_city]),
+            CargoListing.destination_city == cargo.destination_city
+        ))
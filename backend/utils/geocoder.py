@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+import queue
+from collections import OrderedDict
+from config import Config
+from .local_storage import file_lock
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to stay under a provider's rate limit"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedRateLimiter:
+    """Spaces requests 1/rate apart across every process using the same state file.
+
+    The file holds the earliest time the next request may go out; acquire()
+    waits for it under an exclusive flock, so workers, imports and CLIs on
+    one host together stay under the provider's limit.
+    """
+
+    def __init__(self, path, rate):
+        self.path = path
+        self.interval = 1.0 / float(rate)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def acquire(self):
+        with file_lock(self.path):
+            try:
+                with open(self.path) as f:
+                    next_at = float(f.read() or 0)
+            except (FileNotFoundError, ValueError):
+                next_at = 0.0
+            now = time.time()
+            if next_at > now:
+                time.sleep(next_at - now)
+                now = next_at
+            with open(self.path, 'w') as f:
+                f.write(repr(now + self.interval))
+
+
+class BulkGeocoder:
+    """Deduplicating background geocoder with an in-memory result cache.
+
+    Addresses are queued and resolved by a single worker thread that takes a
+    slot from the rate limiter before every provider request, so callers
+    never wait on the geocoder. The limiter is shared by all processes on
+    the host (GEOCODER_RATE_LIMIT_PATH), or per process if that is empty.
+    Addresses the provider cannot resolve are remembered for
+    GEOCODER_MISS_TTL_SECONDS so resubmissions do not spend requests again.
+    """
+
+    def __init__(self, route_optimizer, rate=None, burst=None, cache_size=None, rate_limit_path=None, miss_ttl=None):
+        self.route_optimizer = route_optimizer
+        rate = rate or Config.GEOCODER_RATE_LIMIT
+        rate_limit_path = Config.GEOCODER_RATE_LIMIT_PATH if rate_limit_path is None else rate_limit_path
+        if rate_limit_path:
+            self.rate_limiter = SharedRateLimiter(rate_limit_path, rate)
+        else:
+            self.rate_limiter = TokenBucket(rate, burst or Config.GEOCODER_BURST)
+        self.cache_size = cache_size or Config.GEOCODER_CACHE_SIZE
+        self.miss_ttl = Config.GEOCODER_MISS_TTL_SECONDS if miss_ttl is None else miss_ttl
+        self.misses = {}
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+
+    @staticmethod
+    def _key(city, state):
+        return ((city or '').strip().lower(), (state or '').strip().lower())
+
+    def lookup(self, city, state):
+        """Return cached coordinates without contacting the provider"""
+        with self.lock:
+            coords = self.cache.get(self._key(city, state))
+        return coords if coords else (None, None)
+
+    def cached_items(self):
+        """[(city key, state key, lat, lng)], least recently resolved first"""
+        with self.lock:
+            return [key + coords for key, coords in self.cache.items()]
+
+    def preload(self, entries):
+        """Seed the cache from cached_items() output without replacing newer results"""
+        with self.lock:
+            for city, state, lat, lng in entries:
+                key = self._key(city, state)
+                if key not in self.cache:
+                    self.cache[key] = (lat, lng)
+                    self.cache.move_to_end(key, last=False)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def submit(self, city, state, callback=None):
+        """Queue an address; callback(lat, lng) runs once it is resolved"""
+        key = self._key(city, state)
+        with self.lock:
+            coords = self.cache.get(key)
+            if coords is None:
+                if self._recent_miss(key):
+                    return False
+                waiting = self.pending.get(key)
+                if waiting is None:
+                    self.pending[key] = [callback] if callback else []
+                    self.queue.put((key, city, state))
+                elif callback:
+                    waiting.append(callback)
+                self._ensure_worker()
+                return False
+
+        if callback:
+            callback(*coords)
+        return True
+
+    def submit_many(self, addresses):
+        """Queue many (city, state) pairs; returns unique (city, state, lat, lng) rows"""
+        results = OrderedDict()
+        for city, state in addresses:
+            key = self._key(city, state)
+            if key not in results:
+                self.submit(city, state)
+                results[key] = (city, state) + self.lookup(city, state)
+        return list(results.values())
+
+    def _recent_miss(self, key):
+        missed_at = self.misses.get(key)
+        if missed_at is None:
+            return False
+        if time.monotonic() - missed_at < self.miss_ttl:
+            return True
+        del self.misses[key]
+        return False
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.pending)
+
+    def wait(self, timeout=None):
+        """Block until the queue is drained (used by CLI imports)"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self.pending_count():
+            if deadline and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._run, name='bulk-geocoder', daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            key, city, state = self.queue.get()
+            try:
+                lat, lng = self.route_optimizer.get_coordinates(city, state, rate_limiter=self.rate_limiter)
+            except Exception as e:
+                print(f"Error geocoding {city}, {state}: {e}")
+                lat, lng = None, None
+
+            with self.lock:
+                if lat is not None:
+                    self.cache[key] = (lat, lng)
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                elif self.miss_ttl:
+                    self.misses[key] = time.monotonic()
+                    if len(self.misses) > self.cache_size:
+                        now = time.monotonic()
+                        self.misses = {k: t for k, t in self.misses.items() if now - t < self.miss_ttl}
+                callbacks = self.pending.pop(key, [])
+
+            if lat is None:
+                continue
+            for callback in callbacks:
+                try:
+                    callback(lat, lng)
+                except Exception as e:
+                    print(f"Error in geocode callback for {city}, {state}: {e}")
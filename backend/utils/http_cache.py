@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import Response, make_response, request
+from config import Config
+
+
+class ResponseCache:
+    """Serialized GET responses with strong ETags derived from data versions.
+
+    Views declare which data sets they read; writers call bump() on those
+    names. The ETag of a request is computed from the versions, the endpoint
+    and its arguments alone, so a matching If-None-Match gets a 304 before
+    the view (and storage) is touched. Payloads are kept per argument set,
+    optionally gzip-compressed, in a bounded LRU.
+
+    bump() versions are per process. A data set can also share() a host-wide
+    version (e.g. the change log's last seq), which is folded into its ETags
+    so writes in other workers invalidate them too; endpoints whose data can
+    change outside both take a ttl, so their ETag rolls over at least that
+    often. The gzip body gets its own ETag (suffix -gz), as it is a different
+    representation of the same data.
+    """
+
+    def __init__(self, max_entries=None, min_compress_bytes=None):
+        self.max_entries = max_entries or Config.HTTP_CACHE_MAX_ENTRIES
+        self.min_compress_bytes = Config.HTTP_CACHE_MIN_COMPRESS_BYTES if min_compress_bytes is None else min_compress_bytes
+        self.versions = defaultdict(int)
+        self.shared_versions = {}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def bump(self, *names):
+        """Mark data sets as changed, invalidating every response that reads them"""
+        with self.lock:
+            for name in names:
+                self.versions[name] += 1
+
+    def share(self, name, version):
+        """Fold version() (a host-wide counter for a data set) into the ETags of views reading it"""
+        self.shared_versions[name] = version
+
+    def is_enabled(self, endpoint):
+        return Config.HTTP_CACHE_ENABLED and endpoint not in Config.HTTP_CACHE_DISABLED_ENDPOINTS
+
+    def etag(self, names, key, ttl=None):
+        parts = [repr(key)] + [f"{name}:{self.versions[name]}" for name in names]
+        parts += [f"{name}@{self.shared_versions[name]()}" for name in names if name in self.shared_versions]
+        if ttl:
+            parts.append(f"epoch:{int(time.time() // ttl)}")
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def cached(self, *names, vary=None, ttl=None, compress=True, enabled=True):
+        """Decorator for GET views reading the given data sets.
+
+        vary lists the query args that select the payload (None = all args);
+        enabled=False leaves the endpoint uncached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not enabled or request.method != 'GET' or not self.is_enabled(request.endpoint):
+                    return view(*args, **kwargs)
+
+                if vary is None:
+                    query = tuple(sorted(request.args.items(multi=True)))
+                else:
+                    query = tuple((arg, request.args.get(arg)) for arg in vary)
+                key = (request.endpoint, tuple(sorted(kwargs.items())), query)
+                etag = self.etag(names, key, ttl)
+
+                for current in (etag, f"{etag}-gz"):
+                    if request.if_none_match.contains(current):
+                        self.stats['not_modified'] += 1
+                        return self._respond(Response(status=304), current)
+
+                with self.lock:
+                    entry = self.entries.get(key)
+                    if entry and entry[0] == etag:
+                        self.entries.move_to_end(key)
+                        self.stats['hits'] += 1
+                    else:
+                        entry = None
+
+                if entry is None:
+                    self.stats['misses'] += 1
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+
+                    body = response.get_data()
+                    compressed = gzip.compress(body) if compress and len(body) >= self.min_compress_bytes else None
+                    entry = (etag, body, compressed, response.mimetype)
+                    with self.lock:
+                        self.entries[key] = entry
+                        self.entries.move_to_end(key)
+                        while len(self.entries) > self.max_entries:
+                            self.entries.popitem(last=False)
+
+                _, body, compressed, mimetype = entry
+                if compressed is not None and 'gzip' in request.accept_encodings:
+                    response = Response(compressed, mimetype=mimetype)
+                    response.headers['Content-Encoding'] = 'gzip'
+                    etag = f"{etag}-gz"
+                else:
+                    response = Response(body, mimetype=mimetype)
+                if compressed is not None:
+                    response.vary.add('Accept-Encoding')
+                return self._respond(response, etag)
+            return wrapper
+        return decorator
+
+    def _respond(self, response, etag):
+        response.set_etag(etag)
+        # Clients may keep the payload but must revalidate it
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
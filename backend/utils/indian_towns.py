@@ -0,0 +1,118 @@
+# Candidate towns for exchange/meeting points (name, state, lat, lng)
+INDIAN_TOWNS = [
+    {'name': 'Mumbai', 'state': 'Maharashtra', 'lat': 19.0760, 'lng': 72.8777},
+    {'name': 'Delhi', 'state': 'Delhi', 'lat': 28.7041, 'lng': 77.1025},
+    {'name': 'Bangalore', 'state': 'Karnataka', 'lat': 12.9716, 'lng': 77.5946},
+    {'name': 'Chennai', 'state': 'Tamil Nadu', 'lat': 13.0827, 'lng': 80.2707},
+    {'name': 'Kolkata', 'state': 'West Bengal', 'lat': 22.5726, 'lng': 88.3639},
+    {'name': 'Hyderabad', 'state': 'Telangana', 'lat': 17.3850, 'lng': 78.4867},
+    {'name': 'Pune', 'state': 'Maharashtra', 'lat': 18.5204, 'lng': 73.8567},
+    {'name': 'Ahmedabad', 'state': 'Gujarat', 'lat': 23.0225, 'lng': 72.5714},
+    {'name': 'Jaipur', 'state': 'Rajasthan', 'lat': 26.9124, 'lng': 75.7873},
+    {'name': 'Lucknow', 'state': 'Uttar Pradesh', 'lat': 26.8467, 'lng': 80.9462},
+    {'name': 'Kanpur', 'state': 'Uttar Pradesh', 'lat': 26.4499, 'lng': 80.3319},
+    {'name': 'Nagpur', 'state': 'Maharashtra', 'lat': 21.1458, 'lng': 79.0882},
+    {'name': 'Indore', 'state': 'Madhya Pradesh', 'lat': 22.7196, 'lng': 75.8577},
+    {'name': 'Thane', 'state': 'Maharashtra', 'lat': 19.2183, 'lng': 72.9781},
+    {'name': 'Bhopal', 'state': 'Madhya Pradesh', 'lat': 23.2599, 'lng': 77.4126},
+    {'name': 'Visakhapatnam', 'state': 'Andhra Pradesh', 'lat': 17.6868, 'lng': 83.2185},
+    {'name': 'Patna', 'state': 'Bihar', 'lat': 25.5941, 'lng': 85.1376},
+    {'name': 'Vadodara', 'state': 'Gujarat', 'lat': 22.3072, 'lng': 73.1812},
+    {'name': 'Ghaziabad', 'state': 'Uttar Pradesh', 'lat': 28.6692, 'lng': 77.4538},
+    {'name': 'Ludhiana', 'state': 'Punjab', 'lat': 30.9010, 'lng': 75.8573},
+    {'name': 'Surat', 'state': 'Gujarat', 'lat': 21.1702, 'lng': 72.8311},
+    {'name': 'Agra', 'state': 'Uttar Pradesh', 'lat': 27.1767, 'lng': 78.0081},
+    {'name': 'Nashik', 'state': 'Maharashtra', 'lat': 19.9975, 'lng': 73.7898},
+    {'name': 'Rajkot', 'state': 'Gujarat', 'lat': 22.3039, 'lng': 70.8022},
+    {'name': 'Varanasi', 'state': 'Uttar Pradesh', 'lat': 25.3176, 'lng': 82.9739},
+    {'name': 'Aurangabad', 'state': 'Maharashtra', 'lat': 19.8762, 'lng': 75.3433},
+    {'name': 'Amritsar', 'state': 'Punjab', 'lat': 31.6340, 'lng': 74.8723},
+    {'name': 'Prayagraj', 'state': 'Uttar Pradesh', 'lat': 25.4358, 'lng': 81.8463},
+    {'name': 'Ranchi', 'state': 'Jharkhand', 'lat': 23.3441, 'lng': 85.3096},
+    {'name': 'Coimbatore', 'state': 'Tamil Nadu', 'lat': 11.0168, 'lng': 76.9558},
+    {'name': 'Jabalpur', 'state': 'Madhya Pradesh', 'lat': 23.1815, 'lng': 79.9864},
+    {'name': 'Gwalior', 'state': 'Madhya Pradesh', 'lat': 26.2183, 'lng': 78.1828},
+    {'name': 'Vijayawada', 'state': 'Andhra Pradesh', 'lat': 16.5062, 'lng': 80.6480},
+    {'name': 'Jodhpur', 'state': 'Rajasthan', 'lat': 26.2389, 'lng': 73.0243},
+    {'name': 'Madurai', 'state': 'Tamil Nadu', 'lat': 9.9252, 'lng': 78.1198},
+    {'name': 'Raipur', 'state': 'Chhattisgarh', 'lat': 21.2514, 'lng': 81.6296},
+    {'name': 'Kota', 'state': 'Rajasthan', 'lat': 25.2138, 'lng': 75.8648},
+    {'name': 'Guwahati', 'state': 'Assam', 'lat': 26.1445, 'lng': 91.7362},
+    {'name': 'Chandigarh', 'state': 'Chandigarh', 'lat': 30.7333, 'lng': 76.7794},
+    {'name': 'Solapur', 'state': 'Maharashtra', 'lat': 17.6599, 'lng': 75.9064},
+    {'name': 'Bareilly', 'state': 'Uttar Pradesh', 'lat': 28.3670, 'lng': 79.4304},
+    {'name': 'Mysore', 'state': 'Karnataka', 'lat': 12.2958, 'lng': 76.6394},
+    {'name': 'Hubli', 'state': 'Karnataka', 'lat': 15.3647, 'lng': 75.1240},
+    {'name': 'Belgaum', 'state': 'Karnataka', 'lat': 15.8497, 'lng': 74.4977},
+    {'name': 'Udaipur', 'state': 'Rajasthan', 'lat': 24.5854, 'lng': 73.7125},
+    {'name': 'Ajmer', 'state': 'Rajasthan', 'lat': 26.4499, 'lng': 74.6399},
+    {'name': 'Alwar', 'state': 'Rajasthan', 'lat': 27.5530, 'lng': 76.6346},
+    {'name': 'Aligarh', 'state': 'Uttar Pradesh', 'lat': 27.8974, 'lng': 78.0880},
+    {'name': 'Hosur', 'state': 'Tamil Nadu', 'lat': 12.7409, 'lng': 77.8253},
+    {'name': 'Cuttack', 'state': 'Odisha', 'lat': 20.4625, 'lng': 85.8830},
+    {'name': 'Bhubaneswar', 'state': 'Odisha', 'lat': 20.2961, 'lng': 85.8245},
+    {'name': 'Dhanbad', 'state': 'Jharkhand', 'lat': 23.7957, 'lng': 86.4304},
+    {'name': 'Tirupati', 'state': 'Andhra Pradesh', 'lat': 13.6288, 'lng': 79.4192},
+    {'name': 'Lonavala', 'state': 'Maharashtra', 'lat': 18.7546, 'lng': 73.4062},
+    {'name': 'Anantapur', 'state': 'Andhra Pradesh', 'lat': 14.6819, 'lng': 77.6006},
+    {'name': 'Kolhapur', 'state': 'Maharashtra', 'lat': 16.7050, 'lng': 74.2433},
+    {'name': 'Salem', 'state': 'Tamil Nadu', 'lat': 11.6643, 'lng': 78.1460},
+    {'name': 'Vellore', 'state': 'Tamil Nadu', 'lat': 12.9165, 'lng': 79.1325},
+    {'name': 'Nellore', 'state': 'Andhra Pradesh', 'lat': 14.4426, 'lng': 79.9865},
+    {'name': 'Kurnool', 'state': 'Andhra Pradesh', 'lat': 15.8281, 'lng': 78.0373},
+    {'name': 'Warangal', 'state': 'Telangana', 'lat': 17.9689, 'lng': 79.5941},
+    {'name': 'Jhansi', 'state': 'Uttar Pradesh', 'lat': 25.4484, 'lng': 78.5685},
+    {'name': 'Sagar', 'state': 'Madhya Pradesh', 'lat': 23.8388, 'lng': 78.7378},
+    {'name': 'Bilaspur', 'state': 'Chhattisgarh', 'lat': 22.0797, 'lng': 82.1391},
+    {'name': 'Sambalpur', 'state': 'Odisha', 'lat': 21.4669, 'lng': 83.9812},
+    {'name': 'Durgapur', 'state': 'West Bengal', 'lat': 23.5204, 'lng': 87.3119},
+    {'name': 'Asansol', 'state': 'West Bengal', 'lat': 23.6739, 'lng': 86.9524},
+    {'name': 'Gaya', 'state': 'Bihar', 'lat': 24.7914, 'lng': 85.0002},
+    {'name': 'Gorakhpur', 'state': 'Uttar Pradesh', 'lat': 26.7606, 'lng': 83.3732},
+    {'name': 'Dehradun', 'state': 'Uttarakhand', 'lat': 30.3165, 'lng': 78.0322},
+    {'name': 'Ambala', 'state': 'Haryana', 'lat': 30.3782, 'lng': 76.7767},
+    {'name': 'Panipat', 'state': 'Haryana', 'lat': 29.3909, 'lng': 76.9635},
+    {'name': 'Bikaner', 'state': 'Rajasthan', 'lat': 28.0229, 'lng': 73.3119},
+    {'name': 'Bhilwara', 'state': 'Rajasthan', 'lat': 25.3407, 'lng': 74.6313},
+    {'name': 'Ujjain', 'state': 'Madhya Pradesh', 'lat': 23.1765, 'lng': 75.7885},
+    {'name': 'Dhule', 'state': 'Maharashtra', 'lat': 20.9042, 'lng': 74.7749},
+    {'name': 'Akola', 'state': 'Maharashtra', 'lat': 20.7002, 'lng': 77.0082},
+    {'name': 'Amravati', 'state': 'Maharashtra', 'lat': 20.9374, 'lng': 77.7796},
+    {'name': 'Nanded', 'state': 'Maharashtra', 'lat': 19.1383, 'lng': 77.3210},
+    {'name': 'Satara', 'state': 'Maharashtra', 'lat': 17.6805, 'lng': 74.0183},
+    {'name': 'Davangere', 'state': 'Karnataka', 'lat': 14.4644, 'lng': 75.9218},
+    {'name': 'Chitradurga', 'state': 'Karnataka', 'lat': 14.2251, 'lng': 76.3980},
+    {'name': 'Bellary', 'state': 'Karnataka', 'lat': 15.1394, 'lng': 76.9214},
+    {'name': 'Gulbarga', 'state': 'Karnataka', 'lat': 17.3297, 'lng': 76.8343},
+    {'name': 'Mangalore', 'state': 'Karnataka', 'lat': 12.9141, 'lng': 74.8560},
+    {'name': 'Panaji', 'state': 'Goa', 'lat': 15.4909, 'lng': 73.8278},
+    {'name': 'Kochi', 'state': 'Kerala', 'lat': 9.9312, 'lng': 76.2673},
+    {'name': 'Thiruvananthapuram', 'state': 'Kerala', 'lat': 8.5241, 'lng': 76.9366},
+    {'name': 'Kozhikode', 'state': 'Kerala', 'lat': 11.2588, 'lng': 75.7804},
+    {'name': 'Tiruchirappalli', 'state': 'Tamil Nadu', 'lat': 10.7905, 'lng': 78.7047},
+    {'name': 'Krishnagiri', 'state': 'Tamil Nadu', 'lat': 12.5266, 'lng': 78.2150},
+    {'name': 'Siliguri', 'state': 'West Bengal', 'lat': 26.7271, 'lng': 88.3953},
+    {'name': 'Jamshedpur', 'state': 'Jharkhand', 'lat': 22.8046, 'lng': 86.2029},
+    {'name': 'Kharagpur', 'state': 'West Bengal', 'lat': 22.3460, 'lng': 87.2320},
+    {'name': 'Rourkela', 'state': 'Odisha', 'lat': 22.2604, 'lng': 84.8536},
+    {'name': 'Berhampur', 'state': 'Odisha', 'lat': 19.3150, 'lng': 84.7941},
+    {'name': 'Rajahmundry', 'state': 'Andhra Pradesh', 'lat': 17.0005, 'lng': 81.8040},
+    {'name': 'Guntur', 'state': 'Andhra Pradesh', 'lat': 16.3067, 'lng': 80.4365},
+    {'name': 'Bhavnagar', 'state': 'Gujarat', 'lat': 21.7645, 'lng': 72.1519},
+    {'name': 'Vapi', 'state': 'Gujarat', 'lat': 20.3893, 'lng': 72.9106},
+    {'name': 'Palanpur', 'state': 'Gujarat', 'lat': 24.1724, 'lng': 72.4346},
+    {'name': 'Jammu', 'state': 'Jammu and Kashmir', 'lat': 32.7266, 'lng': 74.8570},
+    {'name': 'Mathura', 'state': 'Uttar Pradesh', 'lat': 27.4924, 'lng': 77.6737},
+    {'name': 'Meerut', 'state': 'Uttar Pradesh', 'lat': 28.9845, 'lng': 77.7064},
+    {'name': 'Moradabad', 'state': 'Uttar Pradesh', 'lat': 28.8386, 'lng': 78.7733},
+    {'name': 'Shivpuri', 'state': 'Madhya Pradesh', 'lat': 25.4236, 'lng': 77.6589},
+]
+
+_TOWNS_BY_NAME = {town['name'].lower(): town for town in INDIAN_TOWNS}
+
+
+def find_town(place):
+    """Look up a town by "City" or "City, State" (case-insensitive)"""
+    if not place:
+        return None
+    return _TOWNS_BY_NAME.get(place.partition(',')[0].strip().lower())
@@ -0,0 +1,81 @@
+import threading
+from collections import defaultdict
+
+
+def lane_of(cargo):
+    return (cargo.get('origin'), cargo.get('destination'))
+
+
+def reverse_lane_pairs(cargo_listings):
+    """Cargo pairs running opposite ways on the same lane (A→C with C→A), in listing order.
+
+    Hash join on the lane: each listing probes the positions of listings on
+    the reverse lane instead of scanning every other listing.
+    """
+    positions = defaultdict(list)
+    for index, cargo in enumerate(cargo_listings):
+        positions[lane_of(cargo)].append(index)
+
+    pairs = []
+    for i, cargo1 in enumerate(cargo_listings):
+        origin, destination = lane_of(cargo1)
+        if origin is None or destination is None:
+            continue
+        for j in positions.get((destination, origin), ()):
+            if j > i:
+                pairs.append((cargo1, cargo_listings[j]))
+    return pairs
+
+
+class LaneIndex:
+    """Listing counts per lane with the reverse-lane match count kept up to date.
+
+    Adding a listing on A→C adds as many matches as there are listings on
+    C→A (or on A→A itself for a round trip), so the total never needs a
+    recount after the initial build. source_count is the store's cargo count
+    the index reflects, so callers can detect writes made by other processes.
+
+    The index tracks inserts only: the local API never takes a listing out of
+    the matching pool (accepting a match just sets status 'matched'), so
+    anything else that does must rebuild() it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lanes = defaultdict(int)
+        self.match_count = 0
+        self.source_count = None
+
+    def rebuild(self, cargo_listings, source_count=None):
+        with self.lock:
+            self.lanes.clear()
+            self.match_count = 0
+            for cargo in cargo_listings:
+                self._add(cargo)
+            self.source_count = source_count
+
+    def restore(self, lanes, source_count=None):
+        """Adopt saved {(origin, destination): count} lane counts"""
+        with self.lock:
+            self.lanes.clear()
+            self.lanes.update(lanes)
+            self.match_count = 0
+            for (origin, destination), count in self.lanes.items():
+                if origin == destination:
+                    self.match_count += count * (count - 1) // 2
+                elif (origin, destination) < (destination, origin):
+                    self.match_count += count * self.lanes.get((destination, origin), 0)
+            self.source_count = source_count
+
+    def _add(self, cargo):
+        origin, destination = lane_of(cargo)
+        if origin is None or destination is None:
+            return
+        self.match_count += self.lanes[(destination, origin)]
+        self.lanes[(origin, destination)] += 1
+
+    def add(self, cargo):
+        with self.lock:
+            self._add(cargo)
+            if self.source_count is not None:
+                self.source_count += 1
@@ -0,0 +1,431 @@
+import threading
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import numpy as np
+from config import Config
+from .distance_cache import haversine_km
+from .matching_engine import MATCH_COLUMNS, CARGO_TYPE_GROUPS
+
+# Columns a pool row is built from: what matching reads (coordinates included), plus sync state
+POOL_COLUMNS = MATCH_COLUMNS + ('status', 'updated_at')
+
+# Interned field -> its string table; both route ends share one, so ids compare across them
+INTERNED_FIELDS = {
+    'user_id': 'users',
+    'origin_city': 'cities',
+    'origin_state': 'states',
+    'destination_city': 'cities',
+    'destination_state': 'states',
+    'cargo_type': 'cargo_types',
+    'special_requirements': 'requirements',
+}
+
+POOL_DTYPE = np.dtype([
+    ('id', 'S16'),                  # UUID bytes
+    ('user_id', np.int32),
+    ('origin_city', np.int32),
+    ('origin_state', np.int32),
+    ('destination_city', np.int32),
+    ('destination_state', np.int32),
+    ('cargo_type', np.int32),
+    ('special_requirements', np.int32),
+    ('weight', np.float64),
+    ('budget', np.float64),
+    ('pickup_date', np.int32),      # date.toordinal()
+    ('delivery_date', np.int32),
+    ('origin_lat', np.float32),
+    ('origin_lng', np.float32),
+    ('destination_lat', np.float32),
+    ('destination_lng', np.float32),
+    ('active', np.bool_),
+])
+
+MISSING = -1  # interned id never assigned, so it equals nothing
+
+
+def encode_id(listing_id):
+    return uuid.UUID(listing_id).bytes
+
+
+def decode_id(raw):
+    # S16 drops trailing NUL bytes on read
+    return str(uuid.UUID(bytes=raw.ljust(16, b'\0')))
+
+
+class StringTable:
+    """Interns strings to dense int32 ids; id 0 is None"""
+
+    def __init__(self):
+        self.ids = {None: 0}
+        self.values = [None]
+
+    def intern(self, value):
+        key = self.ids.get(value)
+        if key is None:
+            key = len(self.values)
+            self.ids[value] = key
+            self.values.append(value)
+        return key
+
+    def get(self, value):
+        return self.ids.get(value, MISSING)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class PoolListing(namedtuple('PoolListing', MATCH_COLUMNS)):
+    """A pool row decoded back into the attributes the matcher reads"""
+    __slots__ = ()
+
+    def to_dict(self):
+        return {k: v.isoformat() if isinstance(v, date) else v for k, v in self._asdict().items()}
+
+
+def listing_value(listing, field):
+    return listing.get(field) if isinstance(listing, dict) else getattr(listing, field, None)
+
+
+class ListingPool:
+    """Active listings packed into one NumPy structured array.
+
+    Strings are interned into StringTables and dates kept as
+    int32 ordinals, so a resident listing costs ~110 bytes instead of the
+    kilobytes of an ORM object or dict. Listing ids must be UUIDs (the
+    CargoListing default); they are stored as 16 raw bytes. Rows are appended to a growing
+    buffer; removals clear the active flag and compact() reclaims them. Ids
+    are found through a sorted index of the bulk rows plus a small dict of
+    rows added since, merged by reindex().
+
+    compatibility_scores() evaluates MatchingEngine's scoring rules for one
+    listing against every row at once.
+    """
+
+    def __init__(self, capacity=1024):
+        self.lock = threading.RLock()
+        self.rows = np.zeros(capacity, dtype=POOL_DTYPE)
+        self.size = 0
+        tables = {name: StringTable() for name in set(INTERNED_FIELDS.values())}
+        self.tables = {field: tables[name] for field, name in INTERNED_FIELDS.items()}
+        self.sorted_ids = np.empty(0, dtype='S16')
+        self.sorted_rows = np.empty(0, dtype=np.int32)
+        self.recent = {}
+        self.removed = 0
+        self.synced_at = None
+        self.window_seen = {}
+
+    def __len__(self):
+        return self.size - self.removed
+
+    @property
+    def view(self):
+        return self.rows[:self.size]
+
+    def nbytes(self):
+        """Approximate resident size: the array, the id index and the interned strings"""
+        strings = sum(len(table) * 80 for table in {id(t): t for t in self.tables.values()}.values())
+        return self.rows.nbytes + self.sorted_ids.nbytes + self.sorted_rows.nbytes + len(self.recent) * 120 + strings
+
+    # --- loading -------------------------------------------------------
+
+    def extend(self, listings, chunk_size=65536):
+        """Append listings (ORM objects, rows or dicts with POOL_COLUMNS); returns rows added"""
+        with self.lock:
+            start = self.size
+            chunk = []
+            for listing in listings:
+                chunk.append(self._encode(listing))
+                if len(chunk) == chunk_size:
+                    self._append(chunk, track=False)
+                    chunk = []
+            self._append(chunk, track=False)
+
+            added = self.size - start
+            if len(self.recent) + added > max(1024, self.size // 16):
+                self.reindex()
+            else:
+                for row in range(start, self.size):
+                    self.recent[decode_id(self.rows['id'][row])] = row
+            return added
+
+    def _encode(self, listing):
+        """One listing as a POOL_DTYPE tuple"""
+        value = lambda field: listing_value(listing, field)
+        dates = []
+        for field in ('pickup_date', 'delivery_date'):
+            day = value(field)
+            if isinstance(day, str):
+                day = date.fromisoformat(day[:10])
+            dates.append(day.toordinal())
+        coordinates = [np.nan if value(field) is None else value(field)
+                       for field in ('origin_lat', 'origin_lng', 'destination_lat', 'destination_lng')]
+        return (encode_id(value('id')),
+                *[self.tables[field].intern(value(field)) for field in INTERNED_FIELDS],
+                value('weight') or 0.0, value('budget') or 0.0, *dates, *coordinates, True)
+
+    def _append(self, encoded, track=True):
+        if not encoded:
+            return 0
+        needed = self.size + len(encoded)
+        if needed > len(self.rows):
+            grown = np.zeros(max(needed, len(self.rows) * 2), dtype=POOL_DTYPE)
+            grown[:self.size] = self.rows[:self.size]
+            self.rows = grown
+
+        self.rows[self.size:needed] = np.array(encoded, dtype=POOL_DTYPE)
+        if track:
+            for row, values in enumerate(encoded, start=self.size):
+                self.recent[decode_id(values[0])] = row
+        self.size = needed
+        return len(encoded)
+
+    def reindex(self):
+        """Fold recently added rows into the sorted id index"""
+        with self.lock:
+            ids = self.rows['id'][:self.size]
+            self.sorted_rows = np.argsort(ids, kind='stable').astype(np.int32)
+            self.sorted_ids = ids[self.sorted_rows]
+            self.recent.clear()
+
+    def find(self, listing_id):
+        """Row number of an active listing, or None"""
+        row = self.recent.get(listing_id)
+        if row is None:
+            # Elements read back without trailing NULs; compare the same way
+            key = encode_id(listing_id).rstrip(b'\0')
+            i = int(np.searchsorted(self.sorted_ids, key))
+            # Duplicates of a re-added id sit together; the last one is current
+            while i < len(self.sorted_ids) and self.sorted_ids[i] == key:
+                if self.rows['active'][self.sorted_rows[i]]:
+                    row = int(self.sorted_rows[i])
+                i += 1
+        if row is not None and self.rows['active'][row]:
+            return row
+        return None
+
+    def remove(self, listing_id):
+        with self.lock:
+            row = self.find(listing_id)
+            if row is None:
+                return False
+            self.rows['active'][row] = False
+            self.recent.pop(listing_id, None)
+            self.removed += 1
+            return True
+
+    def apply_changes(self, rows):
+        """Apply changed listings (POOL_COLUMNS rows): active ones are upserted, others dropped.
+
+        synced_at advances to the newest updated_at seen, so callers can ask
+        for rows changed since. An empty pool is bulk-loaded.
+        """
+        with self.lock:
+            latest = self.synced_at
+
+            def changed():
+                nonlocal latest
+                for listing in rows:
+                    updated_at = listing_value(listing, 'updated_at')
+                    if updated_at and (latest is None or updated_at > latest):
+                        latest = updated_at
+                    yield listing
+
+            if self.size == 0:
+                self.extend(listing for listing in changed() if listing_value(listing, 'status') == 'active')
+            else:
+                for listing in changed():
+                    self.remove(listing_value(listing, 'id'))
+                    if listing_value(listing, 'status') == 'active':
+                        self._append([self._encode(listing)])
+            self.synced_at = latest
+
+            if self.removed > self.size // 2:
+                self.compact()
+            elif len(self.recent) > max(1024, self.size // 16):
+                self.reindex()
+
+    def compact(self):
+        """Drop removed rows and rebuild the id index"""
+        with self.lock:
+            keep = self.rows['active'][:self.size]
+            live = self.rows[:self.size][keep]
+            self.rows = np.zeros(max(1024, len(live) * 2), dtype=POOL_DTYPE)
+            self.rows[:len(live)] = live
+            self.size = len(live)
+            self.removed = 0
+            self.reindex()
+
+    def export(self):
+        """(rows, sorted_ids, sorted_rows, {table name: values}) of the live rows, compacted and indexed"""
+        with self.lock:
+            if self.removed:
+                self.compact()
+            elif self.recent:
+                self.reindex()
+            tables = {name: self.tables[field].values for field, name in INTERNED_FIELDS.items()}
+            return self.rows[:self.size], self.sorted_ids, self.sorted_rows, tables
+
+    def restore(self, rows, sorted_ids, sorted_rows, tables, synced_at=None):
+        """Adopt export() output; rows may be a copy-on-write memory map"""
+        with self.lock:
+            named = {}
+            for name, values in tables.items():
+                table = named[name] = StringTable()
+                table.values = list(values)
+                table.ids = {value: key for key, value in enumerate(table.values)}
+            self.tables = {field: named[name] for field, name in INTERNED_FIELDS.items()}
+            self.rows = rows
+            self.size = len(rows)
+            self.sorted_ids = sorted_ids
+            self.sorted_rows = sorted_rows
+            self.recent = {}
+            self.window_seen = {}
+            self.removed = 0
+            self.synced_at = synced_at
+
+    # --- reading -------------------------------------------------------
+
+    def record(self, row):
+        """Decode one row into a PoolListing"""
+        values = self.rows[row]
+        fields = {}
+        for field in MATCH_COLUMNS:
+            if field == 'id':
+                fields[field] = decode_id(values['id'])
+            elif field in self.tables:
+                fields[field] = self.tables[field].values[values[field]]
+            elif field in ('pickup_date', 'delivery_date'):
+                fields[field] = date.fromordinal(int(values[field]))
+            else:
+                fields[field] = float(values[field])
+        return PoolListing(**fields)
+
+    def compatibility_scores(self, listing, nearby_km=50):
+        """(scores, eligible) arrays over all rows for one listing.
+
+        eligible marks active rows of other users whose routes are
+        compatible; scores follow MatchingEngine._calculate_compatibility_score.
+        "Nearby" compares stored coordinates instead of geocoding city names.
+        """
+        pool = self.view
+        value = lambda field: listing_value(listing, field)
+        lookup = lambda field: self.tables[field].get(value(field))
+
+        origin_city, destination_city = lookup('origin_city'), lookup('destination_city')
+        origin_state, destination_state = lookup('origin_state'), lookup('destination_state')
+
+        same_origin_city = pool['origin_city'] == origin_city
+        same_destination_city = pool['destination_city'] == destination_city
+        reverse_city = (pool['destination_city'] == origin_city) & (pool['origin_city'] == destination_city)
+        reverse_place = reverse_city & (pool['destination_state'] == origin_state) & (pool['origin_state'] == destination_state)
+        shared_place = (same_origin_city & (pool['origin_state'] == origin_state)) | \
+                       (same_destination_city & (pool['destination_state'] == destination_state))
+
+        nearby = np.zeros(len(pool), dtype=bool)
+        if value('origin_lat') is not None and value('destination_lat') is not None:
+            with np.errstate(invalid='ignore'):
+                nearby = (haversine_km(value('origin_lat'), value('origin_lng'),
+                                       pool['destination_lat'], pool['destination_lng']) <= nearby_km) & \
+                         (haversine_km(value('destination_lat'), value('destination_lng'),
+                                       pool['origin_lat'], pool['origin_lng']) <= nearby_km)
+
+        eligible = pool['active'] & (reverse_place | shared_place | nearby) & \
+            (pool['user_id'] != lookup('user_id')) & (pool['id'] != encode_id(value('id')))
+
+        route = np.select([reverse_city, same_origin_city | same_destination_city, nearby], [100, 70, 60], 30)
+
+        cargo_type = value('cargo_type')
+        types = self.tables['cargo_type'].values
+        compatible_types = np.array([t is not None and cargo_types_compatible(cargo_type, t) for t in types])
+        cargo = np.select([pool['cargo_type'] == lookup('cargo_type'), compatible_types[pool['cargo_type']]], [40, 30], 10)
+        weight, weights = value('weight'), pool['weight']
+        ratio = np.minimum(weight, weights) / np.maximum(weight, weights)
+        cargo = cargo + np.select([ratio > 0.8, ratio > 0.6], [30, 20], 10)
+        requirements = pool['special_requirements']
+        no_requirements = np.isin(requirements, [0, self.tables['special_requirements'].get('')])
+        cargo = cargo + np.select([requirements == self.tables['special_requirements'].get(value('special_requirements')),
+                                   no_requirements & (not value('special_requirements'))], [30, 20], 10)
+        cargo = np.minimum(cargo, 100)
+
+        timeline = day_gap_score(abs(pool['pickup_date'] - value('pickup_date').toordinal())) + \
+            day_gap_score(abs(pool['delivery_date'] - value('delivery_date').toordinal()))
+        timeline = np.minimum(timeline, 100)
+
+        budget, budgets = value('budget'), pool['budget']
+        if budget:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                budget_ratio = np.minimum(budget, budgets) / np.maximum(budget, budgets)
+            budget_score = np.where(budgets != 0, np.select(
+                [budget_ratio > 0.8, budget_ratio > 0.6, budget_ratio > 0.4], [100, 70, 40], 20), 50)
+        else:
+            budget_score = np.full(len(pool), 50)
+
+        # Same accumulation order as the engine, so scores match to the bit
+        scores = np.zeros(len(pool))
+        scores += route * 0.4
+        scores += cargo * 0.3
+        scores += timeline * 0.2
+        scores += budget_score * 0.1
+        return np.minimum(scores, 100), eligible
+
+
+def sync_window_start(synced_at):
+    """Where a catch-up query starts: LISTING_SYNC_WINDOW_SECONDS behind the newest updated_at seen.
+
+    updated_at is stamped before commit, so a slow transaction can commit
+    rows older than ones already synced; re-reading a window catches them.
+    """
+    return synced_at - timedelta(seconds=Config.LISTING_SYNC_WINDOW_SECONDS)
+
+
+def unseen_changes(rows, seen, record_from):
+    """Rows not applied yet at their current updated_at.
+
+    seen maps listing id to the updated_at last applied; rows updated at or
+    after record_from are added to it, so the next window re-read skips them.
+    """
+    for row in rows:
+        listing_id, updated_at = listing_value(row, 'id'), listing_value(row, 'updated_at')
+        if updated_at is not None and seen.get(listing_id) == updated_at:
+            continue
+        if updated_at is not None and updated_at >= record_from:
+            seen[listing_id] = updated_at
+        yield row
+
+
+def catch_up(target, query, updated_at, apply):
+    """Feed target (a pool or index with synced_at and window_seen) the rows query finds changed.
+
+    Never synced: all active rows. Otherwise rows updated within the sync
+    window, minus those already applied at the same updated_at.
+    """
+    if target.synced_at is None:
+        record_from = sync_window_start(datetime.utcnow())
+    else:
+        record_from = sync_window_start(target.synced_at)
+        query = query.filter(updated_at >= record_from)
+    apply(unseen_changes(query.order_by(updated_at).yield_per(10000), target.window_seen, record_from))
+    if target.synced_at is not None:
+        cutoff = sync_window_start(target.synced_at)
+        target.window_seen = {key: seen_at for key, seen_at in target.window_seen.items() if seen_at >= cutoff}
+
+
+def sync_from_database(pool, session):
+    """Catch a pool up with listings changed since its last sync (all active ones if never synced)"""
+    from models.database import CargoListing
+
+    with pool.lock:
+        query = session.query(*[getattr(CargoListing, column) for column in POOL_COLUMNS])
+        if pool.synced_at is None:
+            query = query.filter(CargoListing.status == 'active')
+        catch_up(pool, query, CargoListing.updated_at, pool.apply_changes)
+    return pool
+
+
+def day_gap_score(days):
+    return np.select([days <= 1, days <= 3, days <= 7], [50, 30, 20], 10)
+
+
+def cargo_types_compatible(type1, type2):
+    return any(type1.lower() in types and type2.lower() in types for types in CARGO_TYPE_GROUPS.values())
@@ -0,0 +1,126 @@
+import os
+import threading
+from datetime import date, datetime, timedelta
+from sqlalchemy import update
+from config import Config
+from models.database import db, CargoListing
+from .local_storage import try_lock_file
+
+
+class ListingExpirySweeper:
+    """Moves active listings whose pickup date has passed to status 'expired'.
+
+    Each sweep selects up to batch_size stale ids through the
+    (status, pickup_date) index and expires them with a single UPDATE per
+    batch. Listeners registered with add_listener() get the ids that UPDATE
+    actually expired, so match caches and indexes can drop them.
+
+    Every worker runs the timer, but only the one holding the sweeper's file
+    lock sweeps; the others retry for the lock on each tick, so another
+    takes over if that worker exits.
+    """
+
+    def __init__(self, app, interval_seconds=None, batch_size=None, grace_days=None, lock_path=None):
+        self.app = app
+        self.interval = Config.LISTING_EXPIRY_INTERVAL_SECONDS if interval_seconds is None else interval_seconds
+        self.batch_size = batch_size or Config.LISTING_EXPIRY_BATCH_SIZE
+        self.grace_days = Config.LISTING_EXPIRY_GRACE_DAYS if grace_days is None else grace_days
+        self.lock_path = lock_path or Config.LISTING_EXPIRY_LOCK_PATH
+        self.lock_file = None
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.timer = None
+        self.stats = {'runs': 0, 'expired_total': 0, 'last_expired': 0, 'last_run': None}
+
+    def add_listener(self, callback):
+        """Register callback(expired_ids), called after each committed batch"""
+        self.listeners.append(callback)
+
+    def sweep(self, today=None):
+        """Expire all stale active listings; returns how many were expired"""
+        cutoff = (today or date.today()) - timedelta(days=self.grace_days)
+        expired = 0
+
+        with self.lock, self.app.app_context():
+            try:
+                while True:
+                    ids = [row.id for row in db.session.query(CargoListing.id)
+                           .filter(CargoListing.status == 'active', CargoListing.pickup_date < cutoff)
+                           .limit(self.batch_size)]
+                    if not ids:
+                        break
+
+                    changed = self._expire(ids)
+                    db.session.commit()
+                    expired += len(changed)
+                    if changed:
+                        self._notify(changed)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error expiring listings: {e}")
+
+            self.stats['runs'] += 1
+            self.stats['expired_total'] += expired
+            self.stats['last_expired'] = expired
+            self.stats['last_run'] = datetime.utcnow().isoformat()
+
+        if expired:
+            print(f"🧹 Expired {expired} listings with pickup before {cutoff.isoformat()}")
+        return expired
+
+    def _expire(self, ids):
+        """Expire the listings among ids that are still active; returns the ids it changed"""
+        statement = update(CargoListing) \
+            .where(CargoListing.id.in_(ids), CargoListing.status == 'active') \
+            .values(status='expired', updated_at=datetime.utcnow()) \
+            .execution_options(synchronize_session=False)
+        if getattr(db.session.get_bind().dialect, 'update_returning', False):
+            return [row.id for row in db.session.execute(statement.returning(CargoListing.id))]
+
+        # No UPDATE ... RETURNING: re-select within the transaction (only this worker sweeps)
+        count = db.session.execute(statement).rowcount
+        if count == len(ids):
+            return ids
+        return [row.id for row in db.session.query(CargoListing.id)
+                .filter(CargoListing.id.in_(ids), CargoListing.status == 'expired')]
+
+    def _notify(self, expired_ids):
+        for callback in self.listeners:
+            try:
+                callback(expired_ids)
+            except Exception as e:
+                print(f"Error notifying expiry listener: {e}")
+
+    def start(self):
+        """Sweep every interval_seconds on a daemon timer (no-op if the interval is 0)"""
+        if self.interval <= 0 or self.timer is not None:
+            return
+        self._schedule()
+
+    def _schedule(self):
+        self.timer = threading.Timer(self.interval, self._run)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _run(self):
+        if self._is_leader():
+            self.sweep()
+        self._schedule()
+
+    def _is_leader(self):
+        """True if this process holds the sweeper lock, taking it if it is free"""
+        if self.lock_file is None:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+                self.lock_file = try_lock_file(self.lock_path)
+            except OSError as e:
+                print(f"Error taking listing sweeper lock: {e}")
+        return self.lock_file is not None
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
@@ -0,0 +1,230 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from config import Config
+from .lane_index import reverse_lane_pairs
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run a single worker
+    fcntl = None
+
+# Collection name -> JSON file in the data directory
+COLLECTION_FILES = {
+    'users': 'users.json',
+    'cargo': 'cargo_listings.json',
+    'matches': 'matches.json'
+}
+
+
+def read_json_file(file_path):
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def write_json_atomic(file_path, payload):
+    """Replace a file with already-serialized JSON (str or bytes) via a fsynced temp file"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb' if isinstance(payload, bytes) else 'w') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+@contextmanager
+def file_lock(file_path, exclusive=True):
+    """Advisory lock on <file>.lock, shared between worker processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{file_path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def try_lock_file(file_path):
+    """Exclusive lock on <file>.lock without waiting: the open lock file to keep it, or None if taken"""
+    lock_file = open(f"{file_path}.lock", 'a')
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def file_stamp(stat):
+    # Writes replace the file, so the inode doubles as a generation counter
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def matches_criteria(record, criteria):
+    """True if a record matches every criterion; list/tuple/set values mean "any of" """
+    for field, expected in criteria.items():
+        value = record.get(field)
+        if isinstance(expected, (list, tuple, set, frozenset)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class LocalStore(ABC):
+    """Storage interface used by app_local; records are plain dicts with an 'id'.
+
+    Subclasses implement all(), insert() and update(); the lookups below are
+    generic scans that faster backends override. Returned records may be
+    shared with the store and must not be mutated by callers.
+    """
+
+    label = 'Local Storage'
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+
+    def path(self, collection):
+        return os.path.join(self.data_dir, COLLECTION_FILES[collection])
+
+    @abstractmethod
+    def all(self, collection):
+        """Every record of a collection"""
+
+    @abstractmethod
+    def insert(self, collection, record):
+        """Store a new record; returns it"""
+
+    @abstractmethod
+    def update(self, collection, record_ids, changes):
+        """Apply the same field changes to several records; returns how many changed"""
+
+    def get(self, collection, record_id):
+        return next((r for r in self.all(collection) if r.get('id') == record_id), None)
+
+    def find(self, collection, **criteria):
+        return [r for r in self.all(collection) if matches_criteria(r, criteria)]
+
+    def find_one(self, collection, **criteria):
+        return next((r for r in self.all(collection) if matches_criteria(r, criteria)), None)
+
+    def count(self, collection):
+        return len(self.all(collection))
+
+    def matching_pool(self):
+        """Cargo listings that take part in reverse-lane matching"""
+        return self.all('cargo')
+
+    def reverse_lane_pairs(self):
+        return reverse_lane_pairs(self.matching_pool())
+
+    def close(self):
+        pass
+
+
+class JsonFileStore(LocalStore):
+    """One JSON array per collection, safe to share between worker processes.
+
+    Writers hold an exclusive flock on <file>.lock for the whole
+    read-modify-write and replace the file atomically, so readers never see
+    a torn file and need no lock. Each process keeps the parsed records and
+    only re-parses when the file's (inode, mtime, size) stamp changes.
+    """
+
+    label = 'Local JSON Files'
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.cache = {}
+        for collection in COLLECTION_FILES:
+            with file_lock(self.path(collection)):
+                if not os.path.exists(self.path(collection)):
+                    write_json_atomic(self.path(collection), '[]')
+
+    def _parse(self, f):
+        return json.load(f)
+
+    def _serialize(self, path, records):
+        return json.dumps(records, indent=2, default=str)
+
+    def _read(self, path):
+        """Parsed records and an id lookup, re-read only if the file changed"""
+        cached = self.cache.get(path)
+        try:
+            if cached and cached[0] == file_stamp(os.stat(path)):
+                return cached[1], cached[2]
+            with open(path, 'rb') as f:
+                stamp = file_stamp(os.fstat(f.fileno()))
+                records = self._parse(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return [], {}
+
+        by_id = {r.get('id'): r for r in records}
+        self.cache[path] = (stamp, records, by_id)
+        return records, by_id
+
+    def _write(self, path, records):
+        try:
+            write_json_atomic(path, self._serialize(path, records))
+            self.cache[path] = (file_stamp(os.stat(path)), records, {r.get('id'): r for r in records})
+        except Exception:
+            self.cache.pop(path, None)
+            raise
+
+    def all(self, collection):
+        return list(self._read(self.path(collection))[0])
+
+    def get(self, collection, record_id):
+        return self._read(self.path(collection))[1].get(record_id)
+
+    def count(self, collection):
+        return len(self._read(self.path(collection))[0])
+
+    def insert(self, collection, record):
+        path = self.path(collection)
+        with file_lock(path):
+            records = list(self._read(path)[0])
+            records.append(record)
+            self._write(path, records)
+        return record
+
+    def update(self, collection, record_ids, changes):
+        record_ids = set(record_ids)
+        path = self.path(collection)
+        with file_lock(path):
+            records = [dict(r, **changes) if r.get('id') in record_ids else r for r in self._read(path)[0]]
+            updated = sum(1 for r in records if r.get('id') in record_ids)
+            if updated:
+                self._write(path, records)
+        return updated
+
+
+def create_store(mode=None, data_dir=None):
+    """Build the storage backend selected by LOCAL_STORAGE_MODE"""
+    mode = mode or Config.LOCAL_STORAGE_MODE
+    data_dir = data_dir or Config.LOCAL_DATA_DIR
+
+    if mode == 'json':
+        return JsonFileStore(data_dir)
+    if mode == 'memory':
+        from .memory_storage import IndexedMemoryStore
+        return IndexedMemoryStore(data_dir)
+    if mode == 'partitioned':
+        from .partitioned_storage import PartitionedJsonStore
+        return PartitionedJsonStore(data_dir)
+    if mode == 'sqlite':
+        from .sqlite_storage import SqliteStore
+        return SqliteStore(data_dir)
+    if mode == 'wal':
+        from .wal_storage import JsonlWalStore
+        return JsonlWalStore(data_dir)
+    raise ValueError(f"Unknown local storage mode: {mode}")
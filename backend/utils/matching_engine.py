@@ -5,16 +5,40 @@ from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
 from geopy.distance import geodesic
 from .route_optimizer import RouteOptimizer
+from .cost_model import exchange_cost_savings
+from .indian_towns import find_town
+
+# The listing attributes matching reads; enough to select instead of loading full rows.
+# Coordinates feed the offline distance estimate behind cost savings.
+MATCH_COLUMNS = ('id', 'user_id', 'origin_city', 'origin_state', 'destination_city', 'destination_state',
+                 'cargo_type', 'weight', 'special_requirements', 'pickup_date', 'delivery_date', 'budget',
+                 'origin_lat', 'origin_lng', 'destination_lat', 'destination_lng')
+
+CARGO_TYPE_GROUPS = {
+    'electronics': ['electronics', 'gadgets', 'appliances'],
+    'textiles': ['textiles', 'clothing', 'fabrics'],
+    'machinery': ['machinery', 'equipment', 'industrial'],
+    'food': ['food', 'agriculture', 'perishables'],
+    'chemicals': ['chemicals', 'pharmaceuticals', 'industrial']
+}
 
 class MatchingEngine:
-    def __init__(self):
-        self.route_optimizer = RouteOptimizer()
+    def __init__(self, route_optimizer=None):
+        # Share the app's optimizer so matching and the API use one exchange-point cache
+        self.route_optimizer = route_optimizer or RouteOptimizer()
         self.scaler = StandardScaler()
         
-    def find_compatible_matches(self, cargo_listing, all_listings, max_matches=10):
-        """Find compatible cargo matches for a given listing"""
+    def find_compatible_matches(self, cargo_listing, all_listings, max_matches=10, load_details=None):
+        """Find compatible cargo matches for a given listing.
+        
+        Listings only need the MATCH_COLUMNS attributes (ORM objects or Core
+        rows both work). Candidates are scored first; exchange points, cost
+        savings and full details are computed for the best ones only.
+        load_details(ids) -> {id: dict} fetches full rows for those; by
+        default each listing's own to_dict() is used.
+        """
         try:
-            compatible_matches = []
+            scored = []
             
             for other_listing in all_listings:
                 # Skip if same user or same listing
@@ -27,31 +51,61 @@ class MatchingEngine:
                     compatibility_score = self._calculate_compatibility_score(cargo_listing, other_listing)
                     
                     if compatibility_score > 50:  # Minimum threshold
-                        # Find optimal exchange points
-                        exchange_points = self._find_optimal_exchange_points(cargo_listing, other_listing)
-                        
-                        if exchange_points:
-                            # Calculate cost savings
-                            cost_savings = self._calculate_cost_savings(cargo_listing, other_listing, exchange_points[0])
-                            
-                            match_data = {
-                                'cargo_listing': other_listing.to_dict(),
-                                'compatibility_score': compatibility_score,
-                                'exchange_points': exchange_points,
-                                'cost_savings': cost_savings,
-                                'match_id': f"{cargo_listing.id}_{other_listing.id}"
-                            }
-                            
-                            compatible_matches.append(match_data)
-            
-            # Sort by compatibility score and return top matches
-            compatible_matches.sort(key=lambda x: x['compatibility_score'], reverse=True)
-            return compatible_matches[:max_matches]
+                        scored.append((compatibility_score, other_listing))
+            
+            # Best scores first; stable, so ties keep pool order
+            scored.sort(key=lambda x: x[0], reverse=True)
+            return self._top_matches(cargo_listing, scored, max_matches, load_details)
             
         except Exception as e:
             print(f"Error finding compatible matches: {e}")
             return []
     
+    def find_pool_matches(self, cargo_listing, pool, max_matches=10, load_details=None):
+        """Find compatible matches in a ListingPool, scoring every row at once"""
+        try:
+            scores, eligible = pool.compatibility_scores(cargo_listing)
+            rows = np.flatnonzero(eligible & (scores > 50))
+            rows = rows[np.argsort(-scores[rows], kind='stable')]
+            
+            scored = ((float(scores[row]), pool.record(row)) for row in rows)
+            return self._top_matches(cargo_listing, scored, max_matches, load_details)
+            
+        except Exception as e:
+            print(f"Error finding pool matches: {e}")
+            return []
+    
+    def _top_matches(self, cargo_listing, scored, max_matches, load_details):
+        """Exchange points and savings for the best-scored candidates that have exchange points"""
+        compatible_matches = []
+        for compatibility_score, other_listing in scored:
+            # Find optimal exchange points
+            exchange_points = self._find_optimal_exchange_points(cargo_listing, other_listing)
+            
+            if exchange_points:
+                compatible_matches.append({
+                    'cargo_listing': other_listing,
+                    'compatibility_score': compatibility_score,
+                    'exchange_points': exchange_points,
+                    'match_id': f"{cargo_listing.id}_{other_listing.id}"
+                })
+                if len(compatible_matches) == max_matches:
+                    break
+        
+        # Cost savings via each match's best exchange point, in one batch
+        for match, cost_savings in zip(compatible_matches, self._calculate_cost_savings(cargo_listing, compatible_matches)):
+            match['cost_savings'] = cost_savings
+        
+        if load_details:
+            details = load_details([match['cargo_listing'].id for match in compatible_matches])
+            for match in compatible_matches:
+                match['cargo_listing'] = details.get(match['cargo_listing'].id)
+        else:
+            for match in compatible_matches:
+                match['cargo_listing'] = match['cargo_listing'].to_dict()
+        
+        return compatible_matches
+    
     def _are_routes_compatible(self, listing1, listing2):
         """Check if two cargo routes are compatible for exchange"""
         try:
@@ -190,15 +244,7 @@ class MatchingEngine:
     
     def _are_cargo_types_compatible(self, type1, type2):
         """Check if cargo types are compatible"""
-        compatible_groups = {
-            'electronics': ['electronics', 'gadgets', 'appliances'],
-            'textiles': ['textiles', 'clothing', 'fabrics'],
-            'machinery': ['machinery', 'equipment', 'industrial'],
-            'food': ['food', 'agriculture', 'perishables'],
-            'chemicals': ['chemicals', 'pharmaceuticals', 'industrial']
-        }
-        
-        for group, types in compatible_groups.items():
+        for group, types in CARGO_TYPE_GROUPS.items():
             if type1.lower() in types and type2.lower() in types:
                 return True
         
@@ -293,39 +339,38 @@ class MatchingEngine:
             print(f"Error finding optimal exchange points: {e}")
             return []
     
-    def _calculate_cost_savings(self, listing1, listing2, exchange_point):
-        """Calculate cost savings from cargo exchange"""
+    def _calculate_cost_savings(self, cargo_listing, matches):
+        """Cost savings for matches, with every route leg from one batched distance lookup.
+        
+        Legs come from the shared distance cache, else are estimated from
+        coordinates (the listing's own, or the known town's), so no maps API
+        request is made per match. One entry per match, None where a leg
+        could not be resolved.
+        """
         try:
-            # Original routes
-            original_route1 = self.route_optimizer.get_route_details(
-                f"{listing1.origin_city}, {listing1.origin_state}",
-                f"{listing1.destination_city}, {listing1.destination_state}"
-            )
-            
-            original_route2 = self.route_optimizer.get_route_details(
-                f"{listing2.origin_city}, {listing2.origin_state}",
-                f"{listing2.destination_city}, {listing2.destination_state}"
-            )
-            
-            # New routes via exchange point
-            new_route1 = self.route_optimizer.get_route_details(
-                f"{listing1.origin_city}, {listing1.origin_state}",
-                f"{exchange_point['city']}, {exchange_point['state']}"
-            )
-            
-            new_route2 = self.route_optimizer.get_route_details(
-                f"{listing2.origin_city}, {listing2.origin_state}",
-                f"{exchange_point['city']}, {exchange_point['state']}"
-            )
-            
-            if all([original_route1, original_route2, new_route1, new_route2]):
-                savings = self.route_optimizer.calculate_cost_savings(
-                    original_route1, original_route2, new_route1, new_route2
-                )
-                return savings
-            
-            return None
+            exchanges = []
+            for match in matches:
+                exchange_point = match['exchange_points'][0]
+                exchanges.append((
+                    self._route_point(cargo_listing, 'origin'),
+                    self._route_point(cargo_listing, 'destination'),
+                    self._route_point(match['cargo_listing'], 'origin'),
+                    self._route_point(match['cargo_listing'], 'destination'),
+                    {'key': f"{exchange_point['city']}, {exchange_point['state']}",
+                     'lat': exchange_point.get('lat'), 'lng': exchange_point.get('lng')}
+                ))
+            return exchange_cost_savings(self.route_optimizer.distance_cache, exchanges)
             
         except Exception as e:
             print(f"Error calculating cost savings: {e}")
-            return None 
\ No newline at end of file
+            return [None] * len(matches)
+    
+    @staticmethod
+    def _route_point(listing, end):
+        """A listing's route end as a distance cache key plus coordinates"""
+        city = getattr(listing, f'{end}_city')
+        lat, lng = getattr(listing, f'{end}_lat', None), getattr(listing, f'{end}_lng', None)
+        if lat is None or lng is None or np.isnan(lat) or np.isnan(lng):
+            town = find_town(city)
+            lat, lng = (town['lat'], town['lng']) if town else (None, None)
+        return {'key': f"{city}, {getattr(listing, f'{end}_state')}", 'lat': lat, 'lng': lng}
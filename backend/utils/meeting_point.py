@@ -0,0 +1,123 @@
+import heapq
+import numpy as np
+from config import Config
+from .distance_cache import DistanceCache, haversine_km
+from .indian_towns import INDIAN_TOWNS
+
+
+class MeetingPointOptimizer:
+    """Pick meeting towns that minimize the detour both carriers make.
+
+    For a carrier driving origin -> destination, meeting at town P costs
+    d(origin, P) + d(P, destination) - d(origin, destination). The objective
+    is the sum of both detours ('total') or the larger one ('max', for
+    fairness), plus a small penalty for unequal approach distances.
+
+    Straight-line distance never exceeds road distance, so straight-line
+    detours are a lower bound: candidates are evaluated in bound order and
+    the search stops once the bound exceeds the current k-th best cost.
+    """
+
+    def __init__(self, candidates=None, distance_cache=None, balance_weight=None, block_size=64):
+        self.distance_cache = distance_cache or DistanceCache()
+        self.balance_weight = Config.MEETING_POINT_BALANCE_WEIGHT if balance_weight is None else balance_weight
+        self.block_size = block_size
+        self.load_candidates(candidates or INDIAN_TOWNS)
+
+    def load_candidates(self, candidates):
+        """Replace the candidate set; each candidate needs name, state, lat and lng"""
+        self.candidates = list(candidates)
+        self.lats = np.array([c['lat'] for c in self.candidates], dtype=np.float64)
+        self.lngs = np.array([c['lng'] for c in self.candidates], dtype=np.float64)
+        self.keys = [f"{c['name']}, {c['state']}" for c in self.candidates]
+
+    def optimize(self, route1, route2, objective='total', top_k=5):
+        """Best meeting points for two routes given as {'origin': point, 'destination': point}
+
+        A point is {'lat', 'lng'} with an optional 'key' ("City, State") used
+        for road-distance cache lookups.
+        """
+        if objective not in ('total', 'max'):
+            raise ValueError(f"Unknown objective: {objective}")
+        if not self.candidates:
+            return []
+
+        bound1, direct1 = self._detour_bound(route1)
+        bound2, direct2 = self._detour_bound(route2)
+        bound = np.maximum(bound1, bound2) if objective == 'max' else bound1 + bound2
+        order = np.argsort(bound, kind='stable')
+
+        best = []  # max-heap of (-cost, index, details)
+        evaluated = 0
+        for start in range(0, len(order), self.block_size):
+            block = order[start:start + self.block_size]
+            if len(best) == top_k and bound[block[0]] > -best[0][0]:
+                break
+
+            to_meet1, from_meet1 = self._legs(route1, block)
+            to_meet2, from_meet2 = self._legs(route2, block)
+            detour1 = np.maximum(to_meet1 + from_meet1 - direct1, 0)
+            detour2 = np.maximum(to_meet2 + from_meet2 - direct2, 0)
+            base = np.maximum(detour1, detour2) if objective == 'max' else detour1 + detour2
+            cost = base + self.balance_weight * np.abs(to_meet1 - to_meet2)
+            evaluated += len(block)
+
+            for i, index in enumerate(block):
+                entry = (-cost[i], int(index), (detour1[i], detour2[i], to_meet1[i], to_meet2[i]))
+                if len(best) < top_k:
+                    heapq.heappush(best, entry)
+                elif entry[0] > best[0][0]:
+                    heapq.heapreplace(best, entry)
+
+        results = []
+        for neg_cost, index, (detour1, detour2, to_meet1, to_meet2) in sorted(best, reverse=True):
+            candidate = self.candidates[index]
+            results.append({
+                'city': candidate['name'],
+                'state': candidate['state'],
+                'lat': candidate['lat'],
+                'lng': candidate['lng'],
+                'score': 100 / (1 + -neg_cost / 100),
+                'type': 'meeting_point',
+                'objective': objective,
+                'detour_1': float(detour1),
+                'detour_2': float(detour2),
+                'total_detour': float(detour1 + detour2),
+                'max_detour': float(max(detour1, detour2)),
+                'distance_to_meet_1': float(to_meet1),
+                'distance_to_meet_2': float(to_meet2)
+            })
+        return results
+
+    def _detour_bound(self, route):
+        """Straight-line detour lower bound for every candidate and the direct road distance"""
+        origin, destination = route['origin'], route['destination']
+        direct = self._distance(origin, destination)
+        bound = (haversine_km(origin['lat'], origin['lng'], self.lats, self.lngs)
+                 + haversine_km(self.lats, self.lngs, destination['lat'], destination['lng'])
+                 - direct)
+        return bound, direct
+
+    def _distance(self, point1, point2):
+        distance, _ = self.distance_cache.get(point1.get('key'), point2.get('key'))
+        if distance is None:
+            distance, _ = self.distance_cache.estimate(point1['lat'], point1['lng'], point2['lat'], point2['lng'])
+        return float(distance)
+
+    def _legs(self, route, block):
+        """Road distances origin -> candidate and candidate -> destination for a block"""
+        origin, destination = route['origin'], route['destination']
+        to_meet, _ = self.distance_cache.estimate(origin['lat'], origin['lng'], self.lats[block], self.lngs[block])
+        from_meet, _ = self.distance_cache.estimate(self.lats[block], self.lngs[block],
+                                                    destination['lat'], destination['lng'])
+
+        if len(self.distance_cache):
+            for i, index in enumerate(block):
+                cached, _ = self.distance_cache.get(origin.get('key'), self.keys[index])
+                if cached is not None:
+                    to_meet[i] = cached
+                cached, _ = self.distance_cache.get(self.keys[index], destination.get('key'))
+                if cached is not None:
+                    from_meet[i] = cached
+
+        return to_meet, from_meet
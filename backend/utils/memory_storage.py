@@ -0,0 +1,181 @@
+import atexit
+import json
+import threading
+from config import Config
+from .local_storage import LocalStore, COLLECTION_FILES, read_json_file, write_json_atomic, matches_criteria
+
+# Fields with a hash index per collection; tuples are composite indexes
+INDEXED_FIELDS = {
+    'users': ('email',),
+    'cargo': ('status', 'cargo_type', 'origin', 'destination', 'origin_city', 'destination_city',
+              ('origin', 'destination')),
+    'matches': ('status', 'cargo_listing_1_id', 'cargo_listing_2_id')
+}
+
+
+def index_key(record, field):
+    if isinstance(field, tuple):
+        return tuple(record.get(f) for f in field)
+    return record.get(field)
+
+
+class IndexedMemoryStore(LocalStore):
+    """Resident store: every collection is loaded once and indexed in memory.
+
+    Records are kept by id with hash indexes on INDEXED_FIELDS, so lookups by
+    id, email, status, cargo type or lane are dictionary hits. Changes are
+    written behind: a background thread rewrites dirty collections every
+    WRITE_BEHIND_INTERVAL_MS and once more at exit.
+    """
+
+    label = 'Local In-Memory Indexed Store'
+
+    def __init__(self, data_dir, flush_interval_ms=None):
+        super().__init__(data_dir)
+        self.lock = threading.RLock()
+        self.records = {}
+        self.positions = {}
+        self.indexes = {}
+        self.next_position = 0
+        self.dirty = set()
+        self.closed = threading.Event()
+
+        for collection in COLLECTION_FILES:
+            self._build(collection, self._load(collection))
+
+        self.flush_interval = (Config.WRITE_BEHIND_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms) / 1000
+        self._start_background()
+        atexit.register(self.close)
+
+    def _load(self, collection):
+        return {r['id']: r for r in read_json_file(self.path(collection))}
+
+    def _build(self, collection, records):
+        self.records[collection] = {}
+        self.positions[collection] = {}
+        self.indexes[collection] = {field: {} for field in INDEXED_FIELDS.get(collection, ())}
+        for record in records.values():
+            self._add(collection, record)
+
+    def _add(self, collection, record):
+        self.records[collection][record['id']] = record
+        self.positions[collection][record['id']] = self.next_position
+        self.next_position += 1
+        for field, index in self.indexes[collection].items():
+            index.setdefault(index_key(record, field), {})[record['id']] = None
+
+    def _unindex(self, collection, record, fields):
+        for field in fields:
+            bucket = self.indexes[collection][field].get(index_key(record, field))
+            if bucket is not None:
+                bucket.pop(record['id'], None)
+                if not bucket:
+                    del self.indexes[collection][field][index_key(record, field)]
+
+    def _reindex(self, collection, record, fields):
+        for field in fields:
+            self.indexes[collection][field].setdefault(index_key(record, field), {})[record['id']] = None
+
+    def _affected_fields(self, collection, changes):
+        return [field for field in self.indexes[collection]
+                if any(f in changes for f in (field if isinstance(field, tuple) else (field,)))]
+
+    def _persist(self, collection, entry):
+        """Record a mutation durably; here the collection is just marked dirty"""
+        self.dirty.add(collection)
+
+    def _start_background(self):
+        threading.Thread(target=self._flush_loop, name='write-behind', daemon=True).start()
+
+    def _flush_loop(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write dirty collections to their JSON files"""
+        with self.lock:
+            pending = {}
+            for collection in self.dirty:
+                pending[collection] = json.dumps(list(self.records[collection].values()), default=str)
+            self.dirty.clear()
+
+        for collection, payload in pending.items():
+            try:
+                write_json_atomic(self.path(collection), payload)
+            except Exception as e:
+                print(f"Error flushing {collection}: {e}")
+                with self.lock:
+                    self.dirty.add(collection)
+
+    def _candidates(self, collection, criteria):
+        """Smallest index bucket (or union of buckets) covering the criteria, or None"""
+        best = None
+        indexes = self.indexes[collection]
+        for field, expected in criteria.items():
+            if field not in indexes:
+                continue
+            if isinstance(expected, (list, tuple, set, frozenset)):
+                ids = {}
+                for value in expected:
+                    ids.update(indexes[field].get(value, {}))
+            else:
+                ids = indexes[field].get(expected, {})
+            if best is None or len(ids) < len(best):
+                best = ids
+        return best
+
+    def all(self, collection):
+        with self.lock:
+            return list(self.records[collection].values())
+
+    def get(self, collection, record_id):
+        return self.records[collection].get(record_id)
+
+    def find(self, collection, **criteria):
+        with self.lock:
+            candidates = self._candidates(collection, criteria)
+            if candidates is None:
+                return [r for r in self.records[collection].values() if matches_criteria(r, criteria)]
+
+            positions = self.positions[collection]
+            records = self.records[collection]
+            return [records[record_id] for record_id in sorted(candidates, key=positions.__getitem__)
+                    if matches_criteria(records[record_id], criteria)]
+
+    def find_one(self, collection, **criteria):
+        with self.lock:
+            candidates = self._candidates(collection, criteria)
+            if candidates is None:
+                return super().find_one(collection, **criteria)
+            records = self.records[collection]
+            return next((records[i] for i in candidates if matches_criteria(records[i], criteria)), None)
+
+    def count(self, collection):
+        return len(self.records[collection])
+
+    def insert(self, collection, record):
+        with self.lock:
+            self._persist(collection, {'op': 'insert', 'record': record})
+            self._add(collection, record)
+        return record
+
+    def update(self, collection, record_ids, changes):
+        with self.lock:
+            ids = [record_id for record_id in record_ids if record_id in self.records[collection]]
+            if not ids:
+                return 0
+            self._persist(collection, {'op': 'update', 'ids': ids, 'changes': changes})
+
+            fields = self._affected_fields(collection, changes)
+            for record_id in ids:
+                record = self.records[collection][record_id]
+                self._unindex(collection, record, fields)
+                record.update(changes)
+                self._reindex(collection, record, fields)
+            return len(ids)
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.flush()
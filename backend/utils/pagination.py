@@ -0,0 +1,143 @@
+import base64
+import bisect
+import json
+from datetime import datetime
+from config import Config
+
+COUNT_MODES = ('none', 'exact', 'approx')
+
+
+def encode_cursor(created_at, record_id):
+    """Opaque cursor for the (created_at, id) keyset position of a row"""
+    if hasattr(created_at, 'isoformat'):
+        created_at = created_at.isoformat()
+    payload = json.dumps([created_at, record_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at datetime, id) of an encode_cursor() value; raises ValueError for anything else"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(created_at, str) or not isinstance(record_id, str):
+            raise ValueError("cursor must hold an ISO timestamp and an id")
+        return datetime.fromisoformat(created_at), record_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_page_args(args, allowed_fields=None):
+    """Read limit, cursor, fields and count from query args; raises ValueError on bad input"""
+    try:
+        limit = int(args.get('limit', Config.PAGE_SIZE_DEFAULT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    limit = min(limit, Config.PAGE_SIZE_MAX)
+
+    cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+
+    fields = None
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        if allowed_fields is not None:
+            unknown = [f for f in fields if f not in allowed_fields]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    count_mode = args.get('count', Config.PAGINATION_COUNT_MODE)
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+
+    return limit, cursor, fields, count_mode
+
+
+def serialize_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def paginate_query(query, model, limit, cursor=None, fields=None, count_mode='none'):
+    """Keyset page of a model query, newest first on (created_at, id).
+
+    With fields only those columns (plus the keyset columns) are selected.
+    Returns (items, next_cursor, total, total_is_estimate); total is None for
+    count mode 'none'.
+    """
+    # Imported here so the local (SQLAlchemy-free) server can use paginate_records
+    from sqlalchemy import and_, or_
+
+    total, estimated = count_query(query, count_mode)
+
+    if cursor:
+        created_at, record_id = cursor
+        query = query.filter(or_(model.created_at < created_at,
+                                 and_(model.created_at == created_at, model.id < record_id)))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if fields:
+        columns = list(dict.fromkeys(fields + ['created_at', 'id']))
+        query = query.with_entities(*[getattr(model, c) for c in columns])
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if fields:
+        items = [{f: serialize_value(getattr(row, f)) for f in fields} for row in rows]
+    else:
+        items = [row.to_dict() for row in rows]
+
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return items, next_cursor, total, estimated
+
+
+def count_query(query, count_mode):
+    """Total rows for a query: exact, approximate or skipped"""
+    if count_mode == 'none':
+        return None, False
+    if count_mode == 'exact':
+        return query.order_by(None).count(), False
+
+    session = query.session
+    if session.get_bind().dialect.name == 'postgresql':
+        # Planner estimate: no scan at all
+        from sqlalchemy import text
+        statement = query.order_by(None).statement.compile(session.get_bind(), compile_kwargs={'literal_binds': True})
+        plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+        return int(plan[0]['Plan']['Plan Rows']), True
+
+    # Elsewhere count up to a cap; past it the total is reported as the cap
+    cap = Config.PAGINATION_APPROX_COUNT_CAP
+    count = query.order_by(None).limit(cap + 1).count()
+    return min(count, cap), count > cap
+
+
+def paginate_records(records, limit, cursor=None, fields=None, count_mode='none'):
+    """Keyset page over in-memory records, newest first on (created_at, id) like paginate_query.
+
+    Records without a created_at sort as the oldest, at datetime.min, so
+    their cursors still decode.
+    """
+    oldest = datetime.min.isoformat()
+    keys = [(r.get('created_at') or oldest, r.get('id') or '') for r in records]
+    if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+        order = sorted(range(len(records)), key=keys.__getitem__)
+        records = [records[i] for i in order]
+        keys = [keys[i] for i in order]
+
+    # Walk the ascending order backwards from just below the cursor
+    end = bisect.bisect_left(keys, (cursor[0].isoformat(), cursor[1])) if cursor else len(records)
+    start = max(0, end - limit)
+    page = records[start:end][::-1]
+    has_more = start > 0
+
+    if fields:
+        items = [{f: r.get(f) for f in fields} for r in page]
+    else:
+        items = page
+
+    next_cursor = encode_cursor(*keys[start]) if has_more else None
+    total = None if count_mode == 'none' else len(records)
+    return items, next_cursor, total, False
@@ -0,0 +1,250 @@
+import glob
+import gzip
+import json
+import os
+import re
+from config import Config
+from .local_storage import JsonFileStore, file_lock, file_stamp, matches_criteria, write_json_atomic
+from .indian_towns import find_town
+
+ARCHIVE_DIR = 'archive'
+ARCHIVE_COUNTS = 'counts.json'  # archive file -> [listing count, file stamp]
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+
+def slug(text):
+    return re.sub(r'[^a-z0-9]+', '_', str(text).lower()).strip('_') or 'unknown'
+
+
+def pickup_month(pickup_date):
+    month = str(pickup_date or '')[:7]
+    return month if MONTH_PATTERN.match(month) else 'undated'
+
+
+def as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+
+class PartitionedJsonStore(JsonFileStore):
+    """JSON file store with cargo split into status/pickup-month partitions.
+
+    Hot listings live in cargo/<status>/<YYYY-MM>[.<origin state>].json;
+    listings in CARGO_ARCHIVE_STATUSES move to gzip JSONL files under
+    cargo/archive/<YYYY-MM>.jsonl.gz, which stay readable through the normal
+    lookups. Queries filtered by status or pickup date only open matching
+    partitions, and reverse-lane matching never touches the archive. Users
+    and matches are stored exactly as in JsonFileStore.
+
+    count() reads archive sizes from a sidecar index (archive/counts.json)
+    kept next to the archive files, so it never decompresses them.
+    """
+
+    label = 'Local Partitioned JSON Files'
+
+    def __init__(self, data_dir, by_state=None):
+        super().__init__(data_dir)
+        self.by_state = Config.CARGO_PARTITION_BY_STATE if by_state is None else by_state
+        self.cargo_dir = os.path.join(data_dir, 'cargo')
+        self.locations = {}
+        self.archive_counts_path = os.path.join(self.cargo_dir, ARCHIVE_DIR, ARCHIVE_COUNTS)
+        os.makedirs(os.path.join(self.cargo_dir, ARCHIVE_DIR), exist_ok=True)
+        self._migrate_flat_file()
+
+    def _migrate_flat_file(self):
+        """Split an existing cargo_listings.json into partitions once"""
+        legacy = self.path('cargo')
+        with file_lock(legacy):
+            records = self._read(legacy)[0]
+            if not records:
+                return
+            self._write_partitions({}, records)
+            os.replace(legacy, f"{legacy}.migrated")
+            self._write(legacy, [])
+            print(f"📦 Partitioned {len(records)} cargo listings into {self.cargo_dir}")
+
+    def _parse(self, f):
+        if f.name.endswith('.jsonl.gz'):
+            with gzip.GzipFile(fileobj=f) as archive:
+                return [json.loads(line) for line in archive if line.strip()]
+        return super()._parse(f)
+
+    def _serialize(self, path, records):
+        if path.endswith('.jsonl.gz'):
+            lines = ''.join(json.dumps(r, default=str) + '\n' for r in records)
+            return gzip.compress(lines.encode('utf-8'))
+        return super()._serialize(path, records)
+
+    def _partition_path(self, record):
+        month = pickup_month(record.get('pickup_date'))
+        status = record.get('status')
+        if status in Config.CARGO_ARCHIVE_STATUSES:
+            return os.path.join(self.cargo_dir, ARCHIVE_DIR, f"{month}.jsonl.gz")
+
+        name = month
+        if self.by_state:
+            town = find_town(record.get('origin'))
+            name += '.' + slug(town['state'] if town else 'other')
+        return os.path.join(self.cargo_dir, slug(status), f"{name}.json")
+
+    def _partitions(self, statuses=None, months=None, include_archive=True):
+        """Partition files that can hold the given statuses and pickup months (None = any)"""
+        if statuses is None:
+            hot_dirs = [d for d in os.listdir(self.cargo_dir) if d != ARCHIVE_DIR]
+        else:
+            hot_dirs = {slug(s) for s in statuses if s not in Config.CARGO_ARCHIVE_STATUSES}
+            include_archive = include_archive and any(s in Config.CARGO_ARCHIVE_STATUSES for s in statuses)
+
+        paths = []
+        for hot_dir in sorted(hot_dirs):
+            paths.extend(sorted(glob.glob(os.path.join(self.cargo_dir, hot_dir, '*.json'))))
+        if include_archive:
+            paths.extend(sorted(glob.glob(os.path.join(self.cargo_dir, ARCHIVE_DIR, '*.jsonl.gz'))))
+
+        if months is not None:
+            months = set(months)
+            paths = [p for p in paths if os.path.basename(p).split('.')[0] in months]
+        return paths
+
+    def _scan(self, paths, criteria=None):
+        records = []
+        for path in paths:
+            records.extend(r for r in self._read(path)[0] if not criteria or matches_criteria(r, criteria))
+        # Partitions interleave in time; keep the flat file's listing order
+        records.sort(key=lambda r: r.get('created_at') or '')
+        return records
+
+    def _locate(self, record_id):
+        """Partition file holding a listing, refreshing the location map on a miss"""
+        path = self.locations.get(record_id)
+        if path and record_id in self._read(path)[1]:
+            return path
+
+        # Hot partitions first; the archive is only opened if the listing is not there
+        for paths in (self._partitions(include_archive=False), self._partitions(Config.CARGO_ARCHIVE_STATUSES)):
+            for path in paths:
+                for found_id in self._read(path)[1]:
+                    self.locations[found_id] = path
+            path = self.locations.get(record_id)
+            if path and record_id in self._read(path)[1]:
+                return path
+        return None
+
+    def _write_partitions(self, partitions, moved):
+        """Write rewritten partitions plus moved records into their new partitions"""
+        for record in moved:
+            path = self._partition_path(record)
+            if path not in partitions:
+                partitions[path] = list(self._read(path)[0])
+            partitions[path].append(record)
+
+        archive_counts = {}
+        for path, records in partitions.items():
+            if records:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._write(path, records)
+                for record in records:
+                    self.locations[record['id']] = path
+            elif os.path.exists(path):
+                os.remove(path)
+                self.cache.pop(path, None)
+            if path.endswith('.jsonl.gz'):
+                archive_counts[os.path.basename(path)] = len(records)
+        if archive_counts:
+            self._update_archive_counts(archive_counts)
+
+    def _read_archive_counts(self):
+        try:
+            with open(self.archive_counts_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _update_archive_counts(self, counts):
+        """Record the listing counts of archive files just written (0 = removed)"""
+        with file_lock(self.archive_counts_path):
+            index = self._read_archive_counts()
+            for name, count in counts.items():
+                path = os.path.join(self.cargo_dir, ARCHIVE_DIR, name)
+                if count and os.path.exists(path):
+                    index[name] = [count, list(file_stamp(os.stat(path)))]
+                else:
+                    index.pop(name, None)
+            write_json_atomic(self.archive_counts_path, json.dumps(index))
+
+    def _archive_count(self, path, index):
+        """Listings in an archive file: from the index, or counted by streaming it if stale"""
+        entry = index.get(os.path.basename(path))
+        if entry and tuple(entry[1]) == file_stamp(os.stat(path)):
+            return entry[0]
+        with gzip.open(path, 'rb') as archive:
+            count = sum(1 for line in archive if line.strip())
+        self._update_archive_counts({os.path.basename(path): count})
+        return count
+
+    def all(self, collection):
+        if collection != 'cargo':
+            return super().all(collection)
+        return self._scan(self._partitions())
+
+    def get(self, collection, record_id):
+        if collection != 'cargo':
+            return super().get(collection, record_id)
+        path = self._locate(record_id)
+        return self._read(path)[1].get(record_id) if path else None
+
+    def find(self, collection, **criteria):
+        if collection != 'cargo':
+            return super().find(collection, **criteria)
+
+        statuses = as_list(criteria['status']) if 'status' in criteria else None
+        months = [pickup_month(d) for d in as_list(criteria['pickup_date'])] if 'pickup_date' in criteria else None
+        return self._scan(self._partitions(statuses, months), criteria)
+
+    def find_one(self, collection, **criteria):
+        records = self.find(collection, **criteria)
+        return records[0] if records else None
+
+    def count(self, collection):
+        if collection != 'cargo':
+            return super().count(collection)
+        hot = sum(len(self._read(path)[0]) for path in self._partitions(include_archive=False))
+        index = self._read_archive_counts()
+        archived = sum(self._archive_count(path, index)
+                       for path in self._partitions(Config.CARGO_ARCHIVE_STATUSES))
+        return hot + archived
+
+    def insert(self, collection, record):
+        if collection != 'cargo':
+            return super().insert(collection, record)
+        with file_lock(self.path('cargo')):
+            self._write_partitions({}, [record])
+        return record
+
+    def update(self, collection, record_ids, changes):
+        if collection != 'cargo':
+            return super().update(collection, record_ids, changes)
+
+        with file_lock(self.path('cargo')):
+            partitions, moved, updated = {}, [], 0
+            for record_id in set(record_ids):
+                path = self._locate(record_id)
+                if not path:
+                    continue
+                if path not in partitions:
+                    partitions[path] = list(self._read(path)[0])
+                records = partitions[path]
+                index = next(i for i, r in enumerate(records) if r.get('id') == record_id)
+                record = dict(records[index], **changes)
+                if self._partition_path(record) == path:
+                    records[index] = record
+                else:
+                    del records[index]
+                    moved.append(record)
+                updated += 1
+
+            self._write_partitions(partitions, moved)
+        return updated
+
+    def matching_pool(self):
+        # Archived listings are finished; only hot partitions take part in matching
+        return self._scan(self._partitions(include_archive=False))
@@ -0,0 +1,83 @@
+import zlib
+import numpy as np
+from config import Config
+
+COORDINATE_SCALE = 1e5  # fixed-point precision (~1 m)
+METERS_PER_DEGREE = 111320.0
+
+
+def simplify(points, tolerance_m=None):
+    """Douglas-Peucker simplification of an (n, 2) lat/lng array; tolerance in meters"""
+    points = np.asarray(points, dtype=np.float64)
+    tolerance_m = Config.ROUTE_SIMPLIFY_TOLERANCE_M if tolerance_m is None else tolerance_m
+    if len(points) < 3 or tolerance_m <= 0:
+        return points
+
+    # Local equirectangular projection to meters
+    scale = np.cos(np.radians(points[:, 0].mean()))
+    xy = np.column_stack([points[:, 1] * scale, points[:, 0]]) * METERS_PER_DEGREE
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        segment = xy[end] - xy[start]
+        offsets = xy[start + 1:end] - xy[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return points[keep]
+
+
+def encode(points):
+    """Pack an (n, 2) lat/lng array as zlib-compressed int32 fixed-point deltas"""
+    fixed = np.round(np.asarray(points, dtype=np.float64) * COORDINATE_SCALE).astype('<i4')
+    deltas = np.diff(fixed, axis=0, prepend=np.zeros((1, 2), dtype='<i4'))
+    return zlib.compress(deltas.astype('<i4').tobytes())
+
+
+def decode(blob):
+    """Inverse of encode(); returns an (n, 2) float64 array"""
+    if not blob:
+        return np.empty((0, 2))
+    deltas = np.frombuffer(zlib.decompress(blob), dtype='<i4').reshape(-1, 2)
+    return np.cumsum(deltas, axis=0, dtype=np.int64) / COORDINATE_SCALE
+
+
+def decode_google(polyline):
+    """Decode a Google encoded polyline string into an (n, 2) lat/lng array"""
+    chunks = np.frombuffer(polyline.encode('ascii'), dtype=np.uint8).astype(np.int64) - 63
+    if len(chunks) == 0:
+        return np.empty((0, 2))
+
+    # Each value is a run of 5-bit chunks; the 0x20 bit marks continuation
+    ends = np.flatnonzero((chunks & 0x20) == 0)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    value_index = np.repeat(np.arange(len(ends)), ends - starts + 1)
+    shift = 5 * (np.arange(len(chunks)) - starts[value_index])
+    values = np.bincount(value_index, weights=(chunks & 0x1f) << shift).astype(np.int64)
+
+    values = np.where(values & 1, ~(values >> 1), values >> 1)
+    return np.cumsum(values[:len(values) // 2 * 2].reshape(-1, 2), axis=0) / 1e5
+
+
+def geometry_from_google_route(route, tolerance_m=None):
+    """Simplified geometry from a Google Directions route payload, or None"""
+    polyline = (route or {}).get('overview_polyline', {}).get('points')
+    if not polyline:
+        return None
+    return simplify(decode_google(polyline), tolerance_m)
@@ -1,7 +1,6 @@
 import googlemaps
 import numpy as np
 import pandas as pd
-from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
@@ -9,21 +8,43 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import Config
+from .distance_cache import DistanceCache
+from .exchange_cache import ExchangePointCache, route_pair_key
+from .fleet_planner import FleetPlanner
+from .meeting_point import MeetingPointOptimizer
 
 class RouteOptimizer:
     def __init__(self):
-        self.gmaps = googlemaps.Client(key=Config.GOOGLE_MAPS_API_KEY)
-        self.geolocator = Nominatim(user_agent="cargo_exchange")
+        self.gmaps = googlemaps.Client(
+            key=Config.GOOGLE_MAPS_API_KEY,
+            base_url=Config.GOOGLE_MAPS_BASE_URL,
+            timeout=Config.GOOGLE_MAPS_TIMEOUT,
+            retry_timeout=Config.GOOGLE_MAPS_RETRY_TIMEOUT
+        )
+        self.geolocator = Nominatim(
+            user_agent="cargo_exchange",
+            domain=Config.NOMINATIM_DOMAIN,
+            scheme=Config.NOMINATIM_SCHEME,
+            timeout=Config.NOMINATIM_TIMEOUT
+        )
+        self.distance_cache = DistanceCache()
+        self.fleet_planner = FleetPlanner(self.distance_cache)
+        self.meeting_point_optimizer = MeetingPointOptimizer(distance_cache=self.distance_cache)
+        self.exchange_cache = ExchangePointCache()
         
-    def get_coordinates(self, city, state):
+    def get_coordinates(self, city, state, rate_limiter=None):
         """Get coordinates for a city using geocoding"""
         try:
             # Try with city and state
+            if rate_limiter:
+                rate_limiter.acquire()
             location = self.geolocator.geocode(f"{city}, {state}, India")
             if location:
                 return location.latitude, location.longitude
             
             # Try with just city
+            if rate_limiter:
+                rate_limiter.acquire()
             location = self.geolocator.geocode(f"{city}, India")
             if location:
                 return location.latitude, location.longitude
@@ -35,6 +56,10 @@ class RouteOptimizer:
     
     def calculate_distance(self, origin, destination):
         """Calculate distance between two points using Google Maps API"""
+        distance, duration = self.distance_cache.get(origin, destination)
+        if distance is not None:
+            return distance, duration
+
         try:
             result = self.gmaps.distance_matrix(
                 origins=[origin],
@@ -46,147 +71,61 @@ class RouteOptimizer:
             if result['rows'][0]['elements'][0]['status'] == 'OK':
                 distance = result['rows'][0]['elements'][0]['distance']['value'] / 1000  # Convert to km
                 duration = result['rows'][0]['elements'][0]['duration']['value'] / 60  # Convert to minutes
+                self.distance_cache.put(origin, destination, distance, duration)
                 return distance, duration
             return None, None
         except Exception as e:
             print(f"Error calculating distance: {e}")
             return None, None
     
-    def find_exchange_points(self, route1_origin, route1_dest, route2_origin, route2_dest):
-        """Find optimal exchange points between two routes"""
+    def find_exchange_points(self, route1_origin, route1_dest, route2_origin, route2_dest, objective='total',
+                             rate_limiter=None):
+        """Find optimal exchange points between two routes (ends that carry lat/lng are not geocoded)"""
         try:
+            cached = self.exchange_cache.get(route1_origin, route1_dest, route2_origin, route2_dest, objective)
+            if cached is not None:
+                return cached
+            
             # Get coordinates for all points
-            coords = {}
+            points = []
             for point in [route1_origin, route1_dest, route2_origin, route2_dest]:
-                lat, lng = self.get_coordinates(point['city'], point['state'])
-                coords[point['city']] = {'lat': lat, 'lng': lng}
-            
-            # Calculate midpoint between origins and destinations
-            origin_midpoint = self._calculate_midpoint(
-                coords[route1_origin['city']], 
-                coords[route2_origin['city']]
+                lat, lng = point.get('lat'), point.get('lng')
+                if lat is None:
+                    lat, lng = self.get_coordinates(point['city'], point['state'], rate_limiter=rate_limiter)
+                if lat is None:
+                    return []
+                points.append({'lat': lat, 'lng': lng, 'key': f"{point['city']}, {point['state']}"})
+            
+            # Towns that minimize the combined (or worst) detour of both carriers
+            exchange_points = self.meeting_point_optimizer.optimize(
+                {'origin': points[0], 'destination': points[1]},
+                {'origin': points[2], 'destination': points[3]},
+                objective=objective
             )
-            
-            dest_midpoint = self._calculate_midpoint(
-                coords[route1_dest['city']], 
-                coords[route2_dest['city']]
-            )
-            
-            # Find cities near the midpoints
-            exchange_points = []
-            
-            # Search for cities near origin midpoint
-            origin_cities = self._find_nearby_cities(origin_midpoint, radius_km=50)
-            for city in origin_cities:
-                score = self._calculate_exchange_score(
-                    coords[route1_origin['city']], 
-                    coords[route2_origin['city']], 
-                    city
-                )
-                exchange_points.append({
-                    'city': city['name'],
-                    'state': city['state'],
-                    'lat': city['lat'],
-                    'lng': city['lng'],
-                    'score': score,
-                    'type': 'origin_midpoint'
-                })
-            
-            # Search for cities near destination midpoint
-            dest_cities = self._find_nearby_cities(dest_midpoint, radius_km=50)
-            for city in dest_cities:
-                score = self._calculate_exchange_score(
-                    coords[route1_dest['city']], 
-                    coords[route2_dest['city']], 
-                    city
-                )
-                exchange_points.append({
-                    'city': city['name'],
-                    'state': city['state'],
-                    'lat': city['lat'],
-                    'lng': city['lng'],
-                    'score': score,
-                    'type': 'destination_midpoint'
-                })
-            
-            # Sort by score and return top candidates
-            exchange_points.sort(key=lambda x: x['score'], reverse=True)
-            return exchange_points[:5]
+            self.exchange_cache.put(route1_origin, route1_dest, route2_origin, route2_dest, exchange_points, objective)
+            return exchange_points
             
         except Exception as e:
             print(f"Error finding exchange points: {e}")
             return []
     
-    def _calculate_midpoint(self, point1, point2):
-        """Calculate midpoint between two coordinates"""
-        return {
-            'lat': (point1['lat'] + point2['lat']) / 2,
-            'lng': (point1['lng'] + point2['lng']) / 2
-        }
+    def prewarm_exchange_points(self, route_pairs, objective='total', rate_limiter=None):
+        """Compute and cache exchange points for route pairs not cached yet; returns how many were added"""
+        warmed = 0
+        for pair in route_pairs:
+            if route_pair_key(*pair, objective)[0] in self.exchange_cache:
+                continue
+            if self.find_exchange_points(*pair, objective, rate_limiter=rate_limiter):
+                warmed += 1
+        return warmed
     
-    def _find_nearby_cities(self, center_point, radius_km=50):
-        """Find cities within radius of center point"""
-        # This would typically query a database of Indian cities
-        # For now, return some major cities near the center
-        major_cities = [
-            {'name': 'Mumbai', 'state': 'Maharashtra', 'lat': 19.0760, 'lng': 72.8777},
-            {'name': 'Delhi', 'state': 'Delhi', 'lat': 28.7041, 'lng': 77.1025},
-            {'name': 'Bangalore', 'state': 'Karnataka', 'lat': 12.9716, 'lng': 77.5946},
-            {'name': 'Chennai', 'state': 'Tamil Nadu', 'lat': 13.0827, 'lng': 80.2707},
-            {'name': 'Kolkata', 'state': 'West Bengal', 'lat': 22.5726, 'lng': 88.3639},
-            {'name': 'Hyderabad', 'state': 'Telangana', 'lat': 17.3850, 'lng': 78.4867},
-            {'name': 'Pune', 'state': 'Maharashtra', 'lat': 18.5204, 'lng': 73.8567},
-            {'name': 'Ahmedabad', 'state': 'Gujarat', 'lat': 23.0225, 'lng': 72.5714},
-            {'name': 'Jaipur', 'state': 'Rajasthan', 'lat': 26.9124, 'lng': 75.7873},
-            {'name': 'Lucknow', 'state': 'Uttar Pradesh', 'lat': 26.8467, 'lng': 80.9462}
-        ]
-        
-        nearby_cities = []
-        for city in major_cities:
-            distance = geodesic(
-                (center_point['lat'], center_point['lng']),
-                (city['lat'], city['lng'])
-            ).kilometers
-            
-            if distance <= radius_km:
-                nearby_cities.append(city)
-        
-        return nearby_cities
-    
-    def _calculate_exchange_score(self, point1, point2, exchange_point):
-        """Calculate score for an exchange point based on various factors"""
+    def plan_fleet_routes(self, depot, stops, vehicles):
+        """Plan multi-stop routes for a fleet of vehicles and a set of pickups"""
         try:
-            # Calculate distances
-            dist1 = geodesic(
-                (point1['lat'], point1['lng']),
-                (exchange_point['lat'], exchange_point['lng'])
-            ).kilometers
-            
-            dist2 = geodesic(
-                (point2['lat'], point2['lng']),
-                (exchange_point['lat'], exchange_point['lng'])
-            ).kilometers
-            
-            # Calculate balance score (closer to equal distances is better)
-            balance_score = 1 - abs(dist1 - dist2) / max(dist1, dist2)
-            
-            # Calculate accessibility score (shorter total distance is better)
-            total_distance = dist1 + dist2
-            accessibility_score = 1 / (1 + total_distance / 100)  # Normalize to 0-1
-            
-            # Population factor (major cities get bonus)
-            population_score = 1.2 if exchange_point['name'] in [
-                'Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad'
-            ] else 1.0
-            
-            # Final score
-            final_score = (balance_score * 0.4 + accessibility_score * 0.4 + population_score * 0.2) * 100
-            
-            return final_score
-            
+            return self.fleet_planner.plan(depot, stops, vehicles)
         except Exception as e:
-            print(f"Error calculating exchange score: {e}")
-            return 0
+            print(f"Error planning fleet routes: {e}")
+            return None
     
     def calculate_cost_savings(self, original_route1, original_route2, new_route1, new_route2):
         """Calculate cost savings from route optimization"""
@@ -215,10 +154,7 @@ class RouteOptimizer:
         """Estimate fuel cost for a given distance"""
         try:
             # Average fuel efficiency (km/liter)
-            fuel_efficiency = {
-                'Petrol': 12,  # km/liter
-                'Diesel': 8    # km/liter
-            }
+            fuel_efficiency = Config.FUEL_EFFICIENCY
             
             # Current fuel prices (INR/liter)
             fuel_prices = Config.FUEL_PRICES
@@ -248,6 +184,15 @@ class RouteOptimizer:
             print(f"Error estimating toll charges: {e}")
             return 0
     
+    def get_directions(self, origin, destination):
+        """First driving route from Google Directions (raw payload), or None"""
+        try:
+            routes = self.gmaps.directions(origin, destination, mode="driving")
+            return routes[0] if routes else None
+        except Exception as e:
+            print(f"Error fetching directions: {e}")
+            return None
+    
     def get_route_details(self, origin, destination):
         """Get detailed route information including costs"""
         try:
@@ -262,7 +207,7 @@ class RouteOptimizer:
             toll_charges = self.estimate_toll_charges(distance)
             
             # Labor cost (driver salary per hour)
-            labor_cost_per_hour = 200  # INR
+            labor_cost_per_hour = Config.LABOR_COST_PER_HOUR  # INR
             labor_cost = (duration / 60) * labor_cost_per_hour
             
             # Total cost
@@ -0,0 +1,154 @@
+"""
+Online schema upgrades and query-plan checks for the SQLAlchemy models.
+
+db.create_all() only creates missing tables, so existing databases never
+pick up new indexes or columns. upgrade_schema() adds them in place:
+indexes are built with CREATE INDEX CONCURRENTLY on PostgreSQL so writes
+keep flowing, and new nullable columns are added with ALTER TABLE.
+check_query_plans() EXPLAINs the hot queries and reports any that fall back
+to a full table scan or a sort. Run both from the backend directory:
+
+    python -m utils.schema_migrations           # upgrade, then check plans
+    python -m utils.schema_migrations --check   # check only, exit 1 on regressions
+
+tests/test_schema_migrations.py runs the plan check on a fresh SQLite schema,
+so a dropped or reshaped index fails `python -m pytest` as well.
+"""
+
+import argparse
+import sys
+from flask import Flask
+from sqlalchemy import func, inspect
+from config import config
+from models.database import db, CargoListing, CargoMatch, RouteCache
+
+
+def upgrade_schema(engine=None):
+    """Add declared indexes and nullable columns missing from existing tables"""
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    applied = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+            applied.append(f"column {table.name}.{column.name}")
+
+        existing_indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            create_index_online(engine, index)
+            applied.append(f"index {index.name}")
+
+    return applied
+
+
+def create_index_online(engine, index):
+    columns = ', '.join(c.name for c in index.columns)
+    unique = 'UNIQUE ' if index.unique else ''
+    if engine.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql(f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index.name} '
+                                 f'ON {index.table.name} ({columns})')
+    else:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f'CREATE {unique}INDEX IF NOT EXISTS {index.name} ON {index.table.name} ({columns})')
+
+
+def hot_queries():
+    """The queries the indexes are designed for, by name"""
+    listing = CargoListing
+    newest_first = (listing.created_at.desc(), listing.id.desc())
+    return {
+        'active pool': listing.query.filter_by(status='active'),
+        'list by status': listing.query.filter(listing.status == 'active').order_by(*newest_first),
+        'list by status and type': listing.query.filter(
+            listing.status == 'active', listing.cargo_type == 'electronics').order_by(*newest_first),
+        'list by lane': listing.query.filter(
+            listing.status == 'active', listing.origin_city == 'Mumbai',
+            listing.destination_city == 'Delhi').order_by(*newest_first),
+        'list by destination': listing.query.filter(
+            listing.status == 'active', listing.destination_city == 'Delhi').order_by(*newest_first),
+        'list all': listing.query.order_by(*newest_first),
+        'expiry sweep': db.session.query(listing.id).filter(
+            listing.status == 'active', listing.pickup_date < func.current_date()),
+        'matches by listing 1': CargoMatch.query.filter(CargoMatch.cargo_listing_1_id == 'x'),
+        'matches by listing 2': CargoMatch.query.filter(CargoMatch.cargo_listing_2_id == 'x'),
+        'route cache lane': RouteCache.query.filter(
+            RouteCache.origin_city == 'Mumbai', RouteCache.destination_city == 'Delhi'),
+    }
+
+
+def explain(query):
+    """Query plan lines for a SQLAlchemy query on the current engine"""
+    engine = db.engine
+    compiled = query.statement.compile(engine)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)
+            return [row[-1] for row in rows]
+        if engine.dialect.name == 'postgresql':
+            # Small tables make sequential scans cheapest; ask whether an index *can* serve it
+            conn.exec_driver_sql('SET enable_seqscan = off')
+            return [row[0] for row in conn.exec_driver_sql(f'EXPLAIN {compiled}', params)]
+        return [str(row) for row in conn.exec_driver_sql(f'EXPLAIN {compiled}', params)]
+
+
+def plan_problems(plan):
+    """Full scans or sorts in a plan (SQLite and PostgreSQL wording)"""
+    problems = []
+    for line in plan:
+        if (line.startswith('SCAN ') and 'USING' not in line) or 'Seq Scan' in line:
+            problems.append(f"full scan: {line.strip()}")
+        if 'TEMP B-TREE' in line or line.strip().startswith('Sort '):
+            problems.append(f"sort: {line.strip()}")
+    return problems
+
+
+def check_query_plans():
+    """{query name: (plan lines, problems)} for every hot query"""
+    results = {}
+    for name, query in hot_queries().items():
+        plan = explain(query)
+        results[name] = (plan, plan_problems(plan))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply schema upgrades and check hot query plans')
+    parser.add_argument('--env', default='development', choices=sorted(config))
+    parser.add_argument('--check', action='store_true', help='only check query plans')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config[args.env])
+    db.init_app(app)
+
+    with app.app_context():
+        if not args.check:
+            db.create_all()
+            for change in upgrade_schema() or ['schema already up to date']:
+                print(f"✅ {change}")
+
+        failed = False
+        for name, (plan, problems) in check_query_plans().items():
+            print(f"{'❌' if problems else '✅'} {name}: {' | '.join(plan)}")
+            failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
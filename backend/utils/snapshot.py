@@ -0,0 +1,259 @@
+"""
+Warm-start snapshots of the matching pool and lookup caches.
+
+A snapshot is a versioned directory holding the listing pool as .npy arrays
+(memory-mapped copy-on-write on load, so startup does not copy them) and a
+meta.json with the pool's string tables, the geocode, road distance and
+exchange-point caches and the lane index. CURRENT names the latest complete version.
+Snapshots from another format, pool schema or database, or older than
+SNAPSHOT_MAX_AGE_SECONDS, are rejected and the caller starts cold. After a
+load the pool catches up from listings' updated_at (sync_from_database).
+
+Build or refresh one from the database before a deploy; this is also where
+the exchange-point cache is pre-warmed for the busiest lane pairs, once for
+all workers:
+
+    python -m utils.snapshot [--env production] [--exchange-pairs 200]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+import numpy as np
+from config import Config
+from .listing_pool import POOL_COLUMNS, POOL_DTYPE, INTERNED_FIELDS
+from .local_storage import file_lock, write_json_atomic
+
+FORMAT_VERSION = 1
+POOL_ARRAYS = ('rows', 'sorted_ids', 'sorted_rows')
+
+
+def schema_fingerprint():
+    """Changes whenever the pool layout does, invalidating older snapshots"""
+    schema = [str(POOL_DTYPE.descr), list(POOL_COLUMNS), sorted(INTERNED_FIELDS.items())]
+    return hashlib.sha1(json.dumps(schema).encode('utf-8')).hexdigest()
+
+
+def source_fingerprint(database_uri):
+    return hashlib.sha1(str(database_uri).encode('utf-8')).hexdigest()[:16]
+
+
+def cache_keys(name, entries):
+    """Keys of saved cache entries (geocode city/state, distance pair, exchange route pair, lane count)"""
+    if name == 'exchange_points':
+        return {tuple(entry[0]) for entry in entries}
+    if name == 'lanes':
+        return {tuple(entry) for entry in entries}
+    return {tuple(entry[:2]) for entry in entries}
+
+
+class WarmStartSnapshot:
+    """Saves and restores the pool, geocode, distance and exchange-point caches and lane index"""
+
+    def __init__(self, directory=None, database_uri=None, max_age_seconds=None, keep=None):
+        self.directory = directory or Config.SNAPSHOT_DIR
+        self.source = source_fingerprint(database_uri or Config.SQLALCHEMY_DATABASE_URI)
+        self.max_age = Config.SNAPSHOT_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        self.keep = keep or Config.SNAPSHOT_KEEP
+        self.stats = {'loaded': None, 'load_ms': None, 'rejected': None, 'saved': None}
+
+    @property
+    def current_path(self):
+        return os.path.join(self.directory, 'CURRENT')
+
+    def save(self, pool=None, geocoder=None, distance_cache=None, lane_index=None, exchange_cache=None,
+             force=False):
+        """Write a new version and point CURRENT at it; returns its path, or None if not needed.
+
+        A save is skipped only if the current snapshot already covers the
+        pool's sync point, holds every cached key (and the same lane counts)
+        and is less than half its max age old, so it is refreshed before
+        workers would reject it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        caches = {}
+        if geocoder is not None:
+            caches['geocodes'] = geocoder.cached_items()
+        if distance_cache is not None:
+            caches['distances'] = distance_cache.items()
+        if exchange_cache is not None:
+            caches['exchange_points'] = exchange_cache.items()
+        if lane_index is not None:
+            with lane_index.lock:
+                caches['lanes'] = [[origin, destination, count]
+                                   for (origin, destination), count in lane_index.lanes.items() if count]
+                lanes_source_count = lane_index.source_count
+
+        with file_lock(self.current_path):
+            current = self._read_meta()
+            synced_at = pool.synced_at.isoformat() if pool is not None and pool.synced_at else None
+            if not force and current and self._up_to_date(current, synced_at, caches):
+                return None  # another worker (or an earlier save) already wrote this state
+
+            version = f"v{FORMAT_VERSION}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}"
+            final_path = os.path.join(self.directory, version)
+            tmp_path = f"{final_path}.tmp"
+            os.makedirs(tmp_path)
+
+            meta = {
+                'format': FORMAT_VERSION,
+                'schema': schema_fingerprint(),
+                'source': self.source,
+                'created_at': time.time(),
+                'synced_at': synced_at,
+            }
+            if pool is not None:
+                rows, sorted_ids, sorted_rows, tables = pool.export()
+                for name, array in zip(POOL_ARRAYS, (rows, sorted_ids, sorted_rows)):
+                    np.save(os.path.join(tmp_path, f'pool_{name}.npy'), np.ascontiguousarray(array))
+                meta['pool'] = {'size': len(rows), 'tables': tables}
+            meta.update(caches)
+            if lane_index is not None:
+                meta['lanes_source_count'] = lanes_source_count
+
+            write_json_atomic(os.path.join(tmp_path, 'meta.json'), json.dumps(meta))
+            os.rename(tmp_path, final_path)
+            write_json_atomic(self.current_path, json.dumps({'version': version}))
+            self._prune(version)
+
+        self.stats['saved'] = version
+        return final_path
+
+    def load(self, pool=None, geocoder=None, distance_cache=None, lane_index=None, exchange_cache=None):
+        """Restore from the current snapshot; returns its meta, or None (cold start) if missing or stale"""
+        started = time.perf_counter()
+        meta = self._read_meta()
+        if meta is None:
+            return None
+
+        problem = self._staleness(meta)
+        if problem:
+            print(f"Warm-start snapshot {meta['version']} rejected: {problem}")
+            self.stats['rejected'] = f"{meta['version']}: {problem}"
+            return None
+
+        try:
+            path = os.path.join(self.directory, meta['version'])
+            if pool is not None and 'pool' in meta:
+                arrays = [np.load(os.path.join(path, f'pool_{name}.npy'), mmap_mode='c') for name in POOL_ARRAYS]
+                if arrays[0].dtype != POOL_DTYPE or any(len(a) != meta['pool']['size'] for a in arrays):
+                    raise ValueError("pool arrays do not match meta.json")
+                synced_at = datetime.fromisoformat(meta['synced_at']) if meta['synced_at'] else None
+                pool.restore(*arrays, meta['pool']['tables'], synced_at)
+            if geocoder is not None and 'geocodes' in meta:
+                geocoder.preload(meta['geocodes'])
+            if distance_cache is not None and 'distances' in meta:
+                distance_cache.preload(meta['distances'])
+            if exchange_cache is not None and 'exchange_points' in meta:
+                exchange_cache.preload(meta['exchange_points'])
+            if lane_index is not None and 'lanes' in meta:
+                lane_index.restore({(origin, destination): count for origin, destination, count in meta['lanes']},
+                                   meta.get('lanes_source_count'))
+        except Exception as e:
+            print(f"Error loading warm-start snapshot {meta['version']}: {e}")
+            self.stats['rejected'] = f"{meta['version']}: {e}"
+            return None
+
+        self.stats['loaded'] = meta['version']
+        self.stats['load_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return meta
+
+    def _read_meta(self):
+        try:
+            with open(self.current_path) as f:
+                version = json.load(f)['version']
+            with open(os.path.join(self.directory, version, 'meta.json')) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, KeyError, json.JSONDecodeError):
+            return None
+        meta['version'] = version
+        return meta
+
+    def _up_to_date(self, current, synced_at, caches):
+        """True if the current snapshot is fresh and already holds this state"""
+        if synced_at and not (current.get('synced_at') and current['synced_at'] >= synced_at):
+            return False
+        if self._staleness(current):
+            return False
+        if self.max_age and time.time() - current.get('created_at', 0) > self.max_age / 2:
+            return False
+        return all(cache_keys(name, entries) <= cache_keys(name, current.get(name, []))
+                   for name, entries in caches.items())
+
+    def _staleness(self, meta):
+        """Why a snapshot cannot be used, or None"""
+        if meta.get('format') != FORMAT_VERSION:
+            return f"format {meta.get('format')} != {FORMAT_VERSION}"
+        if meta.get('schema') != schema_fingerprint():
+            return "pool schema changed"
+        if meta.get('source') != self.source:
+            return "taken from a different database"
+        age = time.time() - meta.get('created_at', 0)
+        if self.max_age and age > self.max_age:
+            return f"{age:.0f}s old (max {self.max_age:.0f}s)"
+        return None
+
+    def _prune(self, current_version):
+        versions = sorted(name for name in os.listdir(self.directory) if name.startswith('v'))
+        # Under the lock any leftover .tmp directory is from a writer that died mid-save
+        orphaned = [name for name in versions if name.endswith('.tmp')]
+        older = [name for name in versions if name != current_version and name not in orphaned]
+        for name in orphaned + older[:max(0, len(older) - (self.keep - 1))]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    from flask import Flask
+    from config import config
+    from models.database import db
+    from utils.exchange_cache import frequent_route_pairs, listing_coordinates, locate_route_pairs
+    from utils.geocoder import BulkGeocoder
+    from utils.indian_towns import find_town
+    from utils.listing_pool import ListingPool, sync_from_database
+    from utils.route_optimizer import RouteOptimizer
+
+    def town_coordinates(city, state):
+        town = find_town(city)
+        return (town['lat'], town['lng']) if town else (None, None)
+
+    parser = argparse.ArgumentParser(description='Build or refresh the warm-start snapshot')
+    parser.add_argument('--env', default='development', choices=sorted(config))
+    parser.add_argument('--dir', help='snapshot directory (default SNAPSHOT_DIR)')
+    parser.add_argument('--exchange-pairs', type=int, default=Config.EXCHANGE_CACHE_PREWARM_PAIRS,
+                        help='busiest lane pairs to pre-warm exchange points for (0 skips)')
+    parser.add_argument('--force', action='store_true', help='write a new version even if nothing changed')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config[args.env])
+    db.init_app(app)
+
+    snapshot = WarmStartSnapshot(args.dir, app.config['SQLALCHEMY_DATABASE_URI'])
+    route_optimizer = RouteOptimizer()
+    pool, geocoder = ListingPool(), BulkGeocoder(route_optimizer)
+    distance_cache, exchange_cache = route_optimizer.distance_cache, route_optimizer.exchange_cache
+    # Carry caches (and the pool, if still valid) forward, then catch up from the database
+    snapshot.load(pool, geocoder, distance_cache, exchange_cache=exchange_cache)
+
+    with app.app_context():
+        sync_from_database(pool, db.session)
+        if args.exchange_pairs:
+            pairs = frequent_route_pairs(db.session, args.exchange_pairs)
+            # Only ends no cache, listing or known town resolves are geocoded (rate limited)
+            unresolved = locate_route_pairs(pairs, geocoder.lookup, listing_coordinates(db.session),
+                                            town_coordinates)
+            warmed = route_optimizer.prewarm_exchange_points(pairs, rate_limiter=geocoder.rate_limiter)
+            print(f"🔥 Pre-warmed exchange points for {warmed} of {len(pairs)} lane pairs "
+                  f"({unresolved} route ends left to geocode)")
+
+    path = snapshot.save(pool, geocoder, distance_cache, exchange_cache=exchange_cache, force=args.force)
+    if path:
+        print(f"✅ Snapshot {os.path.basename(path)}: {len(pool)} listings, "
+              f"{len(geocoder.cached_items())} geocodes, {len(distance_cache)} distances, "
+              f"{len(exchange_cache)} exchange pairs")
+    else:
+        print("✅ Current snapshot is already up to date")
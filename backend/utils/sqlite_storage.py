@@ -0,0 +1,168 @@
+"""
+Embedded SQLite backend for the local API.
+
+Each collection is a table holding the record as JSON plus the fields from
+INDEXED_FIELDS extracted into indexed columns, so lookups, listing filters
+and the reverse-lane join run as indexed SQL. Import existing JSON files once
+with:
+
+    python -m utils.sqlite_storage --data-dir local_data
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from config import Config
+from .local_storage import LocalStore, COLLECTION_FILES, read_json_file, matches_criteria
+from .memory_storage import INDEXED_FIELDS
+
+DB_FILE = 'local.db'
+
+
+def collection_columns(collection):
+    return [field for field in INDEXED_FIELDS.get(collection, ()) if not isinstance(field, tuple)]
+
+
+class SqliteStore(LocalStore):
+    """SQLite database in WAL mode with one connection per thread"""
+
+    label = 'Local SQLite Database'
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.db_path = os.path.join(data_dir, DB_FILE)
+        self.local = threading.local()
+        self._create_schema()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        with conn:
+            for collection in COLLECTION_FILES:
+                columns = ''.join(f", {column}" for column in collection_columns(collection))
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {collection} "
+                             f"(seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, data TEXT NOT NULL{columns})")
+                for field in INDEXED_FIELDS.get(collection, ()):
+                    fields = field if isinstance(field, tuple) else (field,)
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{collection}_{'_'.join(fields)} "
+                                 f"ON {collection} ({', '.join(fields)})")
+
+    def _row_values(self, collection, record):
+        return [record['id'], json.dumps(record, default=str)] + [record.get(c) for c in collection_columns(collection)]
+
+    def _where(self, collection, criteria):
+        """SQL for criteria on indexed columns; the rest is returned for filtering in Python"""
+        columns = collection_columns(collection)
+        clauses, params, remaining = [], [], {}
+        for field, expected in criteria.items():
+            if field == 'id' or field in columns:
+                if isinstance(expected, (list, tuple, set, frozenset)):
+                    expected = list(expected)
+                    clauses.append(f"{field} IN ({', '.join('?' * len(expected))})" if expected else "0")
+                    params.extend(expected)
+                else:
+                    clauses.append(f"{field} IS ?")
+                    params.append(expected)
+            else:
+                remaining[field] = expected
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params, remaining
+
+    def _select(self, collection, criteria, limit=None):
+        where, params, remaining = self._where(collection, criteria)
+        sql = f"SELECT data FROM {collection}{where} ORDER BY seq"
+        if limit and not remaining:
+            sql += f" LIMIT {int(limit)}"
+        records = (json.loads(row[0]) for row in self._connection().execute(sql, params))
+        return [r for r in records if matches_criteria(r, remaining)]
+
+    def all(self, collection):
+        return self._select(collection, {})
+
+    def get(self, collection, record_id):
+        row = self._connection().execute(f"SELECT data FROM {collection} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, collection, **criteria):
+        return self._select(collection, criteria)
+
+    def find_one(self, collection, **criteria):
+        records = self._select(collection, criteria, limit=1)
+        return records[0] if records else None
+
+    def count(self, collection):
+        return self._connection().execute(f"SELECT COUNT(*) FROM {collection}").fetchone()[0]
+
+    def insert(self, collection, record):
+        self.insert_many(collection, [record])
+        return record
+
+    def insert_many(self, collection, records, replace=False):
+        columns = ['id', 'data'] + collection_columns(collection)
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+        conn = self._connection()
+        with conn:
+            conn.executemany(f"{verb} INTO {collection} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                             [self._row_values(collection, r) for r in records])
+
+    def update(self, collection, record_ids, changes):
+        record_ids = list(record_ids)
+        if not record_ids:
+            return 0
+        columns = collection_columns(collection)
+        conn = self._connection()
+        with conn:
+            rows = conn.execute(f"SELECT data FROM {collection} WHERE id IN ({', '.join('?' * len(record_ids))})",
+                                record_ids).fetchall()
+            updates = []
+            for (data,) in rows:
+                record = json.loads(data)
+                record.update(changes)
+                updates.append(self._row_values(collection, record)[1:] + [record['id']])
+            assignments = ', '.join(['data = ?'] + [f"{c} = ?" for c in columns])
+            conn.executemany(f"UPDATE {collection} SET {assignments} WHERE id = ?", updates)
+        return len(updates)
+
+    def reverse_lane_pairs(self):
+        conn = self._connection()
+        rows = conn.execute("SELECT a.data, b.data FROM cargo a JOIN cargo b "
+                            "ON b.origin = a.destination AND b.destination = a.origin AND b.seq > a.seq "
+                            "ORDER BY a.seq, b.seq")
+        return [(json.loads(a), json.loads(b)) for a, b in rows]
+
+    def import_json(self, json_dir):
+        """Copy the JSON collection files into the database; re-running replaces by id"""
+        counts = {}
+        for collection, file_name in COLLECTION_FILES.items():
+            records = read_json_file(os.path.join(json_dir, file_name))
+            self.insert_many(collection, records, replace=True)
+            counts[collection] = len(records)
+        return counts
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import local JSON data files into SQLite')
+    parser.add_argument('--data-dir', default=Config.LOCAL_DATA_DIR, help='directory holding the JSON files')
+    parser.add_argument('--db-dir', help='directory for the database (defaults to --data-dir)')
+    args = parser.parse_args()
+
+    store = SqliteStore(args.db_dir or args.data_dir)
+    counts = store.import_json(args.data_dir)
+    store.close()
+    print(f"✅ Imported {counts['users']} users, {counts['cargo']} cargo listings and "
+          f"{counts['matches']} matches into {store.db_path}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for corridor matching.
+
+Builds a CorridorIndex over synthetic routes between Indian towns, then
+times both lookups (loads along a route, routes a load fits along) and
+checks a few answers against a brute-force scan of every route:
+
+    python scripts/bench_corridor_index.py --routes 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.corridor_index import CorridorIndex, point_segment_distance
+from utils.indian_towns import INDIAN_TOWNS
+
+
+def make_ends(rng):
+    """A route between two random towns, ends jittered by up to ~10 km"""
+    origin, destination = rng.sample(INDIAN_TOWNS, 2)
+    return tuple(value + rng.uniform(-0.1, 0.1)
+                 for value in (origin['lat'], origin['lng'], destination['lat'], destination['lng']))
+
+
+def brute_force_carriers(index, ends, detour_km):
+    """carriers_for_load() by measuring the load against every route"""
+    radius = detour_km / (2 * index.road_factor)
+    found = set()
+    for route, listing_id in enumerate(index.ids):
+        first, count = index.first_segment[route], index.segment_counts[route]
+        segments = index.segments[first:first + count].astype(np.float64)
+        offsets, lengths = index.segment_offsets[first:first + count], index.segment_lengths[first:first + count]
+        measured = []
+        for lat, lng in (ends[:2], ends[2:]):
+            distance, t = point_segment_distance(lat, lng, segments)
+            nearest = int(np.argmin(distance))
+            measured.append((distance[nearest], offsets[nearest] + t[nearest] * lengths[nearest]))
+        (off_pickup, pickup), (off_dropoff, dropoff) = measured
+        if max(off_pickup, off_dropoff) <= radius and pickup < dropoff and \
+                2 * index.road_factor * (off_pickup + off_dropoff) <= detour_km:
+            found.add(listing_id)
+    return found
+
+
+def timed(query, probes):
+    times = []
+    for probe in probes:
+        started = time.perf_counter()
+        query(probe)
+        times.append((time.perf_counter() - started) * 1000)
+    return np.median(times), np.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time corridor lookups against many active routes')
+    parser.add_argument('--routes', type=int, default=100000)
+    parser.add_argument('--detour-km', type=float, default=60)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--verify', type=int, default=3, help='queries checked against a brute-force scan')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    routes = [(f"listing-{i}", f"user-{i % 5000}", make_ends(rng), None) for i in range(args.routes)]
+
+    print(f"🚛 Indexing {args.routes:,} great-circle routes...")
+    index = CorridorIndex()
+    started = time.perf_counter()
+    index.extend(routes)
+    index.reindex()
+    build_seconds = time.perf_counter() - started
+
+    probes = rng.sample(range(args.routes), min(args.queries, args.routes))
+    along_median, along_p95 = timed(lambda i: index.loads_along(routes[i][0], args.detour_km), probes)
+    carriers_median, carriers_p95 = timed(
+        lambda i: index.carriers_for_load(routes[i][2], args.detour_km, exclude_id=routes[i][0]), probes)
+
+    mismatches = 0
+    for i in probes[:args.verify]:
+        found = {match['id'] for match in index.carriers_for_load(routes[i][2], args.detour_km, limit=args.routes)}
+        mismatches += found != brute_force_carriers(index, routes[i][2], args.detour_km)
+
+    print()
+    print(f"✅ Built in {build_seconds:.1f}s: {index.segment_count:,} segments in {len(index.segment_cells):,} grid entries")
+    print(f"✅ loads_along:       median {along_median:.1f} ms, p95 {along_p95:.1f} ms")
+    print(f"✅ carriers_for_load: median {carriers_median:.1f} ms, p95 {carriers_p95:.1f} ms")
+    print(f"{'✅' if not mismatches else '❌'} {args.verify - mismatches}/{args.verify} lookups match a brute-force scan")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the compact matching pool.
+
+Measures bytes per resident listing held as SQLAlchemy objects, as dicts
+and in a ListingPool, then times one vectorized scoring pass over the pool:
+
+    python scripts/bench_listing_pool.py --listings 1000000
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from models.database import CargoListing
+from utils.listing_pool import ListingPool
+
+CITIES = [
+    ('Mumbai', 'Maharashtra', 19.0760, 72.8777), ('Delhi', 'Delhi', 28.7041, 77.1025),
+    ('Bangalore', 'Karnataka', 12.9716, 77.5946), ('Chennai', 'Tamil Nadu', 13.0827, 80.2707),
+    ('Kolkata', 'West Bengal', 22.5726, 88.3639), ('Hyderabad', 'Telangana', 17.3850, 78.4867),
+    ('Pune', 'Maharashtra', 18.5204, 73.8567), ('Ahmedabad', 'Gujarat', 23.0225, 72.5714),
+    ('Jaipur', 'Rajasthan', 26.9124, 75.7873), ('Lucknow', 'Uttar Pradesh', 26.8467, 80.9462),
+]
+CARGO_TYPES = ['electronics', 'textiles', 'machinery', 'food', 'chemicals', 'steel', 'furniture']
+
+
+def make_listing(rng, users):
+    """A listing dict shaped like CargoListing.to_dict()"""
+    origin, destination = rng.sample(CITIES, 2)
+    pickup = date(2025, 1, 1) + timedelta(days=rng.randrange(90))
+    now = datetime.utcnow()
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'user_id': rng.choice(users),
+        'title': f"{rng.choice(CARGO_TYPES).title()} load {origin[0]} to {destination[0]}",
+        'description': 'Palletised, forklift required at both ends',
+        'origin_city': origin[0], 'origin_state': origin[1],
+        'origin_lat': origin[2], 'origin_lng': origin[3],
+        'destination_city': destination[0], 'destination_state': destination[1],
+        'destination_lat': destination[2], 'destination_lng': destination[3],
+        'cargo_type': rng.choice(CARGO_TYPES),
+        'weight': round(rng.uniform(1, 25), 1),
+        'dimensions': {'length': 6, 'width': 2.4, 'height': 2.5},
+        'special_requirements': rng.choice([None, None, 'temperature controlled', 'fragile']),
+        'pickup_date': pickup,
+        'delivery_date': pickup + timedelta(days=rng.randrange(1, 6)),
+        'budget': rng.choice([None, 25000.0, 40000.0, 60000.0]),
+        'price_per_km': 45.0,
+        'status': 'active',
+        'is_exchange_eligible': True,
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def measure(build):
+    """(result, bytes allocated by build() that are still alive)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory per listing: ORM objects, dicts, ListingPool')
+    parser.add_argument('--listings', type=int, default=1000000, help='listings loaded into the pool')
+    parser.add_argument('--sample', type=int, default=20000, help='listings used to size ORM objects and dicts')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    users = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(5000)]
+
+    print(f"🚛 Sizing {args.sample:,} ORM objects and dicts...")
+    sample = [make_listing(rng, users) for _ in range(args.sample)]
+    orm_objects, orm_bytes = measure(lambda: [CargoListing(**listing) for listing in sample])
+    del orm_objects
+    dicts, dict_bytes = measure(lambda: [
+        {k: v.isoformat() if hasattr(v, 'isoformat') else v for k, v in listing.items()} for listing in sample])
+    del dicts, sample
+
+    print(f"🚛 Loading {args.listings:,} listings into a ListingPool...")
+    started = time.perf_counter()
+    pool, pool_bytes = measure(lambda: _load_pool(rng, users, args.listings))
+    load_seconds = time.perf_counter() - started
+
+    probe = make_listing(rng, users)
+    started = time.perf_counter()
+    scores, eligible = pool.compatibility_scores(probe)
+    score_ms = (time.perf_counter() - started) * 1000
+
+    orm_per, dict_per, pool_per = orm_bytes / args.sample, dict_bytes / args.sample, pool_bytes / len(pool)
+    print()
+    print(f"{'representation':<18}{'bytes/listing':>15}{'for ' + format(args.listings, ',') + ' listings':>26}")
+    for name, per in (('SQLAlchemy object', orm_per), ('dict', dict_per), ('ListingPool', pool_per)):
+        print(f"{name:<18}{per:>15,.0f}{per * args.listings / 2**20:>22,.0f} MiB")
+    print()
+    print(f"✅ ListingPool is {orm_per / pool_per:.0f}x smaller than ORM objects, {dict_per / pool_per:.0f}x smaller than dicts")
+    print(f"✅ Loaded in {load_seconds:.1f}s (under tracemalloc); one scoring pass over {len(pool):,} listings took {score_ms:.0f} ms "
+          f"({int((eligible & (scores > 50)).sum()):,} candidates)")
+
+
+def _load_pool(rng, users, count):
+    pool = ListingPool()
+    pool.extend(make_listing(rng, users) for _ in range(count))
+    return pool
+
+
+if __name__ == '__main__':
+    main()